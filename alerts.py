@@ -0,0 +1,273 @@
+"""
+MARS-SENTINEL Alert Dispatcher
+Sends status transitions to external systems (pager webhooks, mission log, annunciators)
+
+The ingest worker only calls `observe(reading)`: a dict lookup per reading and,
+on a status change, one non-blocking put per sink. Each sink has its own
+bounded queue (drop_oldest) and its own worker thread, so a slow or dead sink
+only ever backs up its own queue - never ingest, never the other sinks.
+
+A sink worker waits for an alert, gathers whatever else arrives within the
+batch window, drops an alert that would only repeat the state it last
+delivered for that suit (inside its dedup window), and delivers the batch. A
+transition that changes what the sink last saw is always sent, so a flap
+OK -> DANGER -> OK -> DANGER still leaves the pager showing DANGER. A failed delivery is retried with
+exponential backoff; after the last attempt the batch is counted as failed
+and dropped.
+
+Sinks:
+    webhook - POST {"alerts": [...]} as JSON to an HTTP(S) URL
+    file    - append one JSON line per alert (a mission alert log)
+    socket  - one JSON line per alert to tcp://host:port or unix:///path
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+from collections import deque
+
+from ingest_queue import IngestQueue
+
+SINK_QUEUE_SIZE = 256
+BATCH_WINDOW_S = 0.5        # wait this long after the first alert for more to batch with it
+MAX_BATCH = 50
+DEDUP_WINDOW_S = 60.0       # a suit's already-delivered state is not re-sent within this window
+RETRY_ATTEMPTS = 5
+BACKOFF_START_S = 0.5
+BACKOFF_MAX_S = 30.0
+SEND_TIMEOUT_S = 5.0
+RECENT_ALERTS = 50
+
+class Sink:
+    """A delivery target - subclasses implement send(batch) and raise on failure"""
+
+    kind = 'sink'
+
+    def __init__(self, name, dedup_window=DEDUP_WINDOW_S, batch_window=BATCH_WINDOW_S,
+                 retry_attempts=RETRY_ATTEMPTS, backoff=BACKOFF_START_S):
+        self.name = name
+        self.dedup_window = dedup_window
+        self.batch_window = batch_window
+        self.retry_attempts = retry_attempts
+        self.backoff = backoff
+        self.queue = IngestQueue(f'alerts:{name}', SINK_QUEUE_SIZE, 'drop_oldest')
+        self.last_delivered = {}    # device_id -> (state, monotonic time) last delivered to this sink
+        self.delivered = 0
+        self.batches = 0
+        self.deduplicated = 0
+        self.retries = 0
+        self.failed = 0
+        self.last_error = None
+        self.last_delivery_ms = None
+
+    def send(self, batch):
+        raise NotImplementedError
+
+    def run(self, stop):
+        """Worker loop - one thread per sink"""
+        while not stop.is_set():
+            batch = self.queue.get_batch(MAX_BATCH, timeout=0.5)
+            if not batch:
+                continue
+            if len(batch) < MAX_BATCH and self.batch_window:
+                stop.wait(self.batch_window)
+                batch += self.queue.get_batch(MAX_BATCH - len(batch), timeout=0)
+            batch = self.deduplicate(batch)
+            if batch:
+                self.deliver(batch, stop)
+
+    def deduplicate(self, batch):
+        """Drop alerts whose new state is the one this sink already shows for the suit"""
+        now = time.monotonic()
+        shown = {}      # device_id -> state after the alerts kept so far in this batch
+        fresh = []
+        for alert in batch:
+            device_id = alert['device_id']
+            state = alert['dedup_key']
+            if device_id in shown:
+                repeat = shown[device_id] == state
+            else:
+                delivered = self.last_delivered.get(device_id)
+                repeat = (delivered is not None and delivered[0] == state
+                          and now - delivered[1] < self.dedup_window)
+            if repeat:
+                self.deduplicated += 1
+                continue
+            shown[device_id] = state
+            fresh.append(alert)
+        return fresh
+
+    def deliver(self, batch, stop):
+        """Send with exponential backoff; gives up after retry_attempts"""
+        delay = self.backoff
+        for attempt in range(1, self.retry_attempts + 1):
+            started = time.perf_counter()
+            try:
+                self.send(batch)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if attempt == self.retry_attempts or stop.is_set():
+                    break
+                self.retries += 1
+                stop.wait(delay)
+                delay = min(delay * 2, BACKOFF_MAX_S)
+                continue
+            self.delivered += len(batch)
+            self.batches += 1
+            delivered_at = time.monotonic()
+            for alert in batch:
+                self.last_delivered[alert['device_id']] = (alert['dedup_key'], delivered_at)
+            self.last_delivery_ms = round((time.perf_counter() - started) * 1000, 1)
+            return True
+        # Not delivered, so last_delivered still holds what the sink really shows
+        self.failed += len(batch)
+        print(f"❌ Alert sink {self.name} dropped {len(batch)} alert(s): {self.last_error}")
+        return False
+
+    def status(self):
+        return {
+            'kind': self.kind,
+            'queue': self.queue.stats(),
+            'delivered': self.delivered,
+            'batches': self.batches,
+            'deduplicated': self.deduplicated,
+            'retries': self.retries,
+            'failed': self.failed,
+            'last_error': self.last_error,
+            'last_delivery_ms': self.last_delivery_ms,
+        }
+
+def public(alert):
+    """Alert as sent - without the internal dedup key"""
+    return {key: value for key, value in alert.items() if key != 'dedup_key'}
+
+class WebhookSink(Sink):
+    kind = 'webhook'
+
+    def __init__(self, name, url, timeout=SEND_TIMEOUT_S, **options):
+        super().__init__(name, **options)
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, batch):
+        body = json.dumps({'alerts': [public(alert) for alert in batch]}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()   # urlopen raises HTTPError on 4xx/5xx
+
+class FileSink(Sink):
+    kind = 'file'
+
+    def __init__(self, name, path, **options):
+        options.setdefault('dedup_window', 0)   # a log keeps every transition
+        super().__init__(name, **options)
+        self.path = path
+
+    def send(self, batch):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as log:
+            for alert in batch:
+                log.write(json.dumps(public(alert)) + '\n')
+
+class SocketSink(Sink):
+    kind = 'socket'
+
+    def __init__(self, name, address, timeout=SEND_TIMEOUT_S, **options):
+        super().__init__(name, **options)
+        self.address = address
+        self.timeout = timeout
+
+    def connect(self):
+        if self.address.startswith('unix://'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address[len('unix://'):])
+            return sock
+        host, _, port = self.address[len('tcp://'):].rpartition(':')
+        return socket.create_connection((host, int(port)), timeout=self.timeout)
+
+    def send(self, batch):
+        lines = ''.join(json.dumps(public(alert)) + '\n' for alert in batch).encode('utf-8')
+        with self.connect() as sock:
+            sock.sendall(lines)
+
+def sink_from_spec(name, spec, **options):
+    """Sink for a 'http(s)://...', 'file:path', 'tcp://host:port' or 'unix:///path' spec"""
+    if spec.startswith(('http://', 'https://')):
+        return WebhookSink(name, spec, **options)
+    if spec.startswith(('tcp://', 'unix://')):
+        return SocketSink(name, spec, **options)
+    if spec.startswith('file:'):
+        return FileSink(name, spec[len('file:'):], **options)
+    raise ValueError(f"Unknown alert sink: {spec}")
+
+class AlertDispatcher:
+    """Turns per-suit status changes into alerts and hands them to every sink"""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.last_status = {}    # device_id -> status of its previous reading
+        self.recent = deque(maxlen=RECENT_ALERTS)
+        self.raised = 0
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        if self.threads:
+            self.start_sink(sink)
+
+    def start(self):
+        for sink in self.sinks:
+            self.start_sink(sink)
+
+    def start_sink(self, sink):
+        thread = threading.Thread(target=sink.run, args=(self.stop_event,), name=f'alert-{sink.name}', daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def observe(self, reading):
+        """Called on every reading - cheap unless the suit's status changed"""
+        previous = self.last_status.get(reading.device_id, 'OK')
+        status = reading.status
+        if status == previous:
+            return None
+        self.last_status[reading.device_id] = status
+        alert = {
+            'device_id': reading.device_id,
+            'from': previous,
+            'to': status,
+            'timestamp': reading.timestamp,
+            'alarms': reading.alarms,
+            'mission_id': reading.mission_id,
+            'mode': reading.mode,
+            'readings': {'temperature': reading.temperature, 'humidity': reading.humidity,
+                         'gas_level': reading.gas_level, 'ir_detection': reading.ir_detection,
+                         'distance': reading.distance},
+            'dedup_key': (status, reading.alarm_mask),    # the state this alert moves the suit to
+        }
+        self.raised += 1
+        self.recent.append(alert)
+        for sink in self.sinks:
+            sink.queue.put(alert)
+        return alert
+
+    def recent_alerts(self, limit=RECENT_ALERTS):
+        return [public(alert) for alert in list(self.recent)[-limit:]]
+
+    def status(self):
+        return {
+            'raised': self.raised,
+            'sinks': {sink.name: sink.status() for sink in self.sinks},
+        }
@@ -0,0 +1,364 @@
+"""
+MARS-SENTINEL Analysis Cache
+Incremental mission-log analysis with sidecar partial aggregates
+
+The aggregates behind a mission summary are all mergeable: counts per
+status and alarm, first/last timestamp, the first DANGER rows, suit-time per
+status with each suit's last reading (so appended rows continue its clock), and
+per sensor a count of each distinct value. Value counts are small (readings are rounded
+to sensor resolution) and still give exact min/max/avg/spikes and the same
+interpolated percentiles as np.percentile over the raw column.
+
+After an analysis they are saved next to the CSV as `<file>.analysis.json`
+together with the byte offset of the last complete line, the file size and
+mtime, and hashes of the file head and of the bytes just before the offset.
+The next run then:
+    - file unchanged (size, mtime, head)  -> uses the cached aggregates as they are
+    - file only appended (head and the bytes before the offset still match)
+                                           -> parses from the offset and merges the tail
+    - anything else (rewritten, truncated) -> full rescan
+so a nightly report over a growing log costs time proportional to the new rows.
+With NumPy installed large chunks are parsed column-wise.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+
+from data_analysis import (EXPORT_HEADER, EXPORT_HEADERS, SPIKE_RULES, STAT_SENSORS, TIMELINE_LIMIT, StatusClock,
+                           _intern, _percentile, load_numpy)
+
+CACHE_VERSION = 2
+CACHE_SUFFIX = '.analysis.json'
+HEAD_BYTES = 64 * 1024          # hashed from the start of the file
+SEAM_BYTES = 4 * 1024           # hashed just before the stored offset
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+SENSOR_COLUMNS = {sensor: EXPORT_HEADER.index(sensor) for sensor in STAT_SENSORS}
+NUMPY_MIN_LINES = 1000          # smaller tails are quicker row by row
+
+class MissionAggregate:
+    """Mergeable partial aggregates over export/segment CSV rows"""
+
+    def __init__(self):
+        self.total_events = 0
+        self.first_timestamp = None
+        self.last_timestamp = 0
+        self.status_counts = Counter()
+        self.clock = StatusClock()
+        self.alarm_types = Counter()
+        self.values = {sensor: Counter() for sensor in STAT_SENSORS}
+        self.danger_rows = []           # (timestamp, alarms) of the first TIMELINE_LIMIT DANGER rows
+        self.danger_total = 0
+        self.skipped_rows = 0
+
+    def add_lines(self, lines):
+        """Fold complete CSV data lines (no header) into the aggregates"""
+        np = load_numpy() if len(lines) >= NUMPY_MIN_LINES else None
+        if np is not None:
+            try:
+                numeric = np.loadtxt(lines, delimiter=',', usecols=[0] + list(SENSOR_COLUMNS.values()),
+                                     dtype=np.float64, ndmin=2)
+            except ValueError:
+                pass  # empty or malformed fields - the row parser skips just those rows
+            else:
+                self.add_columns(lines, numeric)
+                return
+
+        combos = Counter()
+        values = self.values
+        for line in lines:
+            parts = line.rstrip('\r\n').split(',', 6)
+            if len(parts) < 7:
+                self.skipped_rows += 1
+                continue
+            try:
+                timestamp = int(parts[0])
+                readings = [(sensor, float(parts[column])) for sensor, column in SENSOR_COLUMNS.items()
+                            if parts[column]]
+            except ValueError:
+                self.skipped_rows += 1
+                continue
+
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+            self.total_events += 1
+            for sensor, value in readings:
+                values[sensor][value] += 1
+
+            combo = parts[6]
+            combos[combo] += 1
+            status, _alarms, _mode, *device = combo.split(',')
+            self.clock.add(device[0] if device else '', timestamp, status)
+            if combo.startswith('DANGER,'):
+                self.danger_total += 1
+                if len(self.danger_rows) < TIMELINE_LIMIT:
+                    self.danger_rows.append((timestamp, combo.split(',')[1]))
+
+        self.add_combos(combos)
+
+    def add_columns(self, lines, numeric):
+        """Vectorized add_lines for a chunk that parsed cleanly"""
+        np = load_numpy()
+        timestamps = numeric[:, 0]
+        if self.first_timestamp is None:
+            self.first_timestamp = int(timestamps[0])
+        self.last_timestamp = int(timestamps[-1])
+        self.total_events += len(lines)
+        for index, sensor in enumerate(SENSOR_COLUMNS, start=1):
+            values, counts = np.unique(numeric[:, index], return_counts=True)
+            self.values[sensor].update(dict(zip(values.tolist(), counts.tolist())))
+
+        combo_texts = [line.rstrip('\r\n').split(',', 6)[6] for line in lines]
+        combos = Counter(combo_texts)
+
+        # Status and device of each distinct combination, then per-row codes for the status clock
+        status_names, device_names, combo_codes = [], [], {}
+        for combo in combos:
+            status, _alarms, _mode, *device = combo.split(',')
+            combo_codes[combo] = (_intern(status_names, status), _intern(device_names, device[0] if device else ''))
+        codes = np.array([combo_codes[combo] for combo in combo_texts], dtype=np.int64).reshape(-1, 2)
+        self.clock.add_columns(timestamps.astype(np.int64), codes[:, 0], status_names, codes[:, 1], device_names)
+
+        self.danger_total += sum(count for combo, count in combos.items() if combo.startswith('DANGER,'))
+        if len(self.danger_rows) < TIMELINE_LIMIT and any(combo.startswith('DANGER,') for combo in combos):
+            for row, combo in enumerate(combo_texts):
+                if combo.startswith('DANGER,'):
+                    self.danger_rows.append((int(timestamps[row]), combo.split(',')[1]))
+                    if len(self.danger_rows) >= TIMELINE_LIMIT:
+                        break
+        self.add_combos(combos)
+
+    def add_combos(self, combos):
+        # status,alarms,mode combinations are few - split each one once
+        for combo, count in combos.items():
+            status, alarms, _mode = combo.split(',')[:3]
+            self.status_counts[status] += count
+            for alarm in alarms.split('|'):
+                if alarm:
+                    self.alarm_types[alarm.strip()] += count
+
+    def merge(self, other):
+        """Fold aggregates of rows that come after this one's
+
+        `other` should have started its status clock from this one's
+        device_last, so the time across the seam is counted.
+        """
+        if other.total_events:
+            if self.first_timestamp is None:
+                self.first_timestamp = other.first_timestamp
+            self.last_timestamp = other.last_timestamp
+        self.total_events += other.total_events
+        self.status_counts.update(other.status_counts)
+        self.clock.status_ms.update(other.clock.status_ms)
+        self.clock.device_last.update(other.clock.device_last)
+        self.alarm_types.update(other.alarm_types)
+        for sensor, counts in other.values.items():
+            self.values[sensor].update(counts)
+        self.danger_rows.extend(other.danger_rows[:TIMELINE_LIMIT - len(self.danger_rows)])
+        self.danger_total += other.danger_total
+        self.skipped_rows += other.skipped_rows
+        return self
+
+    def sensor_stats(self, sensor):
+        counts = self.values[sensor]
+        if not counts:
+            return None
+        ordered = sorted(counts.items())
+        total = sum(counts.values())
+        stats = {
+            'count': total,
+            'min': ordered[0][0],
+            'max': ordered[-1][0],
+            'avg': sum(value * count for value, count in ordered) / total,
+            'p50': percentile_from_counts(ordered, total, 50),
+            'p95': percentile_from_counts(ordered, total, 95),
+            'p99': percentile_from_counts(ordered, total, 99),
+        }
+        if sensor in SPIKE_RULES:
+            comparison, limit = SPIKE_RULES[sensor]
+            spikes = [(value, count) for value, count in ordered
+                      if (value > limit if comparison == '>' else value < limit)]
+            stats['spikes'] = sum(count for _value, count in spikes)
+            stats['spike_peak'] = ((spikes[-1][0] if comparison == '>' else spikes[0][0])
+                                   if spikes else None)
+        return stats
+
+    def summary(self):
+        """Same shape as data_analysis.summarize_columns()/summarize_rows()"""
+        first = self.first_timestamp or 0
+        sensors = {}
+        for sensor in STAT_SENSORS:
+            stats = self.sensor_stats(sensor)
+            if stats is not None:
+                sensors[sensor] = stats
+        return {
+            'total_events': self.total_events,
+            'first_timestamp': first,
+            'last_timestamp': self.last_timestamp,
+            'status_counts': dict(self.status_counts),
+            'status_ms': dict(self.clock.status_ms),
+            'alarm_types': dict(self.alarm_types),
+            'sensors': sensors,
+            'danger_timeline': [((timestamp - first) / 1000, alarms) for timestamp, alarms in self.danger_rows],
+            'danger_total': self.danger_total,
+        }
+
+    def to_json(self):
+        return {
+            'total_events': self.total_events,
+            'first_timestamp': self.first_timestamp,
+            'last_timestamp': self.last_timestamp,
+            'status_counts': dict(self.status_counts),
+            'clock': self.clock.to_json(),
+            'alarm_types': dict(self.alarm_types),
+            'values': {sensor: sorted(counts.items()) for sensor, counts in self.values.items()},
+            'danger_rows': self.danger_rows,
+            'danger_total': self.danger_total,
+            'skipped_rows': self.skipped_rows,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        aggregate = cls()
+        aggregate.total_events = data['total_events']
+        aggregate.first_timestamp = data['first_timestamp']
+        aggregate.last_timestamp = data['last_timestamp']
+        aggregate.status_counts = Counter(data['status_counts'])
+        aggregate.clock = StatusClock.from_json(data['clock'])
+        aggregate.alarm_types = Counter(data['alarm_types'])
+        for sensor in STAT_SENSORS:
+            aggregate.values[sensor] = Counter({value: count for value, count in data['values'].get(sensor, [])})
+        aggregate.danger_rows = [tuple(row) for row in data['danger_rows']]
+        aggregate.danger_total = data['danger_total']
+        aggregate.skipped_rows = data.get('skipped_rows', 0)
+        return aggregate
+
+def percentile_from_counts(ordered, total, q):
+    """np.percentile (linear) over the expanded values of sorted (value, count) pairs"""
+    position = (total - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, total - 1)
+    lower_value = upper_value = None
+    seen = 0
+    for value, count in ordered:
+        seen += count
+        if lower_value is None and seen > lower:
+            lower_value = value
+        if seen > upper:
+            upper_value = value
+            break
+    return _percentile([lower_value, upper_value], 100 * (position - lower))
+
+def file_hash(csv_file, start, length):
+    with open(csv_file, 'rb') as file:
+        file.seek(start)
+        return hashlib.sha256(file.read(length)).hexdigest()
+
+def cache_path(csv_file):
+    return csv_file + CACHE_SUFFIX
+
+def load_cache(csv_file):
+    try:
+        with open(cache_path(csv_file), 'r') as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if cache.get('version') != CACHE_VERSION:
+        return None
+    return cache
+
+def save_cache(csv_file, cache):
+    path = cache_path(csv_file)
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w') as cache_file:
+            json.dump(cache, cache_file, separators=(',', ':'))
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"⚠️ Could not write analysis cache {path}: {e}")
+
+def resume_point(csv_file, cache, stat):
+    """'hit', 'append' or None (rescan) for a cached entry against the file as it is now"""
+    if cache is None or cache.get('path') != os.path.abspath(csv_file):
+        return None
+    offset = cache['offset']
+    if stat.st_size < offset:
+        return None
+    head_length = cache['head_length']
+    if file_hash(csv_file, 0, head_length) != cache['head_hash']:
+        return None
+    if stat.st_size == cache['size'] and stat.st_mtime_ns == cache['mtime_ns']:
+        return 'hit'
+    seam_start = max(offset - SEAM_BYTES, 0)
+    if file_hash(csv_file, seam_start, offset - seam_start) != cache['seam_hash']:
+        return None
+    return 'append'
+
+def scan(csv_file, offset, aggregate):
+    """Parse complete lines from a byte offset; returns the offset after the last one"""
+    with open(csv_file, 'rb') as file:
+        if offset == 0:
+            header = file.readline()
+            if header.decode('utf-8').strip().split(',') not in EXPORT_HEADERS:
+                raise ValueError(f"unexpected header {header.strip()!r}")
+            offset = len(header)
+        else:
+            file.seek(offset)
+        remainder = b''
+        while True:
+            chunk = file.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            data = remainder + chunk
+            end = data.rfind(b'\n') + 1
+            remainder = data[end:]
+            if end:
+                aggregate.add_lines(data[:end].decode('utf-8').splitlines())
+                offset += end
+    # A trailing partial line (a writer mid-row) is left for the next run
+    return offset
+
+def cached_summary(csv_file):
+    """Mission summary for a CSV, reusing and extending its sidecar cache
+
+    Returns (summary, info) where info says how the cache was used.
+    """
+    stat = os.stat(csv_file)
+    cache = load_cache(csv_file)
+    mode = resume_point(csv_file, cache, stat)
+
+    if mode == 'hit':
+        aggregate = MissionAggregate.from_json(cache['aggregate'])
+        return aggregate.summary(), {'cache': 'hit', 'rows_parsed': 0, 'bytes_parsed': 0}
+
+    if mode == 'append':
+        aggregate = MissionAggregate.from_json(cache['aggregate'])
+        start = cache['offset']
+    else:
+        aggregate = MissionAggregate()
+        start = 0
+    tail = MissionAggregate()
+    tail.clock.device_last = dict(aggregate.clock.device_last)  # appended rows continue each suit's clock
+    offset = scan(csv_file, start, tail)
+    aggregate.merge(tail)
+
+    head_length = min(HEAD_BYTES, offset)
+    seam_start = max(offset - SEAM_BYTES, 0)
+    save_cache(csv_file, {
+        'version': CACHE_VERSION,
+        'path': os.path.abspath(csv_file),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'offset': offset,
+        'head_length': head_length,
+        'head_hash': file_hash(csv_file, 0, head_length),
+        'seam_hash': file_hash(csv_file, seam_start, offset - seam_start),
+        'aggregate': aggregate.to_json(),
+    })
+    return aggregate.summary(), {
+        'cache': 'append' if mode == 'append' else 'miss',
+        'rows_parsed': tail.total_events + tail.skipped_rows,
+        'bytes_parsed': offset - start,
+    }
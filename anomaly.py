@@ -0,0 +1,175 @@
+"""
+MARS-SENTINEL Streaming Anomaly Detection
+Incremental EWMA mean/variance, z-scores and rate-of-change per sensor per device
+
+Runs as a pipeline stage after the threshold checks in app.py. Every update is
+constant time: a device's trackers are created on first sight and then only
+their float fields are rewritten. Spike z-scores use the raw value from before
+the median filter, which removes exactly those spikes; mean, drift and stuck
+checks follow the filtered value.
+"""
+
+import math
+
+from wire_format import QUALITY_BITS, alarm_bit
+
+# Alarm names set on a reading - these are registered in wire_format.ALARM_CODES
+SPIKE_ALARMS = {
+    'temperature': 'Temperature Spike Anomaly',
+    'gas_level': 'Gas Spike Anomaly',
+}
+DRIFT_ALARMS = {
+    'temperature': 'Temperature Drift Anomaly',
+}
+STUCK_ALARMS = {
+    'temperature': 'Temperature Sensor Stuck',
+    'humidity': 'Humidity Sensor Stuck',
+    'gas_level': 'Gas Sensor Stuck',
+    'distance': 'Distance Sensor Stuck',
+}
+# Reading fields holding the value before filtering (filters.FILTER_CONFIG)
+RAW_FIELDS = {
+    'temperature': 'raw_temperature',
+    'humidity': 'raw_humidity',
+    'distance': 'raw_distance',
+}
+
+# Per-sensor tuning
+ANOMALY_CONFIG = {
+    'alpha': 0.1,           # EWMA weight for mean/variance
+    'rate_alpha': 0.05,     # EWMA weight for rate-of-change
+    'warmup': 20,           # readings before z-scores are trusted
+    'z_threshold': 4.0,     # spike when |z| exceeds this
+    'drift_per_minute': {'temperature': 1.5},  # units/min sustained rise or fall
+    # Seconds the exact same value may repeat - time, not a reading count, because the
+    # firmware reports by exception and its report rate changes with the status. The DHT11
+    # resolves whole degrees and percent, so a stable habitat holds one value for many minutes;
+    # a suit standing still keeps its distance; only the noisy gas ADC repeats quickly when dead.
+    'stuck_seconds': {'temperature': 1800, 'humidity': 1800, 'gas_level': 60, 'distance': 300},
+}
+
+class SensorTracker:
+    """Running statistics for one sensor on one device"""
+    __slots__ = ('count', 'mean', 'var', 'last_value', 'last_time', 'rate', 'stuck_since', 'z', 'active')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.last_value = None
+        self.last_time = 0
+        self.rate = 0.0
+        self.stuck_since = 0
+        self.z = 0.0
+        self.active = False     # updated by the current reading and past warm-up
+
+    def update(self, value, timestamp_ms, alpha, rate_alpha, raw=None):
+        """Fold one reading into the tracker - `raw` is the unfiltered value, if different"""
+        if self.count == 0:
+            self.mean = float(value)
+            self.stuck_since = timestamp_ms
+        else:
+            # z-score against the statistics *before* this reading
+            std = math.sqrt(self.var)
+            diff = value - self.mean
+            spike = (raw if raw is not None else value) - self.mean
+            self.z = spike / std if std > 1e-9 else 0.0
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1 - alpha) * (self.var + diff * increment)
+
+            # Rate-of-change of the smoothed mean, so sample noise does not read as drift
+            dt = (timestamp_ms - self.last_time) / 1000
+            if dt > 0:
+                self.rate += rate_alpha * (increment / dt - self.rate)
+            if value != self.last_value:
+                self.stuck_since = timestamp_ms
+
+        self.count += 1
+        self.last_value = value
+        self.last_time = timestamp_ms
+
+class AnomalyDetector:
+    """Pipeline stage flagging spikes, drift and stuck sensors"""
+
+    def __init__(self, config=None):
+        self.config = dict(ANOMALY_CONFIG, **(config or {}))
+        self.trackers = {}  # device_id -> [SensorTracker per sensor, in self.checks order]
+        # Per sensor, resolved once: (sensor, raw field, quality bit, spike bit, drift bit,
+        # drift limit per second, stuck bit, stuck limit ms) - bits and limits are 0/None when unused
+        config = self.config
+        self.checks = tuple(
+            (sensor, RAW_FIELDS.get(sensor), QUALITY_BITS[sensor],
+             alarm_bit(SPIKE_ALARMS[sensor]) if sensor in SPIKE_ALARMS else 0,
+             alarm_bit(DRIFT_ALARMS[sensor]) if sensor in DRIFT_ALARMS else 0,
+             config['drift_per_minute'][sensor] / 60 if sensor in config['drift_per_minute'] else None,
+             alarm_bit(STUCK_ALARMS[sensor]),
+             config['stuck_seconds'][sensor] * 1000 if sensor in config['stuck_seconds'] else None)
+            for sensor in STUCK_ALARMS
+        )
+
+    def device_trackers(self, device_id):
+        trackers = self.trackers.get(device_id)
+        if trackers is None:
+            trackers = self.trackers[device_id] = [SensorTracker() for _ in self.checks]
+        return trackers
+
+    def process(self, reading):
+        """Update trackers from a reading and set any anomaly alarm bits on it
+
+        The device's trackers are created on first sight; after that a reading
+        allocates no keys, lists or trackers - only the float fields are rewritten.
+        """
+        config = self.config
+        alpha = config['alpha']
+        rate_alpha = config['rate_alpha']
+        warmup = config['warmup']
+        z_threshold = config['z_threshold']
+        timestamp = reading.timestamp
+        quality = reading.quality_mask
+        trackers = self.device_trackers(reading.device_id)
+        mask = 0
+        newest_change = 0   # latest time any of this suit's channels changed value
+
+        for index, (sensor, raw_field, quality_bit, spike_bit, drift_bit, drift_limit, _stuck_bit,
+                    _stuck_ms) in enumerate(self.checks):
+            tracker = trackers[index]
+            # Substituted or out-of-range values would only teach the tracker garbage
+            if quality & quality_bit:
+                tracker.active = False
+                continue
+            # Spikes are judged on the raw value - the median filter removes exactly those
+            tracker.update(getattr(reading, sensor), timestamp, alpha, rate_alpha,
+                           getattr(reading, raw_field) if raw_field else None)
+            if tracker.stuck_since > newest_change:
+                newest_change = tracker.stuck_since
+            tracker.active = tracker.count > warmup
+            if not tracker.active:
+                continue
+
+            if spike_bit and abs(tracker.z) > z_threshold:
+                mask |= spike_bit
+            if drift_limit is not None and abs(tracker.rate) > drift_limit:
+                mask |= drift_bit
+
+        # Stuck only while the suit's other channels keep moving - when everything holds
+        # still it is a quiet habitat (and a silent board is the freshness watchdog's job)
+        for index, (_sensor, _raw, _quality, _spike, _drift, _limit, stuck_bit,
+                    stuck_ms) in enumerate(self.checks):
+            tracker = trackers[index]
+            if (tracker.active and stuck_ms is not None and timestamp - tracker.stuck_since >= stuck_ms
+                    and newest_change > tracker.stuck_since):
+                mask |= stuck_bit
+
+        # Anomalies are advisory - they raise OK to WARN but never to DANGER
+        if mask:
+            reading.alarm_mask |= mask
+            if reading.status == 'OK':
+                reading.status = 'WARN'
+
+    def reset(self, device_id=None):
+        """Forget learned statistics for one device, or all of them"""
+        if device_id is None:
+            self.trackers.clear()
+        else:
+            self.trackers.pop(device_id, None)
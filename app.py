@@ -1,13 +1,41 @@
-import serial
-import threading
 import time
+STARTED_AT = time.time()  # cold-start clock, read before the heavy imports below
+import os
+# eventlet's green DNS resolver patches dnspython at import - a few hundred ms of every start.
+# Nothing here resolves names on the event loop (alert sinks run on OS threads), so skip it.
+os.environ.setdefault('EVENTLET_NO_GREENDNS', 'yes')
+import threading
 import json
 from flask import Flask, jsonify, request, Response, send_file
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room
 from flask_cors import CORS
 import csv
 from io import StringIO
-import os
+from collections import deque
+import wire_format
+from wire_format import ALARM_BITS, QUALITY_BITS
+from readings import Reading, from_record
+import anomaly
+import forecast
+import filters
+import missions
+import serial_supervisor as supervisor
+from ingest_queue import IngestQueue, run_worker
+import latency
+import live_report
+import wal
+import rules
+import devices
+import network_ingest
+import profiler
+import device_commands
+import static_assets
+import sketches
+import alerts
+import bootstrap
+import sensor_health
+import startup
+from data_analysis import analyze_mission_data, generate_mission_report
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'astronaut-safety-sensor-key-2025')
@@ -15,9 +43,24 @@ CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Configuration - Update COM port as needed
-SERIAL_PORT = 'COM3'  # Windows: COM3, Linux/Mac: /dev/ttyUSB0 or /dev/ttyACM0
+SERIAL_PORT = 'COM3'  # Windows: COM3, Linux/Mac: /dev/ttyUSB0 or /dev/ttyACM0 ('AUTO' = probe all)
 BAUD_RATE = 9600
-DEMO_MODE = False  # Set to True to run without Arduino hardware
+DEMO_MODE = os.environ.get('DEMO_MODE', '').lower() in ('1', 'true', 'yes')  # Set to True to run without Arduino hardware
+DEMO_INTERVAL_S = float(os.environ.get('DEMO_INTERVAL_S', 0.5))
+SERVER_PORT = int(os.environ.get('PORT', 5000))
+DEV_MODE = os.environ.get('DEV_MODE', '').lower() in ('1', 'true', 'yes')  # reload dashboards when the files change
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')  # /api/admin/* is disabled unless set, then needs an X-Admin-Token header
+ALERT_SINKS = os.environ.get('ALERT_SINKS', '')  # comma-separated: https://..., file:alerts.jsonl, tcp://host:port
+SERIAL_DEVICE_ID = 'local'  # device id for readings from the USB serial port
+
+# Queues between reader -> processing -> fan-out (policies: drop_oldest, coalesce, block)
+INGEST_QUEUE_SIZE = 1000
+INGEST_POLICY = 'drop_oldest'
+EMIT_QUEUE_SIZE = 256
+EMIT_POLICY = 'coalesce'  # dashboards only need the latest reading per device when behind
+EVENT_RETENTION = 1000  # readings kept in memory (and in snapshots)
+FAN_OUT_BATCH = 64
+FAN_OUT_IDLE_S = 0.005  # fan-out poll interval when there is nothing to emit
 
 # Global state
 state = {
@@ -34,10 +77,91 @@ state = {
         'distance_danger': 20,
         'ir_danger': 1
     },
-    'current_sensors': {},
-    'events': []
+    'current_sensors': None,  # latest Reading from any device
+    'events': [],
+    'event_count': 0,
+    'seq': 0  # publish sequence number of the newest stored reading
 }
 
+# Guards state changes that are written to the WAL, so log order matches state order
+state_lock = threading.Lock()
+write_ahead_log = wal.WriteAheadLog()
+
+# Streaming stages run on every packet after the threshold checks.
+# Each stage takes the Reading and may set alarm bits on it or raise its status.
+reading_filter = filters.ReadingFilter(lambda: state['thresholds'])
+anomaly_detector = anomaly.AnomalyDetector()
+channel_health = sensor_health.SensorHealth()
+trend_forecaster = forecast.TrendForecaster(lambda: state['thresholds'])
+rule_engine = rules.RuleEngine(lambda: state['thresholds'])
+pipeline_stages = [reading_filter.confirm_danger, rule_engine.process,
+                   anomaly_detector.process, channel_health.process, trend_forecaster.process]
+
+# The serial reader only queues raw lines; workers parse/evaluate and emit
+line_queue = IngestQueue('ingest', INGEST_QUEUE_SIZE, INGEST_POLICY)
+emit_queue = IngestQueue('emit', EMIT_QUEUE_SIZE, EMIT_POLICY)
+# Non-reading events (connection, freshness) raised on worker threads, emitted by the fan-out task
+control_emits = deque(maxlen=100)
+
+# Device clock sync, per-stage latency and freshness watchdog
+latency_tracker = latency.LatencyTracker()
+
+# Serial discovery and hot reconnect for the reader thread
+serial_supervisor = supervisor.SerialSupervisor(SERIAL_PORT, BAUD_RATE)
+# Set once the WAL has been replayed - the reader may find the board before that
+state_recovered = threading.Event()
+
+# Cold-start phases for /readyz; no board on any port counts as a settled source
+startup_tracker = startup.StartupTracker(STARTED_AT, lambda: not DEMO_MODE and serial_supervisor.absent())
+
+# Mission sessions - each writes its own segment under missions/
+mission_manager = missions.MissionManager()
+
+# Live report aggregates, restarted with every mission
+mission_report_live = live_report.LiveReport()
+mission_manager.on_start.append(lambda mission: mission_report_live.reset(mission['mission_id']))
+mission_manager.on_start.append(lambda mission: rule_engine.reset())
+
+# Per-sensor percentile sketches over 1m/5m/1h/mission windows for /api/stats
+windowed_stats = sketches.WindowedStats()
+mission_manager.on_start.append(lambda mission: windowed_stats.reset_mission())
+
+# Host-to-firmware commands (thresholds, sample rates, deadbands), written by the serial reader
+device_link = device_commands.DeviceCommandChannel(lambda: state['thresholds'])
+
+# UDP/TCP listeners for Wi-Fi nodes, feeding the same ingest queue as the serial reader
+network_listener = network_ingest.NetworkIngest(
+    lambda line, received, device_id: line_queue.put((line, received, device_id)),
+    reserved_ids=(SERIAL_DEVICE_ID, devices.ALL_TARGET)
+)
+
+# On-demand stack sampling for /api/admin/profile (idle until asked)
+sampling_profiler = profiler.SamplingProfiler()
+
+# Status transitions out to webhooks / alert log / annunciator, each sink on its own worker
+alert_dispatcher = alerts.AlertDispatcher()
+for sink_number, sink_spec in enumerate(spec.strip() for spec in ALERT_SINKS.split(',') if spec.strip()):
+    try:
+        alert_dispatcher.add_sink(alerts.sink_from_spec(f'sink{sink_number + 1}', sink_spec))
+    except ValueError as e:
+        print(f"❌ {e}")
+
+# Dashboards preloaded and precompressed, served from memory with ETags
+dashboard_assets = static_assets.AssetStore(app.root_path, hot_reload=DEV_MODE)
+dashboard_assets.load(set(static_assets.DASHBOARDS.values()))
+
+# Latest reading per suit, each in its own lock-protected shard
+device_registry = devices.DeviceRegistry()
+
+# Socket.IO clients by negotiated wire encoding (sid -> encoding)
+client_encodings = {}
+# History window and resolution each client asked for in its connect bootstrap (sid -> options)
+client_bootstrap = {}
+# Subscription targets per client (sid -> set of 'all' / 'device:<id>' / 'group:<name>')
+client_targets = {}
+# Clients per '<target>|<encoding>' room, so the fan-out skips rooms nobody is in
+room_listeners = {}
+
 # Mission mode configurations
 MISSION_CONFIGS = {
     'eva': {'temp_danger': 45, 'gas_danger': 600, 'distance_danger': 20},
@@ -46,80 +170,172 @@ MISSION_CONFIGS = {
     'training': {'temp_danger': 60, 'gas_danger': 800, 'distance_danger': 10}
 }
 
-def connect_serial():
-    """Connect to Arduino serial port"""
-    if DEMO_MODE:
-        print("🎭 Running in DEMO MODE (no Arduino required)")
-        state['connected'] = False
-        return None
-        
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-            print(f"✓ Connected to Arduino on {SERIAL_PORT}")
-            state['connected'] = True
-            return ser
-        except Exception as e:
-            retry_count += 1
-            print(f"✗ Failed to connect to {SERIAL_PORT}: {e}")
-            if retry_count < max_retries:
-                print(f"Retrying in 5 seconds... (Attempt {retry_count}/{max_retries})")
-                state['connected'] = False
-                time.sleep(5)
-            else:
-                print(f"❌ Could not connect after {max_retries} attempts")
-                print("💡 Running in demo mode without hardware")
-                state['connected'] = False
-                return None
-
 def process_sensor_data(timestamp, temp, humidity, gas, ir, distance):
-    """Process sensor readings and determine status"""
+    """Process sensor readings and determine status and alarm bitmask"""
     thresholds = state['thresholds']
-    alarms = []
+    alarms = 0
     status = 'OK'
     
     # Temperature checks
     if temp > thresholds['temp_danger']:
         status = 'DANGER'
-        alarms.append('Temperature Critical')
+        alarms |= ALARM_BITS['Temperature Critical']
     elif temp > thresholds['temp_warn']:
         status = 'WARN' if status != 'DANGER' else status
-        alarms.append('Temperature Warning')
+        alarms |= ALARM_BITS['Temperature Warning']
     
     # Humidity checks
     if humidity > thresholds['humidity_danger']:
         status = 'DANGER'
-        alarms.append('Humidity Critical')
+        alarms |= ALARM_BITS['Humidity Critical']
     elif humidity > thresholds['humidity_warn']:
         status = 'WARN' if status != 'DANGER' else status
-        alarms.append('Humidity Warning')
+        alarms |= ALARM_BITS['Humidity Warning']
     
     # Gas sensor checks
     if gas > thresholds['gas_danger']:
         status = 'DANGER'
-        alarms.append('Gas Contamination Critical')
+        alarms |= ALARM_BITS['Gas Contamination Critical']
     elif gas > thresholds['gas_warn']:
         status = 'WARN' if status != 'DANGER' else status
-        alarms.append('Gas Contamination Warning')
+        alarms |= ALARM_BITS['Gas Contamination Warning']
     
     # Distance checks
     if distance < thresholds['distance_danger']:
         status = 'DANGER'
-        alarms.append('Obstacle Too Close')
+        alarms |= ALARM_BITS['Obstacle Too Close']
     elif distance < thresholds['distance_warn']:
         status = 'WARN' if status != 'DANGER' else status
-        alarms.append('Obstacle Warning')
+        alarms |= ALARM_BITS['Obstacle Warning']
     
     # IR edge detection
     if ir >= thresholds['ir_danger']:
         status = 'DANGER'
-        alarms.append('Edge/Fall Risk Detected')
+        alarms |= ALARM_BITS['Edge/Fall Risk Detected']
     
     return status, alarms
 
+def build_sensor_packet(temperature, humidity, gas_level, ir_detection, distance, connected,
+                        device_timestamp=None, received=None, device_id=SERIAL_DEVICE_ID, substituted=0):
+    """Flag suspect channels, filter raw values, evaluate thresholds and build the Reading
+    
+    `substituted` is the QUALITY_BITS mask of channels the parser filled with a placeholder.
+    """
+    parsed = latency.now_ms()
+    sample = None
+    if device_timestamp is not None:
+        sample = latency_tracker.sample_time(device_id, device_timestamp, received)
+    
+    # Stamped when the line arrived, not when a worker got to it - a drained backlog keeps
+    # its real spacing for filter windows, anomaly rates, forecasts, rule durations and sketch windows
+    received = received or parsed
+    timestamp = int(received)
+    
+    quality = channel_health.assess(device_id, (temperature, humidity, gas_level, ir_detection, distance), substituted)
+    raw_temperature, raw_humidity, raw_distance = temperature, humidity, distance
+    # Suspect values pass through unfiltered so they never enter a filter window
+    if not quality & QUALITY_BITS['temperature']:
+        temperature = reading_filter.apply(device_id, 'temperature', temperature, timestamp)
+    if not quality & QUALITY_BITS['humidity']:
+        humidity = reading_filter.apply(device_id, 'humidity', humidity, timestamp)
+    if not quality & QUALITY_BITS['distance']:
+        distance = reading_filter.apply(device_id, 'distance', distance, timestamp)
+    
+    status, alarms = process_sensor_data(
+        timestamp, temperature, humidity, gas_level, ir_detection, distance
+    )
+    
+    return Reading(
+        timestamp, device_id, round(temperature, 2), round(humidity, 2), gas_level, ir_detection, distance,
+        status=status, alarm_mask=alarms, mode=state['mode'], connected=connected,
+        raw_temperature=round(raw_temperature, 2), raw_humidity=round(raw_humidity, 2),
+        raw_distance=round(raw_distance, 2), device_timestamp=device_timestamp,
+        sample_ms=sample, received_ms=received, parsed_ms=parsed, quality_mask=quality
+    )
+
+def publish_sensor_data(reading):
+    """Run pipeline stages, store the Reading and fan it out to dashboard clients"""
+    for stage in pipeline_stages:
+        try:
+            stage(reading)
+        except Exception as stage_error:
+            print(f"Pipeline stage error: {stage_error}")
+    reading.evaluated_ms = latency.now_ms()
+    reading.mission_id = mission_manager.current_id()
+    
+    with state_lock:
+        state['seq'] += 1
+        reading.seq = state['seq']
+        state['current_sensors'] = reading
+        state['events'].append(reading)
+        
+        # Keep only last EVENT_RETENTION events
+        if len(state['events']) > EVENT_RETENTION:
+            state['events'] = state['events'][-EVENT_RETENTION:]
+        
+        # Queued only - the WAL writer thread batches the fsync
+        write_ahead_log.append('reading', reading.to_row())
+    
+    # Per-device latest reading - only this device's shard lock is taken
+    device_registry.update(reading)
+    
+    try:
+        mission_manager.record(reading)
+    except Exception as record_error:
+        print(f"Mission segment write error: {record_error}")
+    mission_report_live.update(reading)
+    windowed_stats.update(reading)
+    # Only queues on a status change - delivery happens on the sink workers
+    alert_dispatcher.observe(reading)
+    
+    # Fan-out happens on its own worker so a slow emit never holds up ingest
+    emit_queue.put(reading, key=reading.device_id)
+    startup_tracker.mark('first_reading')
+
+def fan_out(reading):
+    """Fan-out worker: emit a Reading and close its latency trace"""
+    emit_sensor_update(reading)
+    latency_tracker.emitted(reading.trace())
+    startup_tracker.mark('first_emit')
+
+def fan_out_loop():
+    """Drain the emit queues from a Socket.IO background task
+    
+    Emits must happen on the Socket.IO server's own event loop (an eventlet
+    green thread when eventlet is installed); an emit from a plain OS thread
+    never reaches the clients. So this task polls without blocking and yields
+    between batches, while parsing and evaluation stay on OS threads.
+    """
+    while True:
+        while control_emits:
+            event, payload = control_emits.popleft()
+            try:
+                socketio.emit(event, payload)
+            except Exception as emit_error:
+                print(f"WebSocket emit error: {emit_error}")
+        
+        batch = emit_queue.get_batch(FAN_OUT_BATCH, timeout=0)
+        for reading in batch:
+            try:
+                fan_out(reading)
+            except Exception as e:
+                print(f"{emit_queue.name} worker error: {e}")
+        socketio.sleep(0 if batch else FAN_OUT_IDLE_S)
+
+def emit_sensor_update(reading):
+    """Emit a Reading once per negotiated encoding, to the rooms subscribed to its device"""
+    try:
+        targets = device_registry.targets_for(reading.device_id)
+        for encoding in set(list(client_encodings.values())):
+            rooms = [devices.room_name(target, encoding) for target in targets]
+            rooms = [room for room in rooms if room_listeners.get(room)]
+            if not rooms:
+                continue  # nobody displays this device in this encoding - skip the encode
+            payload = wire_format.encode_for_socket(reading, encoding)
+            socketio.emit('sensor_update', payload, to=rooms)
+    except Exception as emit_error:
+        print(f"WebSocket emit error: {emit_error}")
+
 def generate_demo_data():
     """Generate simulated sensor data for demo purposes"""
     import random
@@ -143,37 +359,14 @@ def generate_demo_data():
                 elif danger_type == 'distance':
                     distance = random.randint(5, 18)
             
-            # Process the simulated data
-            status, alarms = process_sensor_data(
-                int(time.time() * 1000), temperature, humidity, gas_level, ir_detection, distance
+            # Process the simulated data (not connected - demo mode)
+            reading = build_sensor_packet(
+                temperature, humidity, gas_level, ir_detection, distance, connected=False
             )
             
-            # Create sensor data packet
-            sensor_data = {
-                'timestamp': int(time.time() * 1000),
-                'temperature': round(temperature, 2),
-                'humidity': round(humidity, 2),
-                'gas_level': gas_level,
-                'ir_detection': ir_detection,
-                'distance': distance,
-                'status': status,
-                'alarms': alarms,
-                'mode': state['mode'],
-                'connected': False  # Demo mode
-            }
+            publish_sensor_data(reading)
             
-            # Update state
-            state['current_sensors'] = sensor_data
-            state['events'].append(sensor_data)
-            
-            # Keep only last 1000 events
-            if len(state['events']) > 1000:
-                state['events'] = state['events'][-1000:]
-            
-            # Emit to all connected clients
-            socketio.emit('sensor_update', sensor_data)
-            
-            time.sleep(0.5)  # Slower update for demo
+            time.sleep(DEMO_INTERVAL_S)  # Slower update for demo
             
         except Exception as e:
             print(f"Demo data generation error: {e}")
@@ -183,166 +376,420 @@ def read_serial_loop():
     """Main serial reading loop"""
     if DEMO_MODE:
         print("🎭 Running in DEMO MODE - generating simulated sensor data")
+        state_recovered.wait()   # demo readings are published directly, not queued
         generate_demo_data()
         return
     
-    print(f"🔌 Attempting to connect to {SERIAL_PORT} at {BAUD_RATE} baud...")
+    print(f"🔌 Looking for MARS-SENTINEL board (preferred port {SERIAL_PORT}, {BAUD_RATE} baud)...")
     
-    try:
-        ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-        print(f"✅ Connected to Arduino on {SERIAL_PORT}")
-        state['connected'] = True
-        
-        print("📡 Starting real-time data collection...")
-        event_count = 0
+    while True:
+        # Blocks this thread only - probes ports in parallel and backs off between rounds
+        ser, pending = serial_supervisor.connect()
+        state_recovered.wait()
         
-        while True:
-            try:
+        try:
+            set_connected(True)
+            device_link.attach()
+            print("📡 Starting real-time data collection...")
+            for line in pending:
+                line_queue.put((line, latency.now_ms(), SERIAL_DEVICE_ID))
+            
+            # Only read and queue here - parsing and fan-out run on worker threads.
+            # Queued firmware commands go out between reads (readline times out every 0.2s).
+            while True:
+                if device_link.pending:
+                    device_link.flush(ser)
                 line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if not line:
-                    continue
-                
-                # Skip header lines or non-numeric data
-                if 'temp' in line.lower() or 'format:' in line.lower() or 'initialized' in line.lower() or 'debug:' in line.lower():
-                    print(f"Arduino info: {line}")
-                    continue
-                
-                # Parse CSV: timestamp,temp,humidity,gas,ir,distance (your Arduino format)
-                parts = line.split(',')
-                if len(parts) != 6:
-                    continue
-                
-                timestamp_ms, temp_str, humidity_str, gas_str, ir_str, dist_str = parts
-                
-                # Convert to appropriate types with error handling
-                try:
-                    temperature = float(temp_str) if float(temp_str) > -50 else 22.0  # Use 22°C default if invalid
-                    humidity = float(humidity_str) if float(humidity_str) >= 0 else 50.0  # Use real humidity or default
-                    gas_level = int(gas_str)
-                    ir_detection = int(ir_str)
-                    distance = int(dist_str)
-                except ValueError as conv_error:
-                    print(f"Data conversion error: {conv_error} | Line: {line}")
-                    continue
-                
-                # Process sensor data
-                status, alarms = process_sensor_data(
-                    timestamp_ms, temperature, humidity, gas_level, ir_detection, distance
-                )
-                
-                # Create sensor data packet
-                sensor_data = {
-                    'timestamp': int(time.time() * 1000),
-                    'temperature': round(temperature, 2),
-                    'humidity': round(humidity, 2),
-                    'gas_level': gas_level,
-                    'ir_detection': ir_detection,
-                    'distance': distance,
-                    'status': status,
-                    'alarms': alarms,
-                    'mode': state['mode'],
-                    'connected': True
-                }
-                
-                # Update state
-                state['current_sensors'] = sensor_data
-                state['events'].append(sensor_data)
-                
-                # Keep only last 1000 events
-                if len(state['events']) > 1000:
-                    state['events'] = state['events'][-1000:]
-                
-                # Emit to all connected clients (with error handling)
-                try:
-                    socketio.emit('sensor_update', sensor_data)
-                except Exception as emit_error:
-                    print(f"WebSocket emit error: {emit_error}")
-                
-                event_count += 1
-                
-                # Print status every 50 events
-                if event_count % 50 == 0:
-                    print(f"📊 Events: {event_count} | Status: {status} | Gas: {gas_level} ppm | Dist: {distance} cm")
-                
-            except KeyboardInterrupt:
-                print("\n🛑 Stopping data collection...")
-                break
-            except Exception as e:
-                print(f"Serial read error: {e}")
-                time.sleep(0.1)
-        
-        ser.close()
-        
-    except serial.SerialException as e:
-        print(f"❌ Serial connection failed: {e}")
-        print("🎭 Starting demo mode with simulated data...")
-        generate_demo_data()
+                if line:
+                    line_queue.put((line, latency.now_ms(), SERIAL_DEVICE_ID))
+        except (supervisor.serial.SerialException, OSError) as e:
+            print(f"❌ Serial connection lost: {e}")
+            serial_supervisor.disconnected(e)
+        except Exception as e:
+            # Anything else (a command write, a decode edge case) must not end the reader thread -
+            # drop the connection and reconnect like any other failure
+            print(f"❌ Serial reader error: {e}")
+            serial_supervisor.disconnected(e)
+            time.sleep(1)
+        finally:
+            try:
+                ser.close()
+            except Exception:
+                pass
+            device_link.detach()
+            set_connected(False)
+
+def handle_serial_line(item):
+    """Parse one (line, received_ms, device_id) item from the Arduino or a network node and run it through the pipeline"""
+    line, received, device_id = item
+    
+    # Replies to host commands (OK: ... / ERROR: ...) are not readings
+    if device_id == SERIAL_DEVICE_ID and device_link.handle_reply(line):
+        return
+    
+    # Skip header lines or non-numeric data
+    if 'temp' in line.lower() or 'format:' in line.lower() or 'initialized' in line.lower() or 'debug:' in line.lower():
+        print(f"Arduino info: {line}")
+        return
+    
+    # Parse CSV: timestamp,temp,humidity,gas,ir,distance (your Arduino format)
+    parts = line.split(',')
+    if len(parts) != 6:
+        channel_health.parse_failed(device_id)
+        return
+    
+    timestamp_ms, temp_str, humidity_str, gas_str, ir_str, dist_str = parts
+    
+    # Convert to appropriate types with error handling
+    # Failed sensor reads become placeholders so the reading still carries gas, IR and
+    # distance - but they are flagged as substituted, never passed off as measurements
+    substituted = 0
+    try:
+        temperature = float(temp_str)
+        if temperature <= -50:
+            temperature = 22.0
+            substituted |= QUALITY_BITS['temperature']
+        humidity = float(humidity_str)
+        if humidity < 0:
+            humidity = 50.0
+            substituted |= QUALITY_BITS['humidity']
+        elif humidity == 0:
+            substituted |= QUALITY_BITS['humidity']   # the firmware's NaN placeholder for a failed DHT read
+        gas_level = int(gas_str)
+        ir_detection = int(ir_str)
+        distance = int(dist_str)
+        device_timestamp = int(timestamp_ms)
+    except ValueError as conv_error:
+        channel_health.parse_failed(device_id)
+        print(f"Data conversion error: {conv_error} | Line: {line}")
+        return
+    latency_tracker.received(device_id, received)
+    
+    try:
+        # Process sensor data
+        reading = build_sensor_packet(
+            temperature, humidity, gas_level, ir_detection, distance, connected=True,
+            device_timestamp=device_timestamp, received=received, device_id=device_id,
+            substituted=substituted
+        )
+        publish_sensor_data(reading)
     except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        print("🎭 Starting demo mode with simulated data...")
-        generate_demo_data()# REST API Routes
+        print(f"Sensor processing error: {e}")
+        return
+    
+    if device_id == SERIAL_DEVICE_ID:
+        serial_supervisor.reading_received()
+        device_link.observe(reading)
+    state['event_count'] += 1
+    
+    # Print status every 50 events
+    if state['event_count'] % 50 == 0:
+        print(f"📊 Events: {state['event_count']} | Status: {reading.status} | Gas: {gas_level} ppm | Dist: {distance} cm")
+
+def notify_freshness(device_id, stale, age):
+    """Watchdog callback - readings from one device stopped (or resumed) arriving"""
+    if stale:
+        print(f"⚠️ No sensor data from {device_id} for {age:.1f}s - data is stale")
+    else:
+        print(f"✅ Sensor data from {device_id} flowing again")
+    control_emits.append(('data_freshness', {'device_id': device_id, 'stale': stale, 'age_seconds': round(age, 2)}))
+
+latency_tracker.on_stale_change.append(notify_freshness)
+
+def set_connected(connected):
+    """Update connection state and tell dashboards - never substitutes demo data"""
+    state['connected'] = connected
+    if state['current_sensors']:
+        state['current_sensors'] = state['current_sensors'].copy(connected=connected)
+    device_registry.set_connected(SERIAL_DEVICE_ID, connected)
+    control_emits.append(('connection_status', {
+        'connected': connected,
+        'port': serial_supervisor.port
+    }))
+
+# REST API Routes
 @app.route('/')
 def dashboard():
     """Serve the main dashboard"""
-    return send_file('dashboard_polling.html')
+    return dashboard_assets.response(static_assets.DASHBOARDS['/'], request)
 
 @app.route('/polling')
 def dashboard_polling():
     """Serve the polling-based dashboard"""
-    return send_file('dashboard_polling.html')
+    return dashboard_assets.response(static_assets.DASHBOARDS['/polling'], request)
 
 @app.route('/ultra')
 def ultra_dashboard():
     """Serve the ULTRA advanced dashboard"""
-    return send_file('MARS_SENTINEL_ULTRA_UI.html')
+    return dashboard_assets.response(static_assets.DASHBOARDS['/ultra'], request)
 
 @app.route('/final')
 def final_dashboard():
-    """Serve the FINAL production dashboard"""
-    return send_file('dashboard_FINAL.html')
+    """Serve the FINAL production dashboard (real-time Socket.IO)"""
+    return dashboard_assets.response(static_assets.DASHBOARDS['/final'], request)
 
 @app.route('/api/status')
 def get_status():
     """Get current system status"""
+    current = state['current_sensors']
     return jsonify({
         'connected': state['connected'],
         'mode': state['mode'],
         'sensor_count': len(state['events']),
-        'last_update': state['current_sensors'].get('timestamp', 0)
+        'mission_id': mission_manager.current_id(),
+        'serial': serial_supervisor.status(),
+        'queues': {'ingest': line_queue.stats(), 'emit': emit_queue.stats()},
+        'bootstrap': bootstrap_cache.stats(),
+        'startup': startup_tracker.status(),
+        'degraded_channels': channel_health.summary()['degraded'],
+        'wal': write_ahead_log.status(),
+        'devices': device_registry.list_devices(),
+        'network': network_listener.status(),
+        'device_link': device_link.status(),
+        'assets': dashboard_assets.status(),
+        'process': {
+            'pid': os.getpid(),
+            'cpu_seconds': round(time.process_time(), 3),
+            'uptime_seconds': round(time.time() - STARTED_AT, 1),
+            'threads': threading.active_count()
+        },
+        'last_update': current.timestamp if current else 0,
+        'forecast': (current.forecast if current else None) or {}
     })
 
+@app.route('/api/latency')
+def get_latency():
+    """Sensor-to-screen latency percentiles, clock sync and data freshness"""
+    return jsonify(latency_tracker.report())
+
 @app.route('/api/mission_mode', methods=['GET', 'POST'])
 def mission_mode():
     """Get or set mission mode"""
     if request.method == 'POST':
         mode = request.json.get('mode')
         if mode in MISSION_CONFIGS:
-            state['mode'] = mode
-            # Update thresholds based on mission mode
-            state['thresholds'].update(MISSION_CONFIGS[mode])
+            apply_mission_mode(mode)
             return jsonify({'success': True, 'mode': mode, 'thresholds': state['thresholds']})
         else:
             return jsonify({'error': 'Invalid mission mode'}), 400
     else:
         return jsonify({'mode': state['mode']})
 
+def apply_mission_mode(mode):
+    """Switch mission mode and load its thresholds"""
+    with state_lock:
+        state['mode'] = mode
+        # Update thresholds based on mission mode
+        state['thresholds'].update(MISSION_CONFIGS[mode])
+        write_ahead_log.append('mode', {'mode': mode, 'thresholds': dict(state['thresholds'])})
+    device_link.push_thresholds()
+
+@app.route('/api/missions', methods=['GET', 'POST'])
+def handle_missions():
+    """List missions, or start/stop a mission session"""
+    if request.method == 'POST':
+        data = request.json or {}
+        action = data.get('action')
+        if action == 'start':
+            mode = data.get('mode', state['mode'])
+            if mode not in MISSION_CONFIGS:
+                return jsonify({'error': 'Invalid mission mode'}), 400
+            apply_mission_mode(mode)
+            return jsonify({'success': True, 'mission': mission_manager.start(mode)})
+        elif action == 'stop':
+            mission = mission_manager.stop()
+            if not mission:
+                return jsonify({'error': 'No active mission'}), 409
+            return jsonify({'success': True, 'mission': mission})
+        else:
+            return jsonify({'error': 'Invalid action, use start or stop'}), 400
+    else:
+        return jsonify({
+            'active': mission_manager.current_id(),
+            'missions': mission_manager.list_missions()
+        })
+
+@app.route('/api/missions/<mission_id>')
+def get_mission(mission_id):
+    """Catalog entry for one mission"""
+    mission = mission_manager.get(mission_id)
+    if not mission:
+        return jsonify({'error': 'Unknown mission'}), 404
+    return jsonify(mission)
+
+@app.route('/api/missions/<mission_id>/export')
+def export_mission(mission_id):
+    """Download one mission's segment as CSV"""
+    if not mission_manager.get(mission_id):
+        return jsonify({'error': 'Unknown mission'}), 404
+    mission_manager.flush(mission_id)
+    return send_file(
+        os.path.abspath(mission_manager.segment_path(mission_id)),
+        mimetype='text/csv', as_attachment=True, download_name=f'{mission_id}.csv'
+    )
+
+@app.route('/api/missions/<mission_id>/report')
+def mission_report(mission_id):
+    """Analyze one mission - reads only that mission's segment"""
+    mission = mission_manager.get(mission_id)
+    if not mission:
+        return jsonify({'error': 'Unknown mission'}), 404
+    if mission['count'] < 2:
+        return jsonify({'error': 'Not enough readings to analyze'}), 409
+    mission_manager.flush(mission_id)
+    analysis = analyze_mission_data(mission_manager.segment_path(mission_id))
+    return jsonify(generate_mission_report(analysis, mission_id))
+
+@app.route('/api/report')
+def live_mission_report():
+    """Current mission report, kept up to date on every reading"""
+    summary = mission_report_live.summary()
+    if not summary['total_events']:
+        return jsonify({'error': 'No readings yet'}), 409
+    return jsonify(generate_mission_report(summary, mission_report_live.mission_id))
+
+@app.route('/healthz')
+def healthz():
+    """Liveness - the process is up and serving HTTP"""
+    return jsonify({'status': 'ok', 'uptime_seconds': round(time.time() - STARTED_AT, 1)})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness - 200 once state is recovered and data flows (or no board is present), else 503"""
+    status = startup_tracker.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/api/health')
+def get_health():
+    """Per-device, per-channel sensor health: substitutions, out-of-range, stuck runs, parse failures, gaps
+    
+    ?device= / ?group= narrow it to some suits; `degraded` lists the channels to distrust right now.
+    """
+    device_ids = None
+    if 'device' in request.args:
+        device_ids = set(request.args['device'].split(','))
+    elif 'group' in request.args:
+        device_ids = set(device_registry.devices_for(f"group:{request.args['group']}"))
+    return jsonify(channel_health.summary(device_ids))
+
+@app.route('/api/stats')
+def get_stats():
+    """Per-sensor percentiles, histogram and counts over ?window=1m|5m|1h|mission
+    
+    ?device= / ?group= narrow it to some suits (merged), default is the whole fleet;
+    ?q=0.5,0.99 picks the quantiles and ?bins= the histogram resolution.
+    """
+    window = request.args.get('window', '5m')
+    if window not in sketches.WINDOWS and window != sketches.MISSION_WINDOW:
+        return jsonify({'error': f'Unknown window {window}',
+                        'windows': list(sketches.WINDOWS) + [sketches.MISSION_WINDOW]}), 400
+    try:
+        qs = sketches.parse_quantiles(request.args['q']) if 'q' in request.args else sketches.DEFAULT_QUANTILES
+        bins = min(max(int(request.args.get('bins', sketches.DEFAULT_BINS)), 1), sketches.MAX_BINS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    device_ids = None
+    if 'device' in request.args:
+        device_ids = set(request.args['device'].split(','))
+    elif 'group' in request.args:
+        device_ids = set(device_registry.devices_for(f"group:{request.args['group']}"))
+    return jsonify({
+        'window': window,
+        'devices': sorted(device_ids) if device_ids is not None else windowed_stats.device_ids(),
+        'mission_id': mission_manager.current_id(),
+        'relative_accuracy': sketches.RELATIVE_ACCURACY,
+        'sensors': windowed_stats.query(window, device_ids, qs, bins)
+    })
+
+@app.route('/api/alerts')
+def get_alerts():
+    """Recent status-transition alerts and per-sink delivery stats"""
+    limit = request.args.get('limit', alerts.RECENT_ALERTS, type=int)
+    return jsonify({'alerts': alert_dispatcher.recent_alerts(limit), **alert_dispatcher.status()})
+
 @app.route('/api/thresholds', methods=['GET', 'POST'])
 def handle_thresholds():
     """Get or update sensor thresholds"""
     if request.method == 'POST':
         data = request.json
-        for key, value in data.items():
-            if key in state['thresholds']:
-                state['thresholds'][key] = float(value)
+        with state_lock:
+            for key, value in data.items():
+                if key in state['thresholds']:
+                    state['thresholds'][key] = float(value)
+            write_ahead_log.append('thresholds', dict(state['thresholds']))
+        device_link.push_thresholds()
         return jsonify(state['thresholds'])
     else:
         return jsonify(state['thresholds'])
 
+@app.route('/api/devices', methods=['GET', 'POST'])
+def handle_devices():
+    """List suits with their crew group and latest status, or reassign groups ({device_id: group})"""
+    if request.method == 'POST':
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected {device_id: group}'}), 400
+        for device_id, group in data.items():
+            device_registry.assign(str(device_id), str(group))
+    return jsonify(device_registry.list_devices())
+
+@app.route('/api/devices/<device_id>')
+def get_device(device_id):
+    """Latest reading from one suit"""
+    current = device_registry.current(device_id)
+    if not current:
+        return jsonify({'error': 'Unknown device'}), 404
+    return jsonify(current.to_dict())
+
+@app.route('/api/admin/profile')
+def capture_profile():
+    """Sample every thread for ?seconds= and return hot functions, or ?format=collapsed for a flamegraph"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Profiling is disabled - set ADMIN_TOKEN to enable it'}), 403
+    if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'error': 'Admin token required'}), 403
+    try:
+        capture = sampling_profiler.start(
+            request.args.get('seconds', profiler.DEFAULT_SECONDS, type=float),
+            request.args.get('interval_ms', profiler.DEFAULT_INTERVAL_MS, type=float)
+        )
+    except profiler.ProfilerBusy as e:
+        return jsonify({'error': str(e)}), 409
+    
+    # Cooperative wait, so the server keeps serving while the sampler runs
+    while not capture.done.is_set():
+        socketio.sleep(0.1)
+    
+    if request.args.get('format') == 'collapsed':
+        return Response(capture.collapsed(), mimetype='text/plain')
+    return jsonify(capture.summary())
+
+@app.route('/api/rules', methods=['GET', 'POST'])
+def handle_rules():
+    """Get or hot-swap alarm rule sets ({mode or 'all': [rules]}, listed modes are replaced)"""
+    if request.method == 'POST':
+        try:
+            with state_lock:
+                rule_sets = rule_engine.load(request.json)
+                write_ahead_log.append('rules', rule_sets)
+        except rules.RuleError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'success': True, 'rules': rule_sets, 'stats': rule_engine.stats()})
+    else:
+        return jsonify({'rules': rule_engine.rule_sets(), 'stats': rule_engine.stats()})
+
 @app.route('/api/events')
 def get_events():
     """Get recent sensor events"""
     limit = request.args.get('limit', 100, type=int)
-    return jsonify(state['events'][-limit:])
+    encoding = wire_format.negotiate_encoding(
+        request.args.get('format'), request.headers.get('Accept')
+    )
+    if encoding == 'json':
+        return jsonify([event.to_dict() for event in state['events'][-limit:]])
+    body, mimetype = wire_format.encode_for_http(state['events'][-limit:], encoding)
+    return Response(body, mimetype=mimetype)
 
 @app.route('/api/export')
 def export_csv():
@@ -353,22 +800,12 @@ def export_csv():
     # Write header
     writer.writerow([
         'timestamp', 'temperature', 'humidity', 'gas_level', 
-        'ir_detection', 'distance', 'status', 'alarms', 'mode'
+        'ir_detection', 'distance', 'status', 'alarms', 'mode', 'device_id'
     ])
     
     # Write data
     for event in state['events']:
-        writer.writerow([
-            event.get('timestamp', ''),
-            event.get('temperature', ''),
-            event.get('humidity', ''),
-            event.get('gas_level', ''),
-            event.get('ir_detection', ''),
-            event.get('distance', ''),
-            event.get('status', ''),
-            '|'.join(event.get('alarms', [])),
-            event.get('mode', '')
-        ])
+        writer.writerow(event.csv_row())
     
     # Create response
     response = Response(
@@ -382,25 +819,207 @@ def export_csv():
 @socketio.on('connect')
 def handle_connect():
     print('🌐 Dashboard client connected')
+    # Clients may ask for a compact encoding with ?encoding=compact|msgpack|binary
+    # and for only some suits with ?devices=a,b and/or ?groups=crew (default: everything)
+    sid = request.sid
+    set_client_encoding(sid, wire_format.negotiate_encoding(request.args.get('encoding')))
+    set_client_targets(sid, devices.parse_targets(request.args.get('devices'), request.args.get('groups')))
+    # Recent history in one columnar message (?history=<s>&resolution=<ms>&points=<n>, ?bootstrap=0 to skip)
+    if request.args.get('bootstrap') != '0':
+        client_bootstrap[sid] = bootstrap.parse_options(request.args)
+        send_bootstrap(sid)
     # Send current status to new client
-    if state['current_sensors']:
-        try:
-            socketio.emit('sensor_update', state['current_sensors'])
-        except Exception as e:
-            print(f"Error sending initial data: {e}")
+    send_current_sensors(sid)
+
+@socketio.on('set_encoding')
+def handle_set_encoding(data):
+    """Switch this client's wire encoding"""
+    requested = data.get('encoding') if isinstance(data, dict) else data
+    encoding = wire_format.negotiate_encoding(requested)
+    set_client_encoding(request.sid, encoding)
+    send_current_sensors(request.sid)
+    return {'encoding': encoding, 'available': wire_format.available_encodings()}
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Replace this client's subscriptions: {'devices': [...], 'groups': [...]} (empty = everything)"""
+    data = data if isinstance(data, dict) else {}
+    targets = set_client_targets(request.sid, devices.parse_targets(data.get('devices'), data.get('groups')))
+    send_bootstrap(request.sid)
+    send_current_sensors(request.sid)
+    return {'targets': sorted(targets)}
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print('🌐 Dashboard client disconnected')
+    sid = request.sid
+    encoding = client_encodings.pop(sid, None)
+    client_bootstrap.pop(sid, None)
+    for target in client_targets.pop(sid, ()):
+        release_room(devices.room_name(target, encoding))
+
+def join_target_room(sid, target, encoding):
+    room = devices.room_name(target, encoding)
+    join_room(room, sid=sid)
+    room_listeners[room] = room_listeners.get(room, 0) + 1
+
+def leave_target_room(sid, target, encoding):
+    room = devices.room_name(target, encoding)
+    leave_room(room, sid=sid)
+    release_room(room)
+
+def release_room(room):
+    count = room_listeners.get(room, 0) - 1
+    if count > 0:
+        room_listeners[room] = count
+    else:
+        room_listeners.pop(room, None)
+
+def set_client_encoding(sid, encoding):
+    """Move a client's subscription rooms over to its wire encoding"""
+    previous = client_encodings.get(sid)
+    client_encodings[sid] = encoding
+    if previous and previous != encoding:
+        for target in client_targets.get(sid, ()):
+            leave_target_room(sid, target, previous)
+            join_target_room(sid, target, encoding)
+
+def set_client_targets(sid, targets):
+    """Join the rooms for a client's subscription targets and leave the rest"""
+    targets = set(targets) or {devices.ALL_TARGET}
+    previous = client_targets.get(sid, set())
+    encoding = client_encodings[sid]
+    for target in previous - targets:
+        leave_target_room(sid, target, encoding)
+    for target in targets - previous:
+        join_target_room(sid, target, encoding)
+    client_targets[sid] = targets
+    return targets
+
+def bootstrap_snapshot():
+    """Sequence number, stored readings, thresholds and mode as of one instant"""
+    with state_lock:
+        return state['seq'], list(state['events']), dict(state['thresholds']), state['mode']
+
+bootstrap_cache = bootstrap.BootstrapCache(bootstrap_snapshot)
+
+def send_bootstrap(sid):
+    """Send one client its subscribed suits' recent history, thresholds, mode and seq"""
+    options = client_bootstrap.get(sid)
+    if options is None:
+        return
+    history_s, resolution_ms = options
+    targets = client_targets.get(sid, ())
+    device_ids = None
+    if devices.ALL_TARGET not in targets:
+        device_ids = set()
+        for target in targets:
+            device_ids.update(device_registry.devices_for(target))
+    try:
+        payload = bootstrap_cache.payload(device_ids, history_s, resolution_ms, client_encodings[sid])
+        socketio.emit('bootstrap', payload, to=sid)
+    except Exception as e:
+        print(f"Error sending bootstrap: {e}")
+
+def send_current_sensors(sid):
+    """Send the latest reading of every subscribed device to one client in its encoding"""
+    device_ids = set()
+    for target in client_targets.get(sid, ()):
+        device_ids.update(device_registry.devices_for(target))
+    for device_id in sorted(device_ids):
+        current = device_registry.current(device_id)
+        if not current:
+            continue
+        try:
+            payload = wire_format.encode_for_socket(current, client_encodings[sid])
+            socketio.emit('sensor_update', payload, to=sid)
+        except Exception as e:
+            print(f"Error sending initial data: {e}")
+
+def snapshot_state():
+    """Compact copy of the recoverable state for a WAL snapshot"""
+    with state_lock:
+        return write_ahead_log.seq, {
+            'events': [event.to_row() for event in state['events']],
+            'thresholds': dict(state['thresholds']),
+            'mode': state['mode'],
+            'rules': rule_engine.rule_sets()
+        }
+
+def recover_state():
+    """Rebuild events, thresholds, mode and rules from the last snapshot plus the log tail"""
+    snapshot, records = write_ahead_log.recover()
+    if snapshot:
+        state['events'] = [from_record(record) for record in snapshot['events']]
+        state['thresholds'].update(snapshot['thresholds'])
+        state['mode'] = snapshot['mode']
+        if 'rules' in snapshot:
+            rule_engine.load(snapshot['rules'])
+    
+    for record_type, data in records:
+        if record_type == 'reading':
+            state['events'].append(from_record(data))
+        elif record_type == 'thresholds':
+            state['thresholds'].update(data)
+        elif record_type == 'mode':
+            state['mode'] = data['mode']
+            state['thresholds'].update(data['thresholds'])
+        elif record_type == 'rules':
+            rule_engine.load(data)
+    
+    state['events'] = state['events'][-EVENT_RETENTION:]
+    for seq, event in enumerate(state['events'], start=1):
+        event.seq = seq
+    state['seq'] = len(state['events'])
+    if state['events']:
+        state['current_sensors'] = state['events'][-1].copy(connected=False)
+    latest = {event.device_id: event for event in state['events']}
+    for event in latest.values():
+        device_registry.update(event.copy(connected=False))
+    if snapshot or records:
+        wal_status = write_ahead_log.status()
+        print(f"♻️ Recovered {len(state['events'])} events, mode {state['mode']} "
+              f"({wal_status['recovered_records']} log records) in {wal_status['recovery_seconds']}s")
+    state_recovered.set()
+    startup_tracker.mark('recovered')
+
+write_ahead_log.snapshot_provider = snapshot_state
+
+def start_source_threads():
+    """Start the serial reader and network listener - they only fill line_queue until the workers run"""
+    # Named threads, so profiles and stack dumps say which stage is which
+    threading.Thread(target=read_serial_loop, name='serial-reader', daemon=True).start()
+    if network_listener.udp_port or network_listener.tcp_port:
+        try:
+            udp_port, tcp_port = network_listener.bind()
+            threading.Thread(target=network_listener.run, name='network-ingest', daemon=True).start()
+            print(f"📶 Network ingest listening on UDP {udp_port or 'off'}, TCP {tcp_port or 'off'}")
+        except OSError as e:
+            print(f"❌ Network ingest disabled: {e}")
+
+def start_background_threads():
+    """Start the processing/fan-out workers"""
+    threading.Thread(target=write_ahead_log.run, name='wal-writer', daemon=True).start()
+    threading.Thread(target=run_worker, args=(line_queue, handle_serial_line), name='ingest-worker', daemon=True).start()
+    socketio.start_background_task(fan_out_loop)
+    alert_dispatcher.start()
+    threading.Thread(target=latency_tracker.watchdog, name='freshness-watchdog', daemon=True).start()
+    startup_tracker.mark('workers_started')
+
+startup_tracker.mark('imported')
 
 if __name__ == '__main__':
-    # Start serial reading thread
-    serial_thread = threading.Thread(target=read_serial_loop, daemon=True)
-    serial_thread.start()
+    # Board discovery (up to a few seconds for the bootloader reset) runs while the WAL is
+    # replayed and the HTTP server binds; lines read meanwhile wait in line_queue
+    start_source_threads()
+    recover_state()
+    start_background_threads()
     
     print("🚀 Astronaut Safety Sensor System Starting...")
     print(f"📡 Monitoring serial port: {SERIAL_PORT}")
-    print(f"🌐 Dashboard will be available at: http://localhost:5000")
+    print(f"🌐 Dashboard will be available at: http://localhost:{SERVER_PORT}")
     
+    # Runs once the server's event loop does - after the listening socket is open
+    socketio.start_background_task(startup_tracker.mark, 'serving')
     # Run Flask-SocketIO server
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False)
+    socketio.run(app, host='0.0.0.0', port=SERVER_PORT, debug=False)
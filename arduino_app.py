@@ -104,7 +104,11 @@ def read_arduino_data():
                 timestamp_ms, temp_str, gas_str, ir_str, dist_str = parts
                 
                 # Convert to appropriate types
-                temperature = float(temp_str) if float(temp_str) > -50 else 22.0  # Use 22°C default
+                temperature = float(temp_str)
+                quality = ['humidity']  # this firmware sends no humidity at all
+                if temperature <= -50:
+                    temperature = 22.0  # Use 22°C default
+                    quality.insert(0, 'temperature')
                 gas_level = int(gas_str)
                 ir_detection = int(ir_str)
                 distance = int(dist_str)
@@ -117,6 +121,7 @@ def read_arduino_data():
                     'timestamp': int(time.time() * 1000),
                     'temperature': round(temperature, 1),
                     'humidity': 50.0,  # Default humidity since DHT11 isn't working
+                    'quality': quality,  # channels holding a placeholder, not a measurement
                     'gas_level': gas_level,
                     'ir_detection': ir_detection,
                     'distance': distance,
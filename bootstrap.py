@@ -0,0 +1,138 @@
+"""
+MARS-SENTINEL Connect Bootstrap
+One columnar history snapshot per new dashboard, instead of REST backfill
+
+On connect a dashboard gets a single `bootstrap` message: the recent
+readings of the suits it subscribes to, downsampled to the resolution it
+asked for and laid out column-wise (one array per field, short keys as in the
+compact wire format), plus the thresholds, mission mode and the sequence
+number of the newest reading included. Live `sensor_update`s carry the same
+sequence number (`seq` / `q`), so a client drops any update it already has and
+the chart continues without a gap or a duplicate.
+
+Downsampling keeps the worst reading of each time bucket per suit (highest
+status, latest on ties) with the alarms of the whole bucket OR'd together, so
+a coarse history never hides a DANGER.
+
+Snapshots are cached per (sequence, subscription, window, resolution,
+encoding): when thirty screens reconnect after a network blip, most of them
+get the already-built payload.
+"""
+
+import math
+import threading
+import time
+
+import wire_format
+from wire_format import ALARM_CODES, MODE_CODES, QUALITY_CHANNELS, STATUS_CODES, STATUS_INDEX
+
+DEFAULT_HISTORY_S = 300
+MAX_HISTORY_S = 3600
+DEFAULT_POINTS = 300        # per suit - sets the resolution when the client gives none
+MAX_POINTS = 2000
+CACHE_ENTRIES = 32
+
+def downsample(readings, resolution_ms):
+    """Worst reading per (suit, bucket), alarms OR'd over the bucket - in time order"""
+    if resolution_ms <= 0:
+        return readings
+    buckets = {}
+    for reading in readings:
+        key = (reading.device_id, reading.timestamp // resolution_ms)
+        held = buckets.get(key)
+        if held is None:
+            buckets[key] = [reading, reading.alarm_mask]
+            continue
+        if STATUS_INDEX.get(reading.status, 0) >= STATUS_INDEX.get(held[0].status, 0):
+            held[0] = reading
+        held[1] |= reading.alarm_mask
+    kept = [reading if mask == reading.alarm_mask else reading.copy(alarm_mask=mask)
+            for reading, mask in buckets.values()]
+    # The worst reading can sit anywhere in its bucket, so suits interleave out of order
+    kept.sort(key=lambda reading: reading.timestamp)
+    return kept
+
+def columns(readings, device_ids):
+    """Column-wise compact layout; suits, statuses and alarms as indexes into the code tables"""
+    device_index = {device_id: index for index, device_id in enumerate(device_ids)}
+    return {
+        't': [reading.timestamp for reading in readings],
+        'dv': [device_index[reading.device_id] for reading in readings],
+        'tp': [reading.temperature for reading in readings],
+        'h': [reading.humidity for reading in readings],
+        'g': [reading.gas_level for reading in readings],
+        'ir': [reading.ir_detection for reading in readings],
+        'd': [reading.distance for reading in readings],
+        's': [STATUS_INDEX.get(reading.status, 0) for reading in readings],
+        'a': [reading.alarm_mask for reading in readings],
+        'q': [reading.seq for reading in readings],
+        'ql': [reading.quality_mask for reading in readings],
+    }
+
+def parse_options(args):
+    """(history seconds, resolution ms) from connect query args like ?history=600&resolution=2000"""
+    try:
+        history_s = min(max(float(args.get('history', DEFAULT_HISTORY_S)), 0), MAX_HISTORY_S)
+        points = min(max(int(args.get('points', DEFAULT_POINTS)), 2), MAX_POINTS)
+        resolution_ms = max(int(args.get('resolution', 0)), 0)
+    except (TypeError, ValueError):
+        history_s, points, resolution_ms = DEFAULT_HISTORY_S, DEFAULT_POINTS, 0
+    # Never more than `points` per suit, whatever resolution was asked for - the window
+    # is not aligned to the buckets, so it can touch one bucket more than it spans
+    resolution_ms = max(resolution_ms, math.ceil(history_s * 1000 / (points - 1)))
+    return history_s, resolution_ms
+
+class BootstrapCache:
+    """Builds bootstrap payloads from a state snapshot, reusing them while no reading arrives"""
+
+    def __init__(self, get_snapshot):
+        self.get_snapshot = get_snapshot   # -> (seq, readings oldest first, thresholds, mode)
+        self.lock = threading.Lock()
+        self.seq = None
+        self.payloads = {}
+        self.built = 0
+        self.reused = 0
+
+    def payload(self, device_ids, history_s, resolution_ms, encoding):
+        """Bootstrap for these suits (None = all) in the client's encoding"""
+        seq, readings, thresholds, mode = self.get_snapshot()
+        key = (frozenset(device_ids) if device_ids is not None else None, history_s, resolution_ms, encoding)
+        with self.lock:
+            if seq != self.seq:
+                self.seq = seq
+                self.payloads = {}
+            cached = self.payloads.get(key)
+            if cached is not None:
+                self.reused += 1
+                return cached
+
+        cutoff = time.time() * 1000 - history_s * 1000
+        recent = [reading for reading in readings if reading.timestamp >= cutoff
+                  and (device_ids is None or reading.device_id in device_ids)]
+        recent = downsample(recent, resolution_ms)
+        suits = sorted({reading.device_id for reading in recent})
+        message = {
+            'seq': seq,
+            'mode': mode,
+            'thresholds': thresholds,
+            'history_s': history_s,
+            'resolution_ms': resolution_ms,
+            'devices': suits,
+            'count': len(recent),
+            'codes': {'status': STATUS_CODES, 'mode': MODE_CODES, 'alarms': list(ALARM_CODES),
+                      'quality': QUALITY_CHANNELS},
+            'columns': columns(recent, suits),
+        }
+        if encoding == 'msgpack':
+            message = wire_format.msgpack.packb(message)
+
+        with self.lock:
+            self.built += 1
+            if seq == self.seq:
+                if len(self.payloads) >= CACHE_ENTRIES:
+                    self.payloads.pop(next(iter(self.payloads)))
+                self.payloads[key] = message
+        return message
+
+    def stats(self):
+        return {'built': self.built, 'reused': self.reused}
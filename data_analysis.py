@@ -1,113 +1,389 @@
 """
 MARS-SENTINEL Data Analysis Example
 Shows how to analyze exported mission data
+
+With NumPy installed the export is loaded column-wise in chunks and every
+statistic is vectorized; without it the original row-by-row parser is used.
+Both paths produce the same summary.
+
+By default the summary comes from analysis_cache instead: partial aggregates
+saved next to the CSV, extended with only the rows appended since the last run.
+
+The safety score is time-weighted per suit (StatusClock): the firmware samples
+5-10x faster in WARN/DANGER, so counting readings would overweight them. The
+live report and every offline path score a mission the same way.
 """
 
 import csv
+import itertools
 import json
 from datetime import datetime
 from collections import Counter
 
-def analyze_mission_data(csv_file):
-    """Analyze mission data from CSV export"""
-    
-    print("🔬 MARS-SENTINEL Mission Data Analysis")
-    print("=" * 50)
-    
-    events = []
+# NumPy is imported on the first analysis, not at import: the server imports this
+# module for its tables and report helpers and never needs NumPy to start
+np = None
+_numpy_checked = False
+
+def load_numpy():
+    """NumPy module, imported on first use - None when it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
+
+EXPORT_HEADER = [
+    'timestamp', 'temperature', 'humidity', 'gas_level',
+    'ir_detection', 'distance', 'status', 'alarms', 'mode', 'device_id'
+]
+LEGACY_EXPORT_HEADER = EXPORT_HEADER[:-1]   # exports from before readings carried a device id
+EXPORT_HEADERS = (EXPORT_HEADER, LEGACY_EXPORT_HEADER)
+NUMERIC_COLUMNS = EXPORT_HEADER[:6]
+CHUNK_ROWS = 250000
+
+# sensor -> (comparison, limit) for spike counting
+SPIKE_RULES = {
+    'temperature': ('>', 40),
+    'gas_level': ('>', 500),
+    'distance': ('<', 20),
+}
+STAT_SENSORS = ('temperature', 'humidity', 'gas_level', 'distance')
+TIMELINE_LIMIT = 100  # DANGER events printed in the timeline
+
+# A suit's status is taken to hold until its next reading, but no longer than this -
+# a suit that went quiet or disconnected does not keep adding time to its last status
+MAX_HOLD_MS = 10000
+
+class StatusClock:
+    """Suit-time spent in each status, from readings in time order per suit"""
+
+    def __init__(self):
+        self.status_ms = Counter()
+        self.device_last = {}   # device_id -> (timestamp, status) of its previous reading
+
+    def add(self, device_id, timestamp, status):
+        """This suit's previous status held until this reading - other suits keep their own clocks"""
+        previous = self.device_last.get(device_id)
+        if previous is not None:
+            self.status_ms[previous[1]] += min(max(timestamp - previous[0], 0), MAX_HOLD_MS)
+        self.device_last[device_id] = (timestamp, status)
+
+    def add_columns(self, timestamps, statuses, status_names, devices, device_names):
+        """Vectorized add over NumPy columns (status and device as codes into the name lists)"""
+        np = load_numpy()
+        for device_code, device_id in enumerate(device_names):
+            rows = np.flatnonzero(devices == device_code)
+            if not len(rows):
+                continue
+            device_times = timestamps[rows]
+            device_statuses = statuses[rows]
+            previous = self.device_last.get(device_id)
+            if previous is not None:
+                self.status_ms[previous[1]] += min(max(int(device_times[0]) - previous[0], 0), MAX_HOLD_MS)
+            held = np.clip(np.diff(device_times), 0, MAX_HOLD_MS)
+            totals = np.bincount(device_statuses[:-1], weights=held, minlength=len(status_names))
+            for name, total in zip(status_names, totals.tolist()):
+                if total:
+                    self.status_ms[name] += int(total)
+            self.device_last[device_id] = (int(device_times[-1]), status_names[device_statuses[-1]])
+
+    def to_json(self):
+        return {'status_ms': dict(self.status_ms),
+                'device_last': {device_id: list(last) for device_id, last in self.device_last.items()}}
+
+    @classmethod
+    def from_json(cls, data):
+        clock = cls()
+        clock.status_ms = Counter(data['status_ms'])
+        clock.device_last = {device_id: tuple(last) for device_id, last in data['device_last'].items()}
+        return clock
+
+def load_mission_columns(csv_file, chunk_rows=CHUNK_ROWS):
+    """Read an export CSV into typed NumPy columns
+
+    Numeric columns are parsed chunk by chunk with np.loadtxt. The trailing
+    status,alarms,mode[,device_id] text of each row is interned as one categorical
+    code, so each distinct combination is split only once; status, mode and device
+    become small integer codes and alarms a boolean matrix (rows x alarm names).
+    """
+    np = load_numpy()
+    numeric_chunks = []
+    combo_chunks = []
+    combos = {}  # 'status,alarms,mode[,device_id]' text -> code
+
+    with open(csv_file, 'r') as file:
+        header = file.readline().strip().split(',')
+        if header not in EXPORT_HEADERS:
+            raise ValueError(f"unexpected header {header}")
+
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                break
+            try:
+                numeric = np.loadtxt(lines, delimiter=',', usecols=range(6), dtype=np.float64, ndmin=2)
+            except ValueError:
+                # Empty fields in this chunk - slower parser that turns them into NaN
+                numeric = np.genfromtxt(lines, delimiter=',', usecols=range(6), dtype=np.float64)
+                numeric = numeric.reshape(-1, 6)
+            numeric_chunks.append(numeric)
+            combo_chunks.append(np.fromiter(
+                (combos.setdefault(line.rstrip('\r\n').split(',', 6)[6], len(combos)) for line in lines),
+                dtype=np.int32, count=len(lines)
+            ))
+
+    numeric = np.concatenate(numeric_chunks) if numeric_chunks else np.empty((0, 6))
+    combo_codes = np.concatenate(combo_chunks) if combo_chunks else np.empty(0, dtype=np.int32)
+
+    # Decode each distinct combination once, then index the tables by row
+    status_names, mode_names, device_names, alarm_names = [], [], [], []
+    combo_status, combo_mode, combo_device, combo_alarms = [], [], [], []
+    for text in combos:  # dicts keep insertion order, matching the codes
+        status, alarms, mode, *device = text.split(',')
+        combo_status.append(_intern(status_names, status))
+        combo_mode.append(_intern(mode_names, mode))
+        combo_device.append(_intern(device_names, device[0] if device else ''))
+        combo_alarms.append([_intern(alarm_names, alarm.strip()) for alarm in alarms.split('|') if alarm])
+
+    alarm_table = np.zeros((len(combos), len(alarm_names)), dtype=bool)
+    for code, alarm_indexes in enumerate(combo_alarms):
+        alarm_table[code, alarm_indexes] = True
+
+    columns = {name: numeric[:, index] for index, name in enumerate(NUMERIC_COLUMNS)}
+    columns['timestamp'] = columns['timestamp'].astype(np.int64)
+    columns['status'] = np.asarray(combo_status, dtype=np.int8)[combo_codes]
+    columns['status_names'] = status_names
+    columns['mode'] = np.asarray(combo_mode, dtype=np.int8)[combo_codes]
+    columns['mode_names'] = mode_names
+    columns['device'] = np.asarray(combo_device, dtype=np.int32)[combo_codes]
+    columns['device_names'] = device_names
+    columns['alarms'] = alarm_table[combo_codes]
+    columns['alarm_names'] = alarm_names
+    columns['alarm_text'] = [text.split(',')[1] for text in combos]
+    columns['combo'] = combo_codes
+    return columns
+
+def summarize_columns(columns):
+    """Vectorized statistics over loaded columns"""
+    np = load_numpy()
+    timestamps = columns['timestamp']
+    total_events = len(timestamps)
+    status_totals = np.bincount(columns['status'], minlength=len(columns['status_names']))
+    alarm_totals = columns['alarms'].sum(axis=0)
+
+    sensors = {}
+    for sensor in STAT_SENSORS:
+        values = columns[sensor]
+        values = values[~np.isnan(values)]
+        if not len(values):
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        stats = {
+            'count': int(len(values)),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'avg': float(values.mean()),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+        }
+        if sensor in SPIKE_RULES:
+            comparison, limit = SPIKE_RULES[sensor]
+            spikes = values[values > limit] if comparison == '>' else values[values < limit]
+            stats['spikes'] = int(len(spikes))
+            stats['spike_peak'] = float(spikes.max() if comparison == '>' else spikes.min()) if len(spikes) else None
+        sensors[sensor] = stats
+
+    clock = StatusClock()
+    clock.add_columns(timestamps, columns['status'], columns['status_names'],
+                      columns['device'], columns['device_names'])
+
+    danger_code = columns['status_names'].index('DANGER') if 'DANGER' in columns['status_names'] else -1
+    danger_rows = np.flatnonzero(columns['status'] == danger_code)
+    timeline = [
+        ((int(timestamps[row]) - int(timestamps[0])) / 1000, columns['alarm_text'][columns['combo'][row]])
+        for row in danger_rows[:TIMELINE_LIMIT]
+    ]
+
+    return {
+        'total_events': total_events,
+        'first_timestamp': int(timestamps[0]) if total_events else 0,
+        'last_timestamp': int(timestamps[-1]) if total_events else 0,
+        'status_counts': {name: int(count) for name, count in zip(columns['status_names'], status_totals)},
+        'status_ms': dict(clock.status_ms),
+        'alarm_types': {name: int(count) for name, count in zip(columns['alarm_names'], alarm_totals)},
+        'sensors': sensors,
+        'danger_timeline': timeline,
+        'danger_total': int(len(danger_rows)),
+    }
+
+def summarize_rows(csv_file):
+    """Row-by-row statistics - used when NumPy is not installed"""
+    total_events = 0
+    first_timestamp = last_timestamp = 0
     status_counts = Counter()
+    clock = StatusClock()
     alarm_types = Counter()
-    temp_readings = []
-    gas_readings = []
-    distance_readings = []
-    
+    readings = {sensor: [] for sensor in STAT_SENSORS}
+    timeline = []
+    danger_total = 0
+
     # Read and parse CSV data
     with open(csv_file, 'r') as file:
         reader = csv.DictReader(file)
         for row in reader:
-            events.append(row)
+            timestamp = int(row['timestamp'])
+            if not total_events:
+                first_timestamp = timestamp
+            last_timestamp = timestamp
+            total_events += 1
             status_counts[row['status']] += 1
-            
-            # Parse temperature
-            if row['temperature']:
-                temp_readings.append(float(row['temperature']))
-            
-            # Parse gas levels
-            if row['gas_level']:
-                gas_readings.append(int(row['gas_level']))
-            
-            # Parse distance
-            if row['distance']:
-                distance_readings.append(int(row['distance']))
-            
+            clock.add(row.get('device_id') or '', timestamp, row['status'])
+
+            for sensor in STAT_SENSORS:
+                if row[sensor]:
+                    readings[sensor].append(float(row[sensor]))
+
             # Parse alarms
             if row['alarms']:
                 alarms = row['alarms'].split('|')
                 for alarm in alarms:
                     alarm_types[alarm.strip()] += 1
-    
+
+            if row['status'] == 'DANGER':
+                danger_total += 1
+                if len(timeline) < TIMELINE_LIMIT:
+                    timeline.append(((timestamp - first_timestamp) / 1000, row['alarms']))
+
+    sensors = {}
+    for sensor, values in readings.items():
+        if not values:
+            continue
+        values.sort()
+        stats = {
+            'count': len(values),
+            'min': values[0],
+            'max': values[-1],
+            'avg': sum(values) / len(values),
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'p99': _percentile(values, 99),
+        }
+        if sensor in SPIKE_RULES:
+            comparison, limit = SPIKE_RULES[sensor]
+            spikes = [v for v in values if v > limit] if comparison == '>' else [v for v in values if v < limit]
+            stats['spikes'] = len(spikes)
+            stats['spike_peak'] = (max(spikes) if comparison == '>' else min(spikes)) if spikes else None
+        sensors[sensor] = stats
+
+    return {
+        'total_events': total_events,
+        'first_timestamp': first_timestamp,
+        'last_timestamp': last_timestamp,
+        'status_counts': dict(status_counts),
+        'status_ms': dict(clock.status_ms),
+        'alarm_types': dict(alarm_types),
+        'sensors': sensors,
+        'danger_timeline': timeline,
+        'danger_total': danger_total,
+    }
+
+def analyze_mission_data(csv_file, use_cache=True):
+    """Analyze mission data from CSV export"""
+
+    print("🔬 MARS-SENTINEL Mission Data Analysis")
+    print("=" * 50)
+
+    summary = None
+    if use_cache:
+        import analysis_cache  # imports this module's tables
+        try:
+            summary, cache_info = analysis_cache.cached_summary(csv_file)
+            print(f"🗂️ Analysis cache {cache_info['cache']}: parsed {cache_info['rows_parsed']} new rows")
+        except ValueError as e:
+            print(f"⚠️ Analysis cache cannot read this file ({e}), analyzing from scratch")
+    if summary is None and load_numpy() is not None:
+        try:
+            summary = summarize_columns(load_mission_columns(csv_file))
+        except ValueError as e:
+            print(f"⚠️ Columnar loader cannot read this file ({e}), using row parser")
+    if summary is None:
+        summary = summarize_rows(csv_file)
+
+    return report_summary(summary)
+
+def report_summary(summary):
+    """Print the analysis and return the mission summary dict"""
+    total_events = summary['total_events']
+    status_counts = summary['status_counts']
+    sensors = summary['sensors']
+
     # Analysis results
-    total_events = len(events)
-    mission_duration = (int(events[-1]['timestamp']) - int(events[0]['timestamp'])) / 1000  # seconds
-    
+    mission_duration = (summary['last_timestamp'] - summary['first_timestamp']) / 1000  # seconds
+
     print(f"\n📊 MISSION OVERVIEW")
     print(f"Total Events: {total_events}")
     print(f"Mission Duration: {mission_duration:.1f} seconds")
-    print(f"Data Rate: {total_events/mission_duration:.1f} events/second")
-    
+    if mission_duration > 0:
+        print(f"Data Rate: {total_events/mission_duration:.1f} events/second")
+
     print(f"\n🎯 STATUS DISTRIBUTION")
     for status, count in status_counts.items():
         percentage = (count / total_events) * 100
         print(f"{status:8}: {count:3} events ({percentage:.1f}%)")
-    
-    if temp_readings:
+
+    if 'temperature' in sensors:
+        stats = sensors['temperature']
         print(f"\n🌡️ TEMPERATURE ANALYSIS")
-        print(f"Min Temperature: {min(temp_readings):.1f}°C")
-        print(f"Max Temperature: {max(temp_readings):.1f}°C")
-        print(f"Avg Temperature: {sum(temp_readings)/len(temp_readings):.1f}°C")
-        
-        # Find temperature spikes
-        temp_spikes = [t for t in temp_readings if t > 40]
-        if temp_spikes:
-            print(f"Temperature Spikes (>40°C): {len(temp_spikes)} readings")
-            print(f"Peak Temperature: {max(temp_spikes):.1f}°C")
-    
-    if gas_readings:
+        print(f"Min Temperature: {stats['min']:.1f}°C")
+        print(f"Max Temperature: {stats['max']:.1f}°C")
+        print(f"Avg Temperature: {stats['avg']:.1f}°C")
+        print(f"P95 Temperature: {stats['p95']:.1f}°C")
+
+        # Temperature spikes
+        if stats['spikes']:
+            print(f"Temperature Spikes (>40°C): {stats['spikes']} readings")
+            print(f"Peak Temperature: {stats['spike_peak']:.1f}°C")
+
+    if 'gas_level' in sensors:
+        stats = sensors['gas_level']
         print(f"\n☣️ GAS LEVEL ANALYSIS")
-        print(f"Min Gas Level: {min(gas_readings)} ppm")
-        print(f"Max Gas Level: {max(gas_readings)} ppm")
-        print(f"Avg Gas Level: {sum(gas_readings)/len(gas_readings):.1f} ppm")
-        
-        # Find contamination events
-        contamination = [g for g in gas_readings if g > 500]
-        if contamination:
-            print(f"Contamination Events (>500ppm): {len(contamination)} readings")
-            print(f"Peak Contamination: {max(contamination)} ppm")
-    
-    if distance_readings:
+        print(f"Min Gas Level: {stats['min']:.0f} ppm")
+        print(f"Max Gas Level: {stats['max']:.0f} ppm")
+        print(f"Avg Gas Level: {stats['avg']:.1f} ppm")
+        print(f"P95 Gas Level: {stats['p95']:.0f} ppm")
+
+        # Contamination events
+        if stats['spikes']:
+            print(f"Contamination Events (>500ppm): {stats['spikes']} readings")
+            print(f"Peak Contamination: {stats['spike_peak']:.0f} ppm")
+
+    if 'distance' in sensors:
+        stats = sensors['distance']
         print(f"\n📏 PROXIMITY ANALYSIS")
-        print(f"Min Distance: {min(distance_readings)} cm")
-        print(f"Max Distance: {max(distance_readings)} cm")
-        print(f"Avg Distance: {sum(distance_readings)/len(distance_readings):.1f} cm")
-        
-        # Find close calls
-        close_calls = [d for d in distance_readings if d < 20]
-        if close_calls:
-            print(f"Close Calls (<20cm): {len(close_calls)} readings")
-            print(f"Closest Approach: {min(close_calls)} cm")
-    
+        print(f"Min Distance: {stats['min']:.0f} cm")
+        print(f"Max Distance: {stats['max']:.0f} cm")
+        print(f"Avg Distance: {stats['avg']:.1f} cm")
+
+        # Close calls
+        if stats['spikes']:
+            print(f"Close Calls (<20cm): {stats['spikes']} readings")
+            print(f"Closest Approach: {stats['spike_peak']:.0f} cm")
+
+    alarm_types = Counter({alarm: count for alarm, count in summary['alarm_types'].items() if count})
     if alarm_types:
         print(f"\n🚨 ALARM FREQUENCY")
         for alarm, count in alarm_types.most_common():
             print(f"{alarm}: {count} occurrences")
-    
+
     # Safety score calculation
-    danger_events = status_counts.get('DANGER', 0)
-    warn_events = status_counts.get('WARN', 0)
-    ok_events = status_counts.get('OK', 0)
-    
-    safety_score = (ok_events * 100 + warn_events * 50 + danger_events * 0) / total_events
-    
+    status_ms = summary.get('status_ms') or {}
+    safety_score = calculate_safety_score(status_counts, status_ms)
+
     print(f"\n🛡️ MISSION SAFETY SCORE")
     print(f"Safety Score: {safety_score:.1f}/100")
     if safety_score >= 80:
@@ -118,63 +394,97 @@ def analyze_mission_data(csv_file):
         print("🔶 FAIR - Multiple safety issues encountered")
     else:
         print("🚨 POOR - Significant safety risks during mission")
-    
+
     # Timeline analysis
     print(f"\n⏱️ CRITICAL EVENTS TIMELINE")
-    for i, event in enumerate(events):
-        if event['status'] == 'DANGER':
-            timestamp = int(event['timestamp'])
-            time_offset = (timestamp - int(events[0]['timestamp'])) / 1000
-            print(f"T+{time_offset:6.1f}s: DANGER - {event['alarms']}")
-    
+    for time_offset, alarms in summary['danger_timeline']:
+        print(f"T+{time_offset:6.1f}s: DANGER - {alarms}")
+    if summary['danger_total'] > len(summary['danger_timeline']):
+        print(f"... and {summary['danger_total'] - len(summary['danger_timeline'])} more DANGER events")
+
+    temperature = sensors.get('temperature')
     return {
         'total_events': total_events,
         'mission_duration': mission_duration,
         'safety_score': safety_score,
         'status_counts': dict(status_counts),
+        'status_seconds': {status: round(ms / 1000, 1) for status, ms in status_ms.items()},
         'alarm_types': dict(alarm_types),
         'temperature_stats': {
-            'min': min(temp_readings) if temp_readings else 0,
-            'max': max(temp_readings) if temp_readings else 0,
-            'avg': sum(temp_readings)/len(temp_readings) if temp_readings else 0
-        }
+            'min': temperature['min'] if temperature else 0,
+            'max': temperature['max'] if temperature else 0,
+            'avg': temperature['avg'] if temperature else 0
+        },
+        'sensor_stats': sensors
     }
 
-def generate_mission_report(analysis_data):
+def calculate_safety_score(status_counts, status_ms=None):
+    """0-100 score: OK counts 100, WARN 50, DANGER 0 - weighted by suit-time in each status
+    (StatusClock), or per reading when no time has been measured"""
+    if status_ms and sum(status_ms.values()):
+        status_counts = status_ms
+    total_events = sum(status_counts.values())
+    if not total_events:
+        return 100.0
+    danger_events = status_counts.get('DANGER', 0)
+    warn_events = status_counts.get('WARN', 0)
+    ok_events = status_counts.get('OK', 0)
+    return (ok_events * 100 + warn_events * 50 + danger_events * 0) / total_events
+
+def generate_mission_report(analysis_data, mission_id=None):
     """Generate a JSON mission report"""
-    
+
     report = {
-        'mission_id': f"MARS-SENTINEL-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+        'mission_id': mission_id or f"MARS-SENTINEL-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
         'analysis_timestamp': datetime.now().isoformat(),
         'summary': analysis_data,
         'recommendations': []
     }
-    
+
     # Add recommendations based on analysis
     if analysis_data['safety_score'] < 60:
         report['recommendations'].append("Review EVA procedures and safety protocols")
-    
+
     if 'Temperature Critical' in analysis_data['alarm_types']:
         report['recommendations'].append("Check thermal management systems")
-    
+
     if 'Gas Contamination Critical' in analysis_data['alarm_types']:
         report['recommendations'].append("Inspect life support and air filtration")
-    
+
     if 'Obstacle Too Close' in analysis_data['alarm_types']:
         report['recommendations'].append("Improve navigation and proximity awareness")
-    
+
     return report
 
+def _intern(names, name):
+    """Index of name in names, appending it if new"""
+    try:
+        return names.index(name)
+    except ValueError:
+        names.append(name)
+        return len(names) - 1
+
+def _percentile(sorted_values, q):
+    """Linear-interpolation percentile of an already sorted list (matches np.percentile)"""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
 if __name__ == "__main__":
-    # Analyze the sample data
-    analysis_results = analyze_mission_data('sample_mission_data.csv')
-    
+    import sys
+
+    # Analyze the given export (default: the sample data); --no-cache forces a full pass
+    arguments = [argument for argument in sys.argv[1:] if argument != '--no-cache']
+    analysis_results = analyze_mission_data(arguments[0] if arguments else 'sample_mission_data.csv',
+                                            use_cache='--no-cache' not in sys.argv)
+
     # Generate mission report
     mission_report = generate_mission_report(analysis_results)
-    
+
     # Save report as JSON
     with open('mission_report.json', 'w') as f:
         json.dump(mission_report, f, indent=2)
-    
+
     print(f"\n📋 Mission report saved to: mission_report.json")
     print(f"🔬 Analysis complete!")
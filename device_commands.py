@@ -0,0 +1,203 @@
+"""
+MARS-SENTINEL Device Command Channel
+Pushes thresholds, sample rates and report-by-exception deadbands to the firmware
+
+The host owns the configuration; the firmware is told over the same serial
+link it streams readings on (`SET <PARAM> <value>`, answered with
+`OK: <PARAM> updated to <value>`). Everything is pushed again on every
+(re)connect, since a board reset forgets it.
+
+The firmware picks its own sample interval from its local status (fast in
+WARN/DANGER, slow when OK) and only sends a sample when a value moved past its
+deadband or the heartbeat is due. Alarms the board cannot see - rules,
+anomalies, forecasts - are passed down with `ALERT <level> <hold ms>`, which
+keeps it sampling fast until the hold runs out.
+
+Commands are only queued here; the serial reader thread writes them between
+reads, one at a time, so nothing else ever touches the port.
+"""
+
+import threading
+import time
+from collections import deque
+
+import latency
+
+# Host threshold key -> firmware parameter
+THRESHOLD_PARAMETERS = {
+    'temp_warn': 'TEMP_WARN',
+    'temp_danger': 'TEMP_HIGH',
+    'humidity_warn': 'HUMID_WARN',
+    'humidity_danger': 'HUMID_HIGH',
+    'gas_warn': 'GAS_WARN',
+    'gas_danger': 'GAS_HIGH',
+    'distance_warn': 'DIST_WARN',
+    'distance_danger': 'DIST_DANGER',
+    'ir_danger': 'IR_DANGER',
+}
+
+# Sampling and reporting settings pushed on connect
+DEVICE_CONFIG = {
+    'RATE_OK': 500,         # ms between samples while OK
+    'RATE_WARN': 200,
+    'RATE_DANGER': 100,
+    'HEARTBEAT': 2000,      # ms - four OK samples; a report at least this often keeps freshness when nothing moves
+    'DB_TEMP': 0.3,         # deadbands: smallest change worth a report
+    'DB_HUMID': 1.0,
+    'DB_GAS': 10,
+    'DB_DIST': 3,
+}
+
+HEARTBEAT_MARGIN_MS = 500  # sensor reads, serial transfer and processing before the host sees a report
+
+ALERT_LEVELS = ('WARN', 'DANGER')
+ALERT_HOLD_MS = 5000        # how long a host-raised status keeps the board fast
+ALERT_REFRESH_S = 2.0       # re-send a standing alert this often, well inside the hold
+MAX_PENDING = 64
+COMMANDS_PER_READ = 1       # the board's serial buffer is 64 bytes - one command per reader wakeup,
+                            # so each reply line paces the next
+
+def format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f'{value:g}'
+
+def same_value(applied, sent):
+    """Compare an acknowledged value with the queued one (the board echoes floats as 45.00)"""
+    if applied is None:
+        return False
+    try:
+        return float(applied) == float(sent)
+    except ValueError:
+        return applied == sent
+
+def parse_reply(line):
+    """(ok, parameter, value) for a firmware command reply, None for anything else"""
+    if line.startswith('OK: ') and ' updated to ' in line:
+        parameter, value = line[4:].split(' updated to ', 1)
+        return True, parameter.strip(), value.strip()
+    if line.startswith('ERROR: '):
+        return False, None, line[7:].strip()
+    return None
+
+class DeviceCommandChannel:
+    """Desired firmware configuration plus the queue of commands still to write"""
+
+    def __init__(self, get_thresholds, config=None):
+        self.get_thresholds = get_thresholds
+        self.config = dict(DEVICE_CONFIG, **(config or {}))
+        # Freshness is judged on the host clock - never let the heartbeat outlast it. The board only
+        # checks the heartbeat when it samples, so a report can come up to one OK interval late.
+        self.config['HEARTBEAT'] = min(self.config['HEARTBEAT'],
+                                       latency.FRESHNESS_LIMIT_S * 1000 - self.config['RATE_OK']
+                                       - HEARTBEAT_MARGIN_MS)
+        self.lock = threading.Lock()
+        self.pending = deque(maxlen=MAX_PENDING)
+        self.sent = {}        # parameter -> value last queued
+        self.applied = {}     # parameter -> value the firmware acknowledged
+        self.attached = False
+        self.alert_level = None
+        self.alert_sent_at = 0.0
+        self.commands_sent = 0
+        self.acks = 0
+        self.last_error = None
+
+    def attach(self):
+        """Board (re)connected - push the whole configuration"""
+        with self.lock:
+            self.attached = True
+            self.pending.clear()
+            self.sent = {}
+            self.applied = {}
+            self.alert_level = None
+        self.push_config()
+        self.push_thresholds()
+
+    def detach(self):
+        with self.lock:
+            self.attached = False
+            self.pending.clear()
+
+    def set(self, parameter, value):
+        """Queue `SET <parameter> <value>` unless the board already has it"""
+        text = format_value(value)
+        with self.lock:
+            if not self.attached or self.sent.get(parameter) == text:
+                return False
+            self.sent[parameter] = text
+            self.pending.append(f'SET {parameter} {text}')
+            return True
+
+    def push_config(self):
+        for parameter, value in self.config.items():
+            self.set(parameter, value)
+
+    def push_thresholds(self, thresholds=None):
+        """Queue the host thresholds that changed since the last push"""
+        thresholds = thresholds if thresholds is not None else self.get_thresholds()
+        for key, parameter in THRESHOLD_PARAMETERS.items():
+            if key in thresholds:
+                self.set(parameter, thresholds[key])
+
+    def observe(self, reading):
+        """Adaptive rate: hold the board fast while the host-side status is raised
+
+        The board already speeds up on its own thresholds; this covers the
+        alarms only the host computes. An OK reading just lets the hold lapse,
+        which is the hysteresis.
+        """
+        status = reading.status
+        if status not in ALERT_LEVELS:
+            self.alert_level = None
+            return
+        now = time.monotonic()
+        if status == self.alert_level and now - self.alert_sent_at < ALERT_REFRESH_S:
+            return
+        with self.lock:
+            if not self.attached:
+                return
+            self.pending.append(f'ALERT {status} {ALERT_HOLD_MS}')
+        self.alert_level = status
+        self.alert_sent_at = now
+
+    def flush(self, ser, limit=COMMANDS_PER_READ):
+        """Write queued commands - called by the serial reader thread between reads"""
+        written = 0
+        while self.pending and written < limit:
+            try:
+                command = self.pending.popleft()
+            except IndexError:
+                break
+            ser.write(f'{command}\n'.encode('ascii'))
+            written += 1
+        if written:
+            self.commands_sent += written
+        return written
+
+    def handle_reply(self, line):
+        """Record an `OK:`/`ERROR:` reply; True if the line was one"""
+        reply = parse_reply(line)
+        if reply is None:
+            return False
+        ok, parameter, value = reply
+        if ok:
+            self.acks += 1
+            self.applied[parameter] = value
+        else:
+            self.last_error = value
+            print(f"⚠️ Firmware rejected a command: {value}")
+        return True
+
+    def status(self):
+        with self.lock:
+            unacked = [parameter for parameter, value in self.sent.items()
+                       if not same_value(self.applied.get(parameter), value)]
+            return {
+                'attached': self.attached,
+                'config': dict(self.config),
+                'pending': len(self.pending),
+                'commands_sent': self.commands_sent,
+                'acks': self.acks,
+                'unacknowledged': unacked,
+                'alert': self.alert_level,
+                'last_error': self.last_error,
+            }
@@ -0,0 +1,139 @@
+"""
+MARS-SENTINEL Device Registry
+Per-device state shards, crew-group assignment and Socket.IO room names
+
+Each suit (device_id) gets its own shard with its own lock, so updating one
+suit's latest reading never waits on another's. The registry lock is only
+taken the first time a device is seen.
+
+Dashboards subscribe to targets:
+    all            - every device (what a client gets if it does not ask)
+    device:<id>    - one suit
+    group:<name>   - every suit in a crew group
+A target is joined once per wire encoding as the room `<target>|<encoding>`,
+so a packet is encoded once per encoding and emitted once to all rooms that
+want it.
+"""
+
+import threading
+
+DEFAULT_GROUP = 'crew'
+
+# device_id -> crew group; unknown devices land in DEFAULT_GROUP
+DEVICE_GROUPS = {
+    'local': DEFAULT_GROUP,
+}
+
+ALL_TARGET = 'all'
+
+def device_target(device_id):
+    return f'device:{device_id}'
+
+def group_target(group):
+    return f'group:{group}'
+
+def room_name(target, encoding):
+    return f'{target}|{encoding}'
+
+class DeviceShard:
+    """Latest reading and counters for one device"""
+
+    __slots__ = ('device_id', 'group', 'lock', 'current', 'count', 'last_update')
+
+    def __init__(self, device_id, group):
+        self.device_id = device_id
+        self.group = group
+        self.lock = threading.Lock()
+        self.current = None     # latest Reading
+        self.count = 0
+        self.last_update = 0
+
+    def update(self, reading):
+        with self.lock:
+            self.current = reading
+            self.count += 1
+            self.last_update = reading.timestamp
+
+    def summary(self):
+        with self.lock:
+            return {
+                'device_id': self.device_id,
+                'group': self.group,
+                'count': self.count,
+                'last_update': self.last_update,
+                'status': self.current.status if self.current else None,
+                'connected': self.current.connected if self.current else False,
+            }
+
+class DeviceRegistry:
+    """Sharded per-device state plus the room names each device's packets go to"""
+
+    def __init__(self, groups=None):
+        self.groups = dict(DEVICE_GROUPS if groups is None else groups)
+        self.shards = {}
+        self.lock = threading.Lock()
+
+    def shard(self, device_id):
+        shard = self.shards.get(device_id)
+        if shard is None:
+            with self.lock:
+                shard = self.shards.get(device_id)
+                if shard is None:
+                    group = self.groups.get(device_id, DEFAULT_GROUP)
+                    shard = self.shards[device_id] = DeviceShard(device_id, group)
+        return shard
+
+    def update(self, reading):
+        """Store a Reading in its device's shard and return the shard"""
+        shard = self.shard(reading.device_id)
+        shard.update(reading)
+        return shard
+
+    def set_connected(self, device_id, connected):
+        """Flag a device's latest reading as (dis)connected without counting a new reading"""
+        shard = self.shards.get(device_id)
+        if shard:
+            with shard.lock:
+                if shard.current:
+                    shard.current = shard.current.copy(connected=connected)
+
+    def assign(self, device_id, group):
+        """Move a device to a crew group (takes effect from its next packet)"""
+        with self.lock:
+            self.groups[device_id] = group
+        self.shard(device_id).group = group
+
+    def current(self, device_id):
+        shard = self.shards.get(device_id)
+        return shard.current if shard else None
+
+    def targets_for(self, device_id):
+        """Subscription targets a packet from this device is delivered to"""
+        return (ALL_TARGET, device_target(device_id), group_target(self.shard(device_id).group))
+
+    def devices_for(self, target):
+        """Device ids whose packets a subscription target receives"""
+        if target == ALL_TARGET:
+            return list(self.shards)
+        kind, _, name = target.partition(':')
+        if kind == 'device':
+            return [name] if name in self.shards else []
+        if kind == 'group':
+            return [device_id for device_id, shard in list(self.shards.items()) if shard.group == name]
+        return []
+
+    def list_devices(self):
+        return [shard.summary() for shard in list(self.shards.values())]
+
+def parse_targets(devices=None, groups=None):
+    """Subscription targets from device/group lists or comma-separated strings"""
+    def split(value):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(',')
+        return [str(item).strip() for item in value if str(item).strip()]
+
+    targets = [device_target(device_id) for device_id in split(devices)]
+    targets += [group_target(group) for group in split(groups)]
+    return targets
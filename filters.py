@@ -0,0 +1,277 @@
+"""
+MARS-SENTINEL Reading Filters
+Rolling median + Hampel outlier rejection per field, and min-dwell confirmation of DANGER
+
+The HC-SR04 and DHT11 throw occasional single-sample glitches. Values are
+filtered before the threshold checks, and a DANGER alarm on a filtered field
+only stands once it has held for `min_dwell_ms` - until then it is reported as
+the matching warning.
+
+Windows and dwell are milliseconds of reading time, not reading counts: the
+firmware changes its report rate with the status and network suits report at
+their own pace, so a count would mean something different on every stream.
+
+The firmware judges the same thresholds on the raw values. When a raw value
+crosses into another threshold band the board's own status has changed - a
+real step, not a glitch - so that field's window restarts at the new level
+instead of rejecting it as an outlier. The dwell still guards DANGER.
+"""
+
+import heapq
+from collections import deque
+
+from wire_format import alarm_bit
+
+# Per-field settings; fields not listed pass through untouched
+# window_ms is five samples at the firmware's OK rate; below min_points in the window nothing is judged
+# min_scale is the sensor resolution, so a flat signal does not make every step an outlier
+# min_dwell_ms is two samples at the firmware's DANGER rate
+FILTER_CONFIG = {
+    'distance': {'window_ms': 2500, 'min_points': 3, 'hampel_k': 3.0, 'min_scale': 2.0, 'min_dwell_ms': 200},
+    'temperature': {'window_ms': 2500, 'min_points': 3, 'hampel_k': 3.0, 'min_scale': 0.5, 'min_dwell_ms': 200},
+    'humidity': {'window_ms': 2500, 'min_points': 3, 'hampel_k': 3.0, 'min_scale': 1.0, 'min_dwell_ms': 200},
+}
+
+# field -> (warn threshold key, danger threshold key, direction of danger), as the firmware evaluates them
+THRESHOLD_BANDS = {
+    'distance': ('distance_warn', 'distance_danger', -1),
+    'temperature': ('temp_warn', 'temp_danger', 1),
+    'humidity': ('humidity_warn', 'humidity_danger', 1),
+}
+
+# field -> (danger alarm, warning it is downgraded to while unconfirmed)
+DWELL_ALARMS = {
+    'distance': ('Obstacle Too Close', 'Obstacle Warning'),
+    'temperature': ('Temperature Critical', 'Temperature Warning'),
+    'humidity': ('Humidity Critical', 'Humidity Warning'),
+}
+
+CRITICAL_ALARMS = {
+    'Temperature Critical',
+    'Humidity Critical',
+    'Gas Contamination Critical',
+    'Obstacle Too Close',
+    'Edge/Fall Risk Detected',
+}
+
+DWELL_BITS = {field: (alarm_bit(danger), alarm_bit(warn)) for field, (danger, warn) in DWELL_ALARMS.items()}
+CRITICAL_MASK = 0
+for _alarm in CRITICAL_ALARMS:
+    CRITICAL_MASK |= alarm_bit(_alarm)
+
+# Scales a median absolute deviation to a standard deviation for normal noise
+MAD_SCALE = 1.4826
+
+class RollingMedian:
+    """Median of a sliding window using two heaps with lazy deletion - O(log n) per update
+
+    The window is the last `size` values; with size None it only shrinks
+    through `expire`, which drops values stamped before a cut-off.
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self.values = deque()
+        self.times = deque()
+        self.low = []    # max-heap (negated) of the smaller half
+        self.high = []   # min-heap of the larger half
+        self.low_size = 0
+        self.high_size = 0
+        self.delayed = {}
+
+    def add(self, value, timestamp=0):
+        if not self.low or value <= -self.low[0]:
+            heapq.heappush(self.low, -value)
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, value)
+            self.high_size += 1
+        self._balance()
+
+        self.values.append(value)
+        self.times.append(timestamp)
+        if self.size is not None and len(self.values) > self.size:
+            self.times.popleft()
+            self._remove(self.values.popleft())
+
+    def expire(self, oldest):
+        """Drop the values stamped before `oldest`"""
+        while self.times and self.times[0] < oldest:
+            self.times.popleft()
+            self._remove(self.values.popleft())
+
+    def median(self):
+        if self.low_size > self.high_size:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+    def __len__(self):
+        return len(self.values)
+
+    def clear(self):
+        self.values.clear()
+        self.times.clear()
+        self.low = []
+        self.high = []
+        self.low_size = 0
+        self.high_size = 0
+        self.delayed = {}
+
+    def _remove(self, value):
+        self.delayed[value] = self.delayed.get(value, 0) + 1
+        if value <= -self.low[0]:
+            self.low_size -= 1
+            if value == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self.high_size -= 1
+            if self.high and value == self.high[0]:
+                self._prune(self.high, 1)
+        self._balance()
+
+    def _balance(self):
+        if self.low_size > self.high_size + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+            self._prune(self.low, -1)
+        elif self.low_size < self.high_size:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.high_size -= 1
+            self.low_size += 1
+            self._prune(self.high, 1)
+
+    def _prune(self, heap, sign):
+        """Drop values at the top of a heap that have already left the window"""
+        while heap:
+            value = sign * heap[0]
+            count = self.delayed.get(value)
+            if not count:
+                break
+            if count == 1:
+                del self.delayed[value]
+            else:
+                self.delayed[value] = count - 1
+            heapq.heappop(heap)
+
+class FieldFilter:
+    """Hampel filter for one field on one device
+
+    The MAD is itself a rolling median of |x - median| taken at insertion time,
+    which keeps the update O(log n) instead of re-sorting the window.
+    """
+
+    def __init__(self, window_ms, hampel_k, min_scale, min_points):
+        self.values = RollingMedian()
+        self.deviations = RollingMedian()
+        self.window_ms = window_ms
+        self.hampel_k = hampel_k
+        self.min_scale = min_scale
+        self.min_points = min_points
+        self.rejected = 0
+        self.restarts = 0
+        self.band = None           # threshold band of the last raw value
+        self.danger_since = None   # timestamp of the first reading in the current DANGER run
+
+    def apply(self, value, timestamp_ms, band=None):
+        if band != self.band:
+            if self.band is not None:
+                # The board's status moved with this value - start the window over at the new level
+                self.values.clear()
+                self.deviations.clear()
+                self.restarts += 1
+            self.band = band
+        oldest = timestamp_ms - self.window_ms
+        self.values.expire(oldest)
+        self.deviations.expire(oldest)
+        if len(self.values) < self.min_points:
+            # Not enough recent history to judge yet
+            self.values.add(value, timestamp_ms)
+            self.deviations.add(abs(value - self.values.median()), timestamp_ms)
+            return value
+
+        median = self.values.median()
+        deviation = abs(value - median)
+        scale = max(MAD_SCALE * self.deviations.median(), self.min_scale)
+        self.values.add(value, timestamp_ms)
+        self.deviations.add(deviation, timestamp_ms)
+
+        if deviation > self.hampel_k * scale:
+            self.rejected += 1
+            return type(value)(round(median)) if isinstance(value, int) else median
+        return value
+
+class ReadingFilter:
+    """Per-device field filters plus the min-dwell DANGER gate"""
+
+    def __init__(self, get_thresholds, config=None):
+        self.get_thresholds = get_thresholds
+        self.config = config or FILTER_CONFIG
+        self.filters = {}  # (device_id, field) -> FieldFilter
+
+    def field_filter(self, device_id, field):
+        key = (device_id, field)
+        field_filter = self.filters.get(key)
+        if field_filter is None:
+            settings = self.config[field]
+            field_filter = self.filters[key] = FieldFilter(
+                settings['window_ms'], settings['hampel_k'], settings['min_scale'], settings['min_points']
+            )
+        return field_filter
+
+    def apply(self, device_id, field, value, timestamp_ms):
+        """Filtered value for a field (unchanged if the field is not configured)"""
+        if field not in self.config:
+            return value
+        return self.field_filter(device_id, field).apply(value, timestamp_ms, self.band(field, value))
+
+    def band(self, field, value):
+        """0 OK, 1 WARN, 2 DANGER for a raw value against the thresholds the firmware was given"""
+        bands = THRESHOLD_BANDS.get(field)
+        if bands is None:
+            return None
+        warn_key, danger_key, direction = bands
+        thresholds = self.get_thresholds()
+        danger = thresholds.get(danger_key)
+        if danger is not None and value * direction > danger * direction:
+            return 2
+        warn = thresholds.get(warn_key)
+        if warn is not None and value * direction > warn * direction:
+            return 1
+        return 0
+
+    def confirm_danger(self, reading):
+        """Pipeline stage: downgrade DANGER alarms that have not held for min_dwell_ms"""
+        device_id = reading.device_id
+        timestamp = reading.timestamp
+        mask = reading.alarm_mask
+        downgraded = False
+
+        for field, (danger_bit, warn_bit) in DWELL_BITS.items():
+            if field not in self.config:
+                continue
+            field_filter = self.field_filter(device_id, field)
+            if not mask & danger_bit:
+                field_filter.danger_since = None
+                continue
+            if field_filter.danger_since is None:
+                field_filter.danger_since = timestamp
+            if timestamp - field_filter.danger_since < self.config[field]['min_dwell_ms']:
+                mask = (mask & ~danger_bit) | warn_bit
+                downgraded = True
+
+        reading.alarm_mask = mask
+        if downgraded and reading.status == 'DANGER' and not mask & CRITICAL_MASK:
+            reading.status = 'WARN'
+
+    def stats(self):
+        """Rejected-sample and window-restart counts per device and field"""
+        return {f'{device_id}:{field}': {'rejected': field_filter.rejected, 'restarts': field_filter.restarts}
+                for (device_id, field), field_filter in self.filters.items()}
+
+    def reset(self, device_id=None):
+        if device_id is None:
+            self.filters.clear()
+        else:
+            for key in [key for key in self.filters if key[0] == device_id]:
+                del self.filters[key]
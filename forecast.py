@@ -0,0 +1,143 @@
+"""
+MARS-SENTINEL Time-to-Threshold Forecasting
+Sliding-window linear trend per sensor per device, updated incrementally
+
+Each window keeps running sums (n, Σt, Σy, Σt², Σty) so adding a reading and
+evicting the oldest one is O(1); the least-squares slope falls out of the sums
+without refitting. Sums are rebuilt from the window now and then to stop
+floating-point error from creeping in.
+"""
+
+from collections import deque
+
+from wire_format import QUALITY_BITS
+
+# sensor -> (warn threshold key, danger threshold key, direction of danger)
+FORECAST_SENSORS = {
+    'temperature': ('temp_warn', 'temp_danger', 1),
+    'humidity': ('humidity_warn', 'humidity_danger', 1),
+    'gas_level': ('gas_warn', 'gas_danger', 1),
+    'distance': ('distance_warn', 'distance_danger', -1),
+}
+
+FORECAST_WINDOW = 30          # readings per trend window
+FORECAST_MIN_POINTS = 5       # readings before a trend is reported
+FORECAST_HORIZON_S = 3600     # crossings further out than this are reported as None
+RESYNC_EVERY = 1000           # updates between exact recomputations of the sums
+
+class TrendWindow:
+    """Running least-squares line over the last N (time, value) points"""
+    __slots__ = ('points', 'origin', 'n', 'sum_t', 'sum_y', 'sum_tt', 'sum_ty', 'updates')
+
+    def __init__(self, size):
+        self.points = deque(maxlen=size)
+        self.origin = None
+        self.n = 0
+        self.sum_t = self.sum_y = self.sum_tt = self.sum_ty = 0.0
+        self.updates = 0
+
+    def add(self, timestamp_ms, value):
+        if self.origin is None:
+            self.origin = timestamp_ms
+        t = (timestamp_ms - self.origin) / 1000
+        if len(self.points) == self.points.maxlen:
+            old_t, old_y = self.points[0]
+            self.n -= 1
+            self.sum_t -= old_t
+            self.sum_y -= old_y
+            self.sum_tt -= old_t * old_t
+            self.sum_ty -= old_t * old_y
+        self.points.append((t, value))
+        self.n += 1
+        self.sum_t += t
+        self.sum_y += value
+        self.sum_tt += t * t
+        self.sum_ty += t * value
+
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self.resync()
+
+    def resync(self):
+        """Recompute the sums exactly, rebasing time on the oldest point"""
+        shift = self.points[0][0]
+        self.origin += shift * 1000
+        self.points = deque(((t - shift, y) for t, y in self.points), maxlen=self.points.maxlen)
+        self.n = len(self.points)
+        self.sum_t = sum(t for t, _ in self.points)
+        self.sum_y = sum(y for _, y in self.points)
+        self.sum_tt = sum(t * t for t, _ in self.points)
+        self.sum_ty = sum(t * y for t, y in self.points)
+
+    def slope(self):
+        """Units per second, or None when there is no usable spread in time"""
+        denominator = self.n * self.sum_tt - self.sum_t * self.sum_t
+        if self.n < 2 or denominator <= 1e-12:
+            return None
+        return (self.n * self.sum_ty - self.sum_t * self.sum_y) / denominator
+
+    def level(self, slope):
+        """Fitted value at the newest point in the window"""
+        t_last = self.points[-1][0]
+        intercept = (self.sum_y - slope * self.sum_t) / self.n
+        return intercept + slope * t_last
+
+class TrendForecaster:
+    """Pipeline stage that adds a `forecast` block to each packet"""
+
+    def __init__(self, get_thresholds, window=FORECAST_WINDOW):
+        self.get_thresholds = get_thresholds
+        self.window = window
+        self.windows = {}  # (device_id, sensor) -> TrendWindow
+
+    def process(self, reading):
+        thresholds = self.get_thresholds()
+        device_id = reading.device_id
+        timestamp = reading.timestamp
+        quality = reading.quality_mask
+        forecast = {}
+
+        for sensor, (warn_key, danger_key, direction) in FORECAST_SENSORS.items():
+            if quality & QUALITY_BITS[sensor]:
+                continue   # no trend through a placeholder or a stuck sensor
+            key = (device_id, sensor)
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = TrendWindow(self.window)
+            window.add(timestamp, getattr(reading, sensor))
+
+            if window.n < FORECAST_MIN_POINTS:
+                continue
+            slope = window.slope()
+            if slope is None:
+                continue
+            level = window.level(slope)
+            forecast[sensor] = {
+                'slope': round(slope, 4),
+                'warn_in': seconds_to_cross(level, slope, thresholds.get(warn_key), direction),
+                'danger_in': seconds_to_cross(level, slope, thresholds.get(danger_key), direction),
+            }
+
+        reading.forecast = forecast
+
+    def reset(self, device_id=None):
+        if device_id is None:
+            self.windows.clear()
+        else:
+            for key in [key for key in self.windows if key[0] == device_id]:
+                del self.windows[key]
+
+def seconds_to_cross(level, slope, threshold, direction):
+    """Seconds until the trend crosses threshold in the danger direction
+
+    0 when already past it, None when the trend is moving away or the crossing
+    lies beyond the forecast horizon.
+    """
+    if threshold is None:
+        return None
+    if (level - threshold) * direction >= 0:
+        return 0
+    if slope * direction <= 0:
+        return None
+    seconds = (threshold - level) / slope
+    return round(seconds, 1) if seconds <= FORECAST_HORIZON_S else None
@@ -0,0 +1,121 @@
+"""
+MARS-SENTINEL Ingest Queues
+Bounded queues between the serial reader, processing and Socket.IO fan-out
+
+Overload policies:
+    drop_oldest - the oldest queued item is discarded to make room (reader never waits)
+    coalesce    - a new item replaces the queued one with the same key (latest value wins)
+    block       - the producer waits for space (only for producers that may wait)
+
+Items sit in a deque with an Event for wakeups. The serial reader and the
+network listener produce concurrently, so every put takes a short lock that
+covers the append and the enqueued/dropped/coalesced counters together - the
+numbers in /api/status never lose an update. The consumer drains a whole batch
+under the same lock, once per batch. A blocking producer waits for space
+outside the lock.
+"""
+
+import threading
+import time
+from collections import deque
+
+POLICIES = ('drop_oldest', 'coalesce', 'block')
+
+class IngestQueue:
+    """Bounded single-consumer queue with drop/coalesce accounting"""
+
+    def __init__(self, name, size, policy='drop_oldest'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overload policy: {policy}")
+        self.name = name
+        self.size = size
+        self.policy = policy
+        self.items = deque(maxlen=size if policy == 'drop_oldest' else None)
+        self.wakeup = threading.Event()
+        self.space = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = {}   # coalesce only: key -> latest item
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked_seconds = 0.0
+        self.high_watermark = 0
+
+    def put(self, item, key=None):
+        """Queue an item; never raises on overload, the policy decides what gives"""
+        blocked = 0.0
+        if self.policy == 'block' and len(self.items) >= self.size:
+            started = time.perf_counter()
+            while len(self.items) >= self.size:
+                self.space.clear()
+                if len(self.items) >= self.size:
+                    self.space.wait(0.1)
+            blocked = time.perf_counter() - started
+
+        with self.lock:
+            if self.policy == 'coalesce':
+                if key in self.pending:
+                    self.pending[key] = item
+                    self.coalesced += 1
+                    return
+                if len(self.items) >= self.size:
+                    self.pending.pop(self.items.popleft(), None)
+                    self.dropped += 1
+                self.pending[key] = item
+                self.items.append(key)
+            else:
+                if self.policy == 'drop_oldest' and len(self.items) >= self.size:
+                    self.dropped += 1  # deque(maxlen) discards the oldest on append
+                self.items.append(item)
+                self.blocked_seconds += blocked
+
+            self.enqueued += 1
+            depth = len(self.items)
+            if depth > self.high_watermark:
+                self.high_watermark = depth
+        if not self.wakeup.is_set():
+            self.wakeup.set()
+
+    def get_batch(self, max_items=64, timeout=0.5):
+        """Drain up to max_items, waiting up to timeout for the first one"""
+        self.wakeup.clear()
+        if not self.items:
+            self.wakeup.wait(timeout)
+
+        batch = []
+        # Drained under the put lock: a producer that counted a drop on a full queue
+        # must see the same queue when it appends
+        with self.lock:
+            if self.policy == 'coalesce':
+                while self.items and len(batch) < max_items:
+                    batch.append(self.pending.pop(self.items.popleft()))
+            else:
+                while self.items and len(batch) < max_items:
+                    batch.append(self.items.popleft())
+            self.dequeued += len(batch)
+        if self.policy == 'block' and batch:
+            self.space.set()
+        return batch
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'size': self.size,
+            'depth': len(self.items),
+            'high_watermark': self.high_watermark,
+            'enqueued': self.enqueued,
+            'dequeued': self.dequeued,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'blocked_seconds': round(self.blocked_seconds, 3),
+        }
+
+def run_worker(queue, handler, batch_size=64):
+    """Drain a queue forever, handing each item to handler"""
+    while True:
+        for item in queue.get_batch(batch_size):
+            try:
+                handler(item)
+            except Exception as e:
+                print(f"{queue.name} worker error: {e}")
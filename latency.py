@@ -0,0 +1,192 @@
+"""
+MARS-SENTINEL Latency Tracing
+Device-to-host clock sync, per-stage pipeline timings and a data-freshness watchdog
+
+Every reading carries a `trace` block of host-clock milliseconds:
+    sample    - device timestamp_ms mapped onto the host clock
+    received  - line read from the serial port
+    parsed    - line parsed into a packet
+    evaluated - thresholds and pipeline stages done
+    emitted   - handed to Socket.IO (only recorded in the stats, after the packet has gone out)
+
+The device clock is Arduino millis(), so the offset to the host clock is
+estimated: the minimum of (received - device) per bucket is the sample with the
+least transport delay, and a least-squares line through recent bucket minima
+gives offset and drift. The fixed part of the transport delay cannot be seen
+without a round trip, so `sample_to_received` is the delay above the best case.
+
+Freshness is tracked per device, from lines that parsed as readings, so a
+chatty suit cannot hide a silent one.
+"""
+
+import time
+from collections import deque
+
+CLOCK_BUCKET_MS = 10000      # device-time span of one minimum-offset bucket
+CLOCK_BUCKETS = 30           # buckets kept for the drift fit (~5 minutes)
+LATENCY_SAMPLES = 2048       # recent samples kept per stage for percentiles
+FRESHNESS_LIMIT_S = 3.0      # readings older than this mark the data stale
+WATCHDOG_INTERVAL_S = 0.5
+
+STAGES = (
+    ('sample', 'received'),
+    ('received', 'parsed'),
+    ('parsed', 'evaluated'),
+    ('evaluated', 'emitted'),
+    ('sample', 'emitted'),
+)
+
+def now_ms():
+    return time.time() * 1000
+
+class ClockSync:
+    """Min-filtered, drift-corrected estimate of host_ms - device_ms for one device"""
+
+    def __init__(self):
+        self.buckets = deque(maxlen=CLOCK_BUCKETS)  # [bucket start device_ms, device_ms at min, min offset]
+        self.offset = None
+        self.drift = 0.0        # ms of offset change per ms of device time
+        self.reference = 0      # device_ms the fitted offset refers to
+        self.last_device = None
+
+    def observe(self, device_ms, host_ms):
+        """Fold in one (device, host) timestamp pair, return the sample time on the host clock"""
+        if self.last_device is not None and device_ms < self.last_device:
+            # millis() went backwards - the board rebooted, start over
+            self.buckets.clear()
+            self.offset = None
+        self.last_device = device_ms
+
+        offset = host_ms - device_ms
+        bucket = self.buckets[-1] if self.buckets else None
+        if bucket is None or device_ms - bucket[0] >= CLOCK_BUCKET_MS:
+            self.buckets.append([device_ms, device_ms, offset])
+            self.fit()
+        elif offset < bucket[2]:
+            bucket[1] = device_ms
+            bucket[2] = offset
+            self.fit()
+
+        return device_ms + self.offset_at(device_ms)
+
+    def fit(self):
+        """Least-squares line through the bucket minima"""
+        n = len(self.buckets)
+        if n < 3:
+            self.offset = min(bucket[2] for bucket in self.buckets)
+            self.drift = 0.0
+            self.reference = self.buckets[-1][1]
+            return
+        mean_t = sum(bucket[1] for bucket in self.buckets) / n
+        mean_o = sum(bucket[2] for bucket in self.buckets) / n
+        spread = sum((bucket[1] - mean_t) ** 2 for bucket in self.buckets)
+        if spread <= 0:
+            return
+        self.drift = sum((bucket[1] - mean_t) * (bucket[2] - mean_o) for bucket in self.buckets) / spread
+        self.offset = mean_o
+        self.reference = mean_t
+
+    def offset_at(self, device_ms):
+        return self.offset + self.drift * (device_ms - self.reference)
+
+    def status(self):
+        return {
+            'offset_ms': round(self.offset, 1) if self.offset is not None else None,
+            'drift_ppm': round(self.drift * 1e6, 1),
+            'buckets': len(self.buckets),
+        }
+
+class LatencyTracker:
+    """Per-stage latency samples, inter-arrival jitter and freshness"""
+
+    def __init__(self):
+        self.clocks = {}   # device_id -> ClockSync
+        self.samples = {f'{start}_to_{end}': deque(maxlen=LATENCY_SAMPLES) for start, end in STAGES}
+        self.intervals = deque(maxlen=LATENCY_SAMPLES)
+        self.last_received = {}     # device_id -> received_ms of its last reading
+        self.stale = set()          # device_ids currently silent for longer than the limit
+        self.on_stale_change = []   # callbacks(device_id, stale, age_seconds)
+
+    def sample_time(self, device_id, device_ms, received_ms):
+        """Device timestamp on the host clock, updating that device's clock estimate"""
+        clock = self.clocks.get(device_id)
+        if clock is None:
+            clock = self.clocks[device_id] = ClockSync()
+        return clock.observe(device_ms, received_ms)
+
+    def received(self, device_id, received_ms):
+        """A line from this device parsed as a reading - the gap is measured per device"""
+        last = self.last_received.get(device_id)
+        if last is not None:
+            self.intervals.append(received_ms - last)
+        self.last_received[device_id] = received_ms
+
+    def emitted(self, trace):
+        """Record a finished trace - call right after the emit
+
+        The trace itself is left untouched: the packet is already stored and
+        may be serialized by another thread.
+        """
+        times = dict(trace, emitted=now_ms())
+        for start, end in STAGES:
+            if times.get(start) is not None:
+                self.samples[f'{start}_to_{end}'].append(times[end] - times[start])
+
+    def check_freshness(self):
+        """Flip each device's stale flag when its readings stop arriving; returns ages in seconds"""
+        now = now_ms()
+        ages = {}
+        for device_id, last in list(self.last_received.items()):
+            age = ages[device_id] = (now - last) / 1000
+            stale = age > FRESHNESS_LIMIT_S
+            if stale != (device_id in self.stale):
+                if stale:
+                    self.stale.add(device_id)
+                else:
+                    self.stale.discard(device_id)
+                for callback in self.on_stale_change:
+                    callback(device_id, stale, age)
+        return ages
+
+    def watchdog(self):
+        """Run forever on a daemon thread"""
+        while True:
+            time.sleep(WATCHDOG_INTERVAL_S)
+            try:
+                self.check_freshness()
+            except Exception as e:
+                print(f"Freshness watchdog error: {e}")
+
+    def report(self):
+        stages = {name: percentiles(list(values)) for name, values in self.samples.items()}
+        intervals = list(self.intervals)
+        now = now_ms()
+        ages = {device_id: round((now - last) / 1000, 2) for device_id, last in list(self.last_received.items())}
+        return {
+            'stages_ms': stages,
+            'inter_arrival_ms': percentiles(intervals),
+            'jitter_ms': round(stdev(intervals), 2) if len(intervals) > 1 else None,
+            'clocks': {device_id: clock.status() for device_id, clock in self.clocks.items()},
+            'freshness': {
+                'age_seconds': ages,
+                'limit_seconds': FRESHNESS_LIMIT_S,
+                'stale': sorted(self.stale),
+            },
+        }
+
+def percentiles(values):
+    if not values:
+        return None
+    values.sort()
+    last = len(values) - 1
+    return {
+        'count': len(values),
+        'p50': round(values[last * 50 // 100], 2),
+        'p90': round(values[last * 90 // 100], 2),
+        'p99': round(values[last * 99 // 100], 2),
+        'max': round(values[-1], 2),
+    }
+
+def stdev(values):
+    mean = sum(values) / len(values)
+    return (sum((value - mean) ** 2 for value in values) / (len(values) - 1)) ** 0.5
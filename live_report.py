@@ -0,0 +1,112 @@
+"""
+MARS-SENTINEL Live Mission Report
+Keeps the mission report aggregates current on every reading
+
+Produces the same summary shape as data_analysis.analyze_mission_data(), so
+generate_mission_report() turns it into the full report (safety score,
+recommendations) without rescanning any history. Reset at mission boundaries.
+"""
+
+import threading
+
+from data_analysis import SPIKE_RULES, STAT_SENSORS, StatusClock, calculate_safety_score
+from wire_format import QUALITY_BITS, alarms_from_mask
+
+class LiveReport:
+    """Running status/alarm counts and per-sensor stats for the current mission"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, mission_id=None):
+        with self.lock:
+            self.mission_id = mission_id
+            self.total_events = 0
+            self.first_timestamp = None
+            self.last_timestamp = None
+            self.status_counts = {}
+            self.clock = StatusClock()  # suit-time in each status - readings arrive faster in WARN/DANGER
+            self.alarm_bits = {}    # alarm bit -> count, named in summary()
+            self.sensors = {sensor: None for sensor in STAT_SENSORS}
+
+    def update(self, reading):
+        """Fold one reading into the aggregates - O(number of sensors + alarms)"""
+        with self.lock:
+            self.total_events += 1
+            timestamp = reading.timestamp
+            status = reading.status
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = max(timestamp, self.last_timestamp or timestamp)
+
+            self.clock.add(reading.device_id, timestamp, status)
+
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            mask = reading.alarm_mask
+            while mask:
+                bit = mask & -mask
+                self.alarm_bits[bit] = self.alarm_bits.get(bit, 0) + 1
+                mask ^= bit
+
+            quality = reading.quality_mask
+            for sensor in STAT_SENSORS:
+                if quality & QUALITY_BITS[sensor]:
+                    continue   # substituted, out-of-range or stuck - not a measurement
+                value = getattr(reading, sensor)
+                stats = self.sensors[sensor]
+                if stats is None:
+                    stats = self.sensors[sensor] = {
+                        'count': 0, 'min': value, 'max': value, 'sum': 0.0,
+                        'spikes': 0, 'spike_peak': None
+                    }
+                stats['count'] += 1
+                stats['sum'] += value
+                if value < stats['min']:
+                    stats['min'] = value
+                if value > stats['max']:
+                    stats['max'] = value
+
+                rule = SPIKE_RULES.get(sensor)
+                if rule:
+                    comparison, limit = rule
+                    if value > limit if comparison == '>' else value < limit:
+                        stats['spikes'] += 1
+                        peak = stats['spike_peak']
+                        if peak is None or (value > peak if comparison == '>' else value < peak):
+                            stats['spike_peak'] = value
+
+    def summary(self):
+        """Current aggregates in the analyze_mission_data() summary shape"""
+        with self.lock:
+            sensors = {}
+            for sensor, stats in self.sensors.items():
+                if stats is None:
+                    continue
+                sensors[sensor] = {
+                    'count': stats['count'],
+                    'min': stats['min'],
+                    'max': stats['max'],
+                    'avg': round(stats['sum'] / stats['count'], 2),
+                }
+                if sensor in SPIKE_RULES:
+                    sensors[sensor]['spikes'] = stats['spikes']
+                    sensors[sensor]['spike_peak'] = stats['spike_peak']
+
+            temperature = sensors.get('temperature')
+            duration = (self.last_timestamp - self.first_timestamp) / 1000 if self.total_events else 0
+            status_ms = self.clock.status_ms
+            return {
+                'total_events': self.total_events,
+                'mission_duration': duration,
+                'safety_score': calculate_safety_score(self.status_counts, status_ms),
+                'status_counts': dict(self.status_counts),
+                'status_seconds': {status: round(ms / 1000, 1) for status, ms in status_ms.items()},
+                'alarm_types': {alarms_from_mask(bit)[0]: count for bit, count in self.alarm_bits.items()},
+                'temperature_stats': {
+                    'min': temperature['min'] if temperature else 0,
+                    'max': temperature['max'] if temperature else 0,
+                    'avg': temperature['avg'] if temperature else 0
+                },
+                'sensor_stats': sensors
+            }
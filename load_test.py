@@ -0,0 +1,362 @@
+"""
+MARS-SENTINEL Load Test
+Simulates concurrent dashboard clients and reports latency, delivery lag and server CPU
+
+Traffic mix per client, like the real dashboards:
+    poller     - dashboard_polling.html: GET /api/events?limit=5 every second
+    subscriber - dashboard.html: Socket.IO connection receiving sensor_update
+    both occasionally GET /api/export and POST /api/mission_mode
+
+The client count is ramped in steps. Each step reports HTTP latency percentiles,
+sensor_update delivery lag (server receive -> client), errors and server CPU
+(from /api/status), and is judged healthy against --max-p99-ms, --max-lag-ms
+and --max-error-pct. The highest healthy step is the capacity of this build;
+--history appends the result to a JSON-lines file to track it across releases.
+
+Usage:
+    python load_test.py --spawn                              # start a DEMO_MODE server and ramp 25..400
+    python load_test.py --url http://localhost:5000 --steps 50,100,200 --step-seconds 20
+    python load_test.py --spawn --feed-rate 200 --label v1.4 --history load_history.jsonl
+
+Socket.IO subscribers need `pip install requests websocket-client`.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from latency import percentiles
+
+try:
+    import socketio
+    import requests  # needed by the python-socketio client
+except ImportError:
+    socketio = None
+
+try:
+    import websocket  # websocket-client, lets Socket.IO skip long-polling
+    SOCKET_TRANSPORTS = ['websocket']
+except ImportError:
+    SOCKET_TRANSPORTS = ['polling']
+
+MODES = ['eva', 'mars', 'emergency', 'training']
+
+class Results:
+    """Samples for one ramp step, shared by all client threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.http = {}          # endpoint -> latencies in ms
+        self.requests = 0
+        self.errors = 0
+        self.lag = []           # sensor_update delivery lag in ms
+        self.messages = 0
+
+    def request(self, endpoint, ms, ok):
+        with self.lock:
+            self.requests += 1
+            if ok:
+                self.http.setdefault(endpoint, []).append(ms)
+            else:
+                self.errors += 1
+
+    def message(self, lag_ms):
+        with self.lock:
+            self.messages += 1
+            self.lag.append(lag_ms)
+
+class HttpClient:
+    """Keep-alive HTTP connection, reopened after errors"""
+
+    def __init__(self, url, timeout):
+        parsed = urllib.parse.urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method, path, body=None):
+        """Returns (latency ms, ok)"""
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+class DashboardClient(threading.Thread):
+    """One simulated dashboard: polls or subscribes, plus occasional export/mode actions"""
+
+    def __init__(self, args, subscriber, get_results):
+        super().__init__(daemon=True)
+        self.args = args
+        self.subscriber = subscriber
+        self.get_results = get_results
+        self.stopping = threading.Event()
+        self.http = HttpClient(args.url, args.timeout)
+        self.sio = None
+        self.connect_failed = False
+
+    def run(self):
+        if self.subscriber:
+            self.connect_socket()
+        next_tick = time.time() + random.random()  # spread clients over the second
+        while not self.stopping.is_set():
+            results = self.get_results()
+            if not self.subscriber:
+                ms, ok = self.http.request('GET', '/api/events?limit=5')
+                results.request('events', ms, ok)
+            if random.random() < self.args.export_rate:
+                ms, ok = self.http.request('GET', '/api/export')
+                results.request('export', ms, ok)
+            if random.random() < self.args.mode_rate:
+                ms, ok = self.http.request('POST', '/api/mission_mode', {'mode': random.choice(MODES)})
+                results.request('mission_mode', ms, ok)
+
+            next_tick += 1.0
+            self.stopping.wait(max(0.0, next_tick - time.time()))
+        self.http.close()
+        if self.sio is not None:
+            try:
+                self.sio.disconnect()
+            except Exception:
+                pass
+
+    def connect_socket(self):
+        sio = socketio.Client(reconnection=False)
+
+        @sio.on('sensor_update')
+        def on_update(data):
+            if isinstance(data, dict):
+                trace = data.get('trace') or {}
+                sent = trace.get('received') or data.get('timestamp')
+                if sent:
+                    self.get_results().message(time.time() * 1000 - sent)
+
+        try:
+            sio.connect(self.args.url, transports=SOCKET_TRANSPORTS, wait_timeout=self.args.timeout)
+            self.sio = sio
+        except Exception:
+            self.connect_failed = True
+
+    def stop(self):
+        self.stopping.set()
+
+def feed_readings(args, stop):
+    """Send simulated node readings over UDP so the server has traffic to fan out"""
+    host = urllib.parse.urlparse(args.url).hostname
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    interval = 1.0 / args.feed_rate
+    next_send = time.time()
+    sent = 0
+    while not stop.is_set():
+        timestamp = int(time.time() * 1000)
+        line = (f"load-{sent % args.feed_nodes + 1},{timestamp},{22 + random.uniform(0, 6):.2f},"
+                f"{45 + random.uniform(0, 15):.2f},{random.randint(200, 400)},0,{random.randint(30, 100)}\n")
+        sock.sendto(line.encode(), (host, args.udp_port))
+        sent += 1
+        next_send += interval
+        delay = next_send - time.time()
+        if delay > 0:
+            time.sleep(delay)
+    sock.close()
+
+def server_status(args):
+    client = HttpClient(args.url, args.timeout)
+    try:
+        client.conn = http.client.HTTPConnection(client.host, client.port, timeout=args.timeout)
+        client.conn.request('GET', '/api/status')
+        return json.loads(client.conn.getresponse().read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        client.close()
+
+def spawn_server(args):
+    """Start app.py in DEMO_MODE with throwaway state/mission directories"""
+    workdir = tempfile.mkdtemp(prefix='mars-load-')
+    port = urllib.parse.urlparse(args.url).port or 80
+    env = dict(os.environ, DEMO_MODE='1', DEMO_INTERVAL_S=str(args.demo_interval), PORT=str(port),
+               UDP_INGEST_PORT=str(args.udp_port), TCP_INGEST_PORT='0',
+               STATE_DIR=os.path.join(workdir, 'state'), MISSIONS_DIR=os.path.join(workdir, 'missions'))
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        if server_status(args):
+            return server
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not come up")
+
+# Results of the step being measured; clients read it on every action
+current = [Results()]
+
+def run_step(args, clients, target, step_seconds):
+    """Grow the client pool to `target`, then measure for step_seconds"""
+    while len(clients) < target:
+        client = DashboardClient(args, random.random() < args.socket_share, lambda: current[0])
+        clients.append(client)
+        client.start()
+        time.sleep(args.ramp_delay)
+
+    time.sleep(1.0)  # let the new clients settle before measuring
+    results = Results()
+    current[0] = results
+    before = server_status(args)
+    started = time.time()
+    time.sleep(step_seconds)
+    elapsed = time.time() - started
+    after = server_status(args)
+    return summarize(args, target, results, elapsed, before, after, clients)
+
+def summarize(args, target, results, elapsed, before, after, clients):
+    with results.lock:
+        all_http = [ms for values in results.http.values() for ms in values]
+        endpoints = {endpoint: percentiles(list(values)) for endpoint, values in results.http.items()}
+        lag = percentiles(list(results.lag))
+        requests_made = results.requests
+        errors = results.errors
+        messages = results.messages
+
+    subscribers = sum(1 for client in clients if client.subscriber)
+    connect_failures = sum(1 for client in clients if client.connect_failed)
+    cpu = None
+    emit_drops = None
+    if before and after:
+        cpu_seconds = after['process']['cpu_seconds'] - before['process']['cpu_seconds']
+        cpu = round(cpu_seconds / elapsed * 100, 1)
+        emit_drops = ((after['queues']['emit']['dropped'] - before['queues']['emit']['dropped'])
+                      + (after['queues']['emit']['coalesced'] - before['queues']['emit']['coalesced']))
+
+    overall = percentiles(all_http)
+    error_pct = round(errors / requests_made * 100, 2) if requests_made else 0.0
+    failures = []
+    if after is None:
+        failures.append('server unreachable')
+    if overall and overall['p99'] > args.max_p99_ms:
+        failures.append(f"HTTP p99 {overall['p99']}ms")
+    if lag and lag['p99'] > args.max_lag_ms:
+        failures.append(f"lag p99 {lag['p99']}ms")
+    if error_pct > args.max_error_pct:
+        failures.append(f"errors {error_pct}%")
+    if connect_failures:
+        failures.append(f"{connect_failures} socket connects failed")
+
+    return {
+        'clients': target,
+        'subscribers': subscribers,
+        'requests_per_second': round(requests_made / elapsed, 1),
+        'http_ms': overall,
+        'endpoints_ms': endpoints,
+        'error_pct': error_pct,
+        'messages_per_second': round(messages / elapsed, 1),
+        'delivery_lag_ms': lag,
+        'server_cpu_pct': cpu,
+        'emit_coalesced_or_dropped': emit_drops,
+        'healthy': not failures,
+        'failures': failures,
+    }
+
+def print_step(step):
+    http_ms = step['http_ms'] or {}
+    lag = step['delivery_lag_ms'] or {}
+    verdict = '✅' if step['healthy'] else '❌ ' + ', '.join(step['failures'])
+    print(f"{step['clients']:>5} clients | {step['requests_per_second']:>7} req/s | "
+          f"HTTP p50 {http_ms.get('p50', '-')} p99 {http_ms.get('p99', '-')} ms | "
+          f"lag p50 {lag.get('p50', '-')} p99 {lag.get('p99', '-')} ms | "
+          f"{step['messages_per_second']} msg/s | CPU {step['server_cpu_pct']}% | {verdict}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Ramp simulated dashboard clients against the server')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--spawn', action='store_true', help='start app.py in DEMO_MODE for the run')
+    parser.add_argument('--steps', default='25,50,100,200,400', help='client counts to ramp through')
+    parser.add_argument('--step-seconds', type=float, default=15)
+    parser.add_argument('--ramp-delay', type=float, default=0.01, help='seconds between client starts')
+    parser.add_argument('--socket-share', type=float, default=0.5, help='fraction of clients using Socket.IO')
+    parser.add_argument('--export-rate', type=float, default=0.002, help='chance per client-second of an export')
+    parser.add_argument('--mode-rate', type=float, default=0.001, help='chance per client-second of a mode POST')
+    parser.add_argument('--feed-rate', type=float, default=0, help='readings/s to send over UDP (0 = demo/real data only)')
+    parser.add_argument('--feed-nodes', type=int, default=10)
+    parser.add_argument('--udp-port', type=int, default=5005)
+    parser.add_argument('--demo-interval', type=float, default=0.5, help='DEMO_INTERVAL_S for --spawn')
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--max-p99-ms', type=float, default=1000)
+    parser.add_argument('--max-lag-ms', type=float, default=2000)
+    parser.add_argument('--max-error-pct', type=float, default=1.0)
+    parser.add_argument('--stop-on-failure', action='store_true', help='stop ramping after the first unhealthy step')
+    parser.add_argument('--label', default='', help='release/build label stored with the result')
+    parser.add_argument('--history', help='append the result as one JSON line to this file')
+    args = parser.parse_args()
+
+    print("🏋️ MARS-SENTINEL Load Test")
+    if socketio is None and args.socket_share > 0:
+        print("⚠️ python-socketio client needs `pip install requests websocket-client` - polling clients only")
+        args.socket_share = 0
+
+    server = spawn_server(args) if args.spawn else None
+    status = server_status(args)
+    if not status:
+        print(f"❌ Cannot reach {args.url}/api/status. Start app.py (DEMO_MODE=1) or use --spawn.")
+        return
+    original_mode = status['mode']
+
+    stop_feed = threading.Event()
+    if args.feed_rate > 0:
+        threading.Thread(target=feed_readings, args=(args, stop_feed), daemon=True).start()
+
+    clients = []
+    steps = []
+    try:
+        for target in [int(value) for value in args.steps.split(',')]:
+            step = run_step(args, clients, target, args.step_seconds)
+            steps.append(step)
+            print_step(step)
+            if not step['healthy'] and args.stop_on_failure:
+                break
+    except KeyboardInterrupt:
+        print("\n🛑 Load test stopped by user")
+    finally:
+        for client in clients:
+            client.stop()
+        stop_feed.set()
+        HttpClient(args.url, args.timeout).request('POST', '/api/mission_mode', {'mode': original_mode})
+        if server is not None:
+            server.terminate()
+
+    healthy = [step['clients'] for step in steps if step['healthy']]
+    capacity = max(healthy) if healthy else 0
+    first_failure = next((step['clients'] for step in steps if not step['healthy']), None)
+    print(f"📊 Highest healthy step: {capacity} clients"
+          + (f" (first failure at {first_failure})" if first_failure else ""))
+
+    if args.history:
+        record = {'label': args.label, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'url': args.url,
+                  'capacity_clients': capacity, 'first_failure_clients': first_failure, 'steps': steps}
+        with open(args.history, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+        print(f"📝 Appended result to {args.history}")
+
+if __name__ == "__main__":
+    main()
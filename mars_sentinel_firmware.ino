@@ -32,9 +32,21 @@
 #define DHT_TYPE DHT11
 DHT dht(DHT_PIN, DHT_TYPE);
 
-// Timing
+// Timing - sample interval follows the current status (all settable via serial commands)
 unsigned long lastSensorRead = 0;
-const unsigned long SENSOR_INTERVAL = 200; // 200ms as per PRD
+unsigned long lastReport = 0;
+
+struct Reporting {
+  unsigned long rateOk = 500;      // ms between samples while everything is OK
+  unsigned long rateWarn = 200;    // ... in WARN (200ms as per PRD)
+  unsigned long rateDanger = 100;  // ... in DANGER
+  unsigned long heartbeat = 2000;  // longest gap between reports when nothing changes
+  // Report by exception while OK: a sample is only sent when a value moved at least this far
+  float tempDeadband = 0.3;
+  float humidDeadband = 1.0;
+  int gasDeadband = 10;
+  int distanceDeadband = 3;
+} reporting;
 
 // Thresholds (can be updated via serial commands)
 struct Thresholds {
@@ -53,6 +65,21 @@ struct Thresholds {
 enum SystemStatus { STATUS_OK, STATUS_WARN, STATUS_DANGER };
 SystemStatus currentStatus = STATUS_OK;
 
+// Host-raised status (ALERT command) - keeps sampling fast until it expires
+SystemStatus hostStatus = STATUS_OK;
+unsigned long hostStatusUntil = 0;
+
+// Last values sent, for the deadband comparison
+struct LastReport {
+  bool valid = false;
+  float temperature;
+  float humidity;
+  int gasLevel;
+  int irDetection;
+  long distance;
+  SystemStatus status;
+} lastSent;
+
 void setup() {
   Serial.begin(9600);
   
@@ -81,8 +108,8 @@ void setup() {
 void loop() {
   unsigned long currentTime = millis();
   
-  // Read sensors at specified interval
-  if (currentTime - lastSensorRead >= SENSOR_INTERVAL) {
+  // Read sensors at the interval for the current status
+  if (currentTime - lastSensorRead >= sampleInterval()) {
     readAndProcessSensors();
     lastSensorRead = currentTime;
   }
@@ -93,6 +120,34 @@ void loop() {
   }
 }
 
+SystemStatus effectiveStatus() {
+  if (hostStatus > currentStatus && (long)(hostStatusUntil - millis()) > 0) {
+    return hostStatus;
+  }
+  return currentStatus;
+}
+
+unsigned long sampleInterval() {
+  switch (effectiveStatus()) {
+    case STATUS_DANGER: return reporting.rateDanger;
+    case STATUS_WARN: return reporting.rateWarn;
+    default: return reporting.rateOk;
+  }
+}
+
+bool shouldReport(float temperature, float humidity, int gasLevel, int irDetection, long distance, SystemStatus status) {
+  // Every sample goes out while WARN/DANGER, so the host sees the fast rate and not just the step
+  if (!lastSent.valid || effectiveStatus() != STATUS_OK || millis() - lastReport >= reporting.heartbeat) {
+    return true;
+  }
+  return status != lastSent.status
+      || irDetection != lastSent.irDetection
+      || fabs(temperature - lastSent.temperature) >= reporting.tempDeadband
+      || fabs(humidity - lastSent.humidity) >= reporting.humidDeadband
+      || abs(gasLevel - lastSent.gasLevel) >= reporting.gasDeadband
+      || labs(distance - lastSent.distance) >= reporting.distanceDeadband;
+}
+
 void readAndProcessSensors() {
   // Read all sensors
   float temperature = readTemperature();
@@ -109,6 +164,19 @@ void readAndProcessSensors() {
   updateAlarms(newStatus);
   currentStatus = newStatus;
   
+  // Report by exception while OK - skip samples that did not move past any deadband
+  if (!shouldReport(temperature, humidity, gasLevel, irDetection, distance, newStatus)) {
+    return;
+  }
+  lastSent.valid = true;
+  lastSent.temperature = temperature;
+  lastSent.humidity = humidity;
+  lastSent.gasLevel = gasLevel;
+  lastSent.irDetection = irDetection;
+  lastSent.distance = distance;
+  lastSent.status = newStatus;
+  lastReport = millis();
+  
   // Send data via serial in CSV format
   Serial.print(millis());
   Serial.print(",");
@@ -296,10 +364,42 @@ void processSerialCommand() {
       } else if (parameter == "DIST_DANGER") {
         thresholds.distanceDanger = (int)value;
         Serial.println("OK: DIST_DANGER updated to " + String((int)value));
+      } else if (parameter == "IR_DANGER") {
+        thresholds.irDanger = (int)value;
+        Serial.println("OK: IR_DANGER updated to " + String((int)value));
+      } else if (parameter == "RATE_OK" || parameter == "RATE_WARN" || parameter == "RATE_DANGER"
+                 || parameter == "HEARTBEAT") {
+        unsigned long ms = (unsigned long)max(value, 20.0f);
+        if (parameter == "RATE_OK") reporting.rateOk = ms;
+        else if (parameter == "RATE_WARN") reporting.rateWarn = ms;
+        else if (parameter == "RATE_DANGER") reporting.rateDanger = ms;
+        else reporting.heartbeat = ms;
+        Serial.println("OK: " + parameter + " updated to " + String(ms));
+      } else if (parameter == "DB_TEMP") {
+        reporting.tempDeadband = value;
+        Serial.println("OK: DB_TEMP updated to " + String(value));
+      } else if (parameter == "DB_HUMID") {
+        reporting.humidDeadband = value;
+        Serial.println("OK: DB_HUMID updated to " + String(value));
+      } else if (parameter == "DB_GAS") {
+        reporting.gasDeadband = (int)value;
+        Serial.println("OK: DB_GAS updated to " + String((int)value));
+      } else if (parameter == "DB_DIST") {
+        reporting.distanceDeadband = (int)value;
+        Serial.println("OK: DB_DIST updated to " + String((int)value));
       } else {
         Serial.println("ERROR: Unknown parameter " + parameter);
       }
     }
+  } else if (command.startsWith("ALERT ")) {
+    // Host-side status (rules, anomalies) the local thresholds cannot see
+    // Format: ALERT WARN 5000 - sample at the WARN rate for the next 5 seconds
+    int spaceIndex = command.indexOf(' ', 6);
+    String level = spaceIndex > 0 ? command.substring(6, spaceIndex) : command.substring(6);
+    unsigned long holdMs = spaceIndex > 0 ? command.substring(spaceIndex + 1).toInt() : 0;
+    hostStatus = level == "DANGER" ? STATUS_DANGER : level == "WARN" ? STATUS_WARN : STATUS_OK;
+    hostStatusUntil = millis() + holdMs;
+    Serial.println("OK: ALERT updated to " + level);
   } else if (command == "STATUS") {
     // Return current system status
     Serial.println("System Status: " + String(currentStatus == STATUS_OK ? "OK" : 
@@ -315,11 +415,21 @@ void processSerialCommand() {
     Serial.println("GAS_WARN: " + String(thresholds.gasWarn));
     Serial.println("DIST_WARN: " + String(thresholds.distanceWarn));
     Serial.println("DIST_DANGER: " + String(thresholds.distanceDanger));
+    Serial.println("IR_DANGER: " + String(thresholds.irDanger));
+    Serial.println("RATE_OK/WARN/DANGER: " + String(reporting.rateOk) + "/" + String(reporting.rateWarn)
+                   + "/" + String(reporting.rateDanger) + " ms");
+    Serial.println("HEARTBEAT: " + String(reporting.heartbeat) + " ms");
+    Serial.println("DB_TEMP/HUMID/GAS/DIST: " + String(reporting.tempDeadband) + "/" + String(reporting.humidDeadband)
+                   + "/" + String(reporting.gasDeadband) + "/" + String(reporting.distanceDeadband));
   } else if (command == "HELP") {
     Serial.println("MARS-SENTINEL Commands:");
     Serial.println("SET TEMP_HIGH <value> - Set temperature danger threshold");
     Serial.println("SET TEMP_WARN <value> - Set temperature warning threshold");
     Serial.println("SET GAS_HIGH <value> - Set gas danger threshold");
+    Serial.println("SET RATE_OK|RATE_WARN|RATE_DANGER <ms> - Sample interval per status");
+    Serial.println("SET HEARTBEAT <ms> - Longest gap between reports");
+    Serial.println("SET DB_TEMP|DB_HUMID|DB_GAS|DB_DIST <value> - Report-by-exception deadbands");
+    Serial.println("ALERT OK|WARN|DANGER <ms> - Hold a faster sample rate for a while");
     Serial.println("STATUS - Get current system status");
     Serial.println("THRESHOLDS - Show all thresholds");
     Serial.println("HELP - Show this help");
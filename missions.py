@@ -0,0 +1,190 @@
+"""
+MARS-SENTINEL Mission Sessions
+Start/stop mission sessions, one CSV segment per mission plus a small catalog
+
+Layout under MISSIONS_DIR:
+    catalog.json                      - mission id -> metadata and summary stats
+    MARS-SENTINEL-<date>-<time>.csv   - that mission's readings, in /api/export format
+
+The catalog is held in memory, so listing or opening a mission never touches
+raw data, and a segment file can be handed straight to data_analysis.py.
+
+Segment rows are buffered and flushed every SEGMENT_FLUSH_S, not per reading -
+the WAL is what makes a reading durable. Readers of a running mission's
+segment call `flush()` first.
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+MISSIONS_DIR = os.environ.get('MISSIONS_DIR', 'missions')
+CATALOG_FILE = 'catalog.json'
+CATALOG_SAVE_EVERY = 100  # readings between catalog checkpoints while a mission runs
+SEGMENT_FLUSH_S = 1.0     # longest a written row sits in the segment's buffer
+
+SEGMENT_HEADER = [
+    'timestamp', 'temperature', 'humidity', 'gas_level',
+    'ir_detection', 'distance', 'status', 'alarms', 'mode', 'device_id'
+]
+ALARMS_COLUMN = SEGMENT_HEADER.index('alarms')
+SUMMARY_SENSORS = ('temperature', 'humidity', 'gas_level', 'distance')
+
+class MissionManager:
+    """Tracks the active mission and the catalog of past ones"""
+
+    def __init__(self, directory=MISSIONS_DIR):
+        self.directory = directory
+        self.catalog = {}
+        self.active = None       # metadata dict of the running mission
+        self.segment = None      # open file handle of the running mission
+        self.writer = None
+        self.flushed_at = 0.0    # monotonic time of the last segment flush
+        self.lock = threading.Lock()
+        self.on_start = []       # callbacks(mission) run when a mission starts
+        self.on_stop = []        # callbacks(mission) run when a mission stops
+        self.load_catalog()
+
+    def catalog_path(self):
+        return os.path.join(self.directory, CATALOG_FILE)
+
+    def segment_path(self, mission_id):
+        return os.path.join(self.directory, self.catalog[mission_id]['segment'])
+
+    def load_catalog(self):
+        try:
+            with open(self.catalog_path(), 'r') as file:
+                self.catalog = json.load(file)
+        except FileNotFoundError:
+            self.catalog = {}
+        except ValueError as e:
+            print(f"⚠️ Mission catalog unreadable, starting empty: {e}")
+            self.catalog = {}
+        # A mission left open by a crash is closed at its last recorded reading
+        for mission in self.catalog.values():
+            if mission['end'] is None:
+                mission['end'] = mission['last_timestamp'] or mission['start']
+                mission['interrupted'] = True
+
+    def save_catalog(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.catalog_path() + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(self.catalog, file, indent=2)
+        os.replace(temp_path, self.catalog_path())
+
+    def start(self, mode):
+        """Close any running mission and open a new one"""
+        with self.lock:
+            if self.active:
+                self._stop_locked()
+
+            mission_id = f"MARS-SENTINEL-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            suffix = 1
+            while mission_id in self.catalog:
+                suffix += 1
+                mission_id = f"MARS-SENTINEL-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+
+            os.makedirs(self.directory, exist_ok=True)
+            mission = {
+                'mission_id': mission_id,
+                'segment': f'{mission_id}.csv',
+                'mode': mode,
+                'start': int(time.time() * 1000),
+                'end': None,
+                'last_timestamp': None,
+                'count': 0,
+                'bytes': 0,
+                'status_counts': {},
+                'alarm_counts': {},
+                'stats': {},
+            }
+            self.segment = open(os.path.join(self.directory, mission['segment']), 'w', newline='')
+            self.writer = csv.writer(self.segment)
+            self.writer.writerow(SEGMENT_HEADER)
+            self.catalog[mission_id] = mission
+            self.active = mission
+            self.save_catalog()
+
+        for callback in self.on_start:
+            callback(mission)
+        return mission
+
+    def stop(self):
+        """Close the running mission, if any"""
+        with self.lock:
+            if not self.active:
+                return None
+            mission = self._stop_locked()
+        for callback in self.on_stop:
+            callback(mission)
+        return mission
+
+    def _stop_locked(self):
+        mission = self.active
+        mission['end'] = int(time.time() * 1000)
+        self.segment.close()
+        mission['bytes'] = os.path.getsize(os.path.join(self.directory, mission['segment']))
+        self.segment = self.writer = None
+        self.active = None
+        self.save_catalog()
+        return mission
+
+    def record(self, event):
+        """Append a Reading to the running mission and fold it into the summary"""
+        with self.lock:
+            mission = self.active
+            if not mission:
+                return
+            row = event.csv_row()
+            self.writer.writerow(row)
+            now = time.monotonic()
+            if now - self.flushed_at >= SEGMENT_FLUSH_S:
+                self.segment.flush()
+                self.flushed_at = now
+
+            mission['count'] += 1
+            mission['last_timestamp'] = event.timestamp
+            status_counts = mission['status_counts']
+            status_counts[event.status] = status_counts.get(event.status, 0) + 1
+            alarm_counts = mission['alarm_counts']
+            if row[ALARMS_COLUMN]:
+                for alarm in row[ALARMS_COLUMN].split('|'):
+                    alarm_counts[alarm] = alarm_counts.get(alarm, 0) + 1
+
+            stats = mission['stats']
+            for sensor in SUMMARY_SENSORS:
+                value = getattr(event, sensor)
+                summary = stats.get(sensor)
+                if summary is None:
+                    stats[sensor] = {'min': value, 'max': value, 'sum': value, 'mean': value}
+                    continue
+                if value < summary['min']:
+                    summary['min'] = value
+                if value > summary['max']:
+                    summary['max'] = value
+                summary['sum'] += value
+                summary['mean'] = round(summary['sum'] / mission['count'], 2)
+
+            if mission['count'] % CATALOG_SAVE_EVERY == 0:
+                mission['bytes'] = self.segment.tell()
+                self.save_catalog()
+
+    def flush(self, mission_id=None):
+        """Push buffered rows of the running mission (or only if it is `mission_id`) to its file"""
+        with self.lock:
+            if self.active and mission_id in (None, self.active['mission_id']):
+                self.segment.flush()
+                self.flushed_at = time.monotonic()
+
+    def list_missions(self):
+        return sorted(self.catalog.values(), key=lambda mission: mission['start'], reverse=True)
+
+    def get(self, mission_id):
+        return self.catalog.get(mission_id)
+
+    def current_id(self):
+        return self.active['mission_id'] if self.active else None
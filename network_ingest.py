@@ -0,0 +1,190 @@
+"""
+MARS-SENTINEL Network Ingest
+UDP and TCP listeners for Wi-Fi sensor nodes speaking the serial line format
+
+Nodes send the same `timestamp,temp,humidity,gas,ir,distance` lines as the
+USB board, one per line. A line may start with an explicit device id
+(`suit-3,timestamp,temp,...`); otherwise the device id is derived from the
+sender's address (`node-<ip>`). Ids reserved for local sources (the USB
+board's `local`) or not matching DEVICE_ID_PATTERN are rejected, so a network
+peer can never pose as the serial suit.
+
+Both listeners are off unless a port is configured, and bind to 127.0.0.1
+unless NETWORK_HOST says otherwise - the lines are not authenticated, so
+exposing them to a network is an explicit decision.
+
+One thread runs a selector over the UDP socket, the TCP listener and every TCP
+connection. Sockets are non-blocking and each wakeup drains everything that is
+ready: up to UDP_DRAIN_MAX datagrams, and every complete line buffered on a
+connection. Lines go onto the same ingest queue as the serial reader, as
+(line, received_ms, device_id), so parsing, evaluation, storage and emit are
+shared.
+"""
+
+import os
+import re
+import selectors
+import socket
+import time
+
+NETWORK_HOST = os.environ.get('NETWORK_HOST', '127.0.0.1')   # 0.0.0.0 to accept Wi-Fi nodes
+UDP_PORT = int(os.environ.get('UDP_INGEST_PORT', 0))   # opt-in, e.g. 5005; 0 disables
+TCP_PORT = int(os.environ.get('TCP_INGEST_PORT', 0))   # opt-in, e.g. 5006; 0 disables
+DEVICE_ID_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+UDP_DRAIN_MAX = 512             # datagrams read per wakeup before checking other sockets
+UDP_RECV_BUFFER = 4 * 1024 * 1024
+DATAGRAM_SIZE = 2048
+MAX_LINE_BYTES = 4096           # a TCP peer sending longer lines is disconnected
+TCP_READ_SIZE = 65536
+
+def split_device_id(line):
+    """Return (device_id or None, line without the id prefix)"""
+    head, sep, rest = line.partition(',')
+    if sep and head and not head.lstrip('-').replace('.', '', 1).isdigit():
+        return head.strip(), rest
+    return None, line
+
+class NetworkIngest:
+    """Selector loop feeding UDP datagrams and TCP line streams to a line sink"""
+
+    def __init__(self, sink, host=NETWORK_HOST, udp_port=UDP_PORT, tcp_port=TCP_PORT, reserved_ids=()):
+        self.sink = sink            # callable(line, received_ms, device_id)
+        self.reserved_ids = frozenset(reserved_ids)   # ids only local sources may use
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.selector = selectors.DefaultSelector()
+        self.udp = None
+        self.tcp = None
+        self.buffers = {}           # TCP socket -> bytearray of the partial line
+        self.peers = {}             # TCP socket -> default device id
+        self.running = False
+        self.stats = {'datagrams': 0, 'tcp_bytes': 0, 'lines': 0, 'wakeups': 0, 'max_drain': 0,
+                      'connections': 0, 'open_connections': 0, 'rejected': 0, 'rejected_ids': 0,
+                      'errors': 0}
+
+    def bind(self):
+        """Open the configured sockets; returns the bound (udp_port, tcp_port)"""
+        if self.udp_port:
+            self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                self.udp.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECV_BUFFER)
+            except OSError:
+                pass  # the kernel caps it, the default still works
+            self.udp.bind((self.host, self.udp_port))
+            self.udp.setblocking(False)
+            self.selector.register(self.udp, selectors.EVENT_READ, self.read_udp)
+            self.udp_port = self.udp.getsockname()[1]
+        if self.tcp_port:
+            self.tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.tcp.bind((self.host, self.tcp_port))
+            self.tcp.listen(128)
+            self.tcp.setblocking(False)
+            self.selector.register(self.tcp, selectors.EVENT_READ, self.accept_tcp)
+            self.tcp_port = self.tcp.getsockname()[1]
+        return self.udp_port, self.tcp_port
+
+    def run(self):
+        """Run forever on a daemon thread"""
+        if self.udp is None and self.tcp is None:
+            self.bind()
+        self.running = True
+        while self.running:
+            for key, _events in self.selector.select(timeout=1.0):
+                self.stats['wakeups'] += 1
+                try:
+                    key.data(key.fileobj)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"Network ingest error: {e}")
+
+    def read_udp(self, sock):
+        received = time.time() * 1000
+        count = 0
+        while count < UDP_DRAIN_MAX:
+            try:
+                data, address = sock.recvfrom(DATAGRAM_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            count += 1
+            self.feed(data, f'node-{address[0]}', received)
+        self.stats['datagrams'] += count
+        if count > self.stats['max_drain']:
+            self.stats['max_drain'] = count
+
+    def accept_tcp(self, listener):
+        while True:
+            try:
+                conn, address = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            conn.setblocking(False)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.buffers[conn] = bytearray()
+            self.peers[conn] = f'node-{address[0]}'
+            self.selector.register(conn, selectors.EVENT_READ, self.read_tcp)
+            self.stats['connections'] += 1
+            self.stats['open_connections'] += 1
+
+    def read_tcp(self, conn):
+        received = time.time() * 1000
+        buffer = self.buffers[conn]
+        while True:
+            try:
+                chunk = conn.recv(TCP_READ_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                chunk = b''
+            if not chunk:
+                self.close_tcp(conn)
+                return
+            self.stats['tcp_bytes'] += len(chunk)
+            buffer += chunk
+            if len(chunk) < TCP_READ_SIZE:
+                break
+
+        end = buffer.rfind(b'\n')
+        if end >= 0:
+            self.feed(bytes(buffer[:end]), self.peers[conn], received)
+            del buffer[:end + 1]
+        if len(buffer) > MAX_LINE_BYTES:
+            self.stats['rejected'] += 1
+            self.close_tcp(conn)
+
+    def close_tcp(self, conn):
+        self.selector.unregister(conn)
+        self.buffers.pop(conn, None)
+        self.peers.pop(conn, None)
+        conn.close()
+        self.stats['open_connections'] -= 1
+
+    def feed(self, data, default_device, received):
+        """Split a datagram or stream chunk into lines and hand them to the sink"""
+        for raw_line in data.split(b'\n'):
+            line = raw_line.decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            device_id, line = split_device_id(line)
+            if device_id is not None and (device_id in self.reserved_ids
+                                          or not DEVICE_ID_PATTERN.match(device_id)):
+                self.stats['rejected_ids'] += 1
+                continue
+            self.sink(line, received, device_id or default_device)
+            self.stats['lines'] += 1
+
+    def stop(self):
+        self.running = False
+        for conn in list(self.buffers):
+            self.close_tcp(conn)
+        for sock in (self.udp, self.tcp):
+            if sock is not None:
+                self.selector.unregister(sock)
+                sock.close()
+        self.udp = self.tcp = None
+
+    def status(self):
+        return dict(self.stats, udp_port=self.udp_port if self.udp else None,
+                    tcp_port=self.tcp_port if self.tcp else None)
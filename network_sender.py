@@ -0,0 +1,86 @@
+"""
+MARS-SENTINEL Network Sender
+Simulates a fleet of Wi-Fi sensor nodes sending readings over UDP or TCP
+
+Usage:
+    python network_sender.py                         # 5 nodes, UDP, 5 Hz each, to localhost
+    python network_sender.py --tcp --nodes 20 --rate 50
+    python network_sender.py --nodes 100 --rate 50 --duration 10   # ~5000 packets/s
+"""
+
+import argparse
+import socket
+import time
+from test_simulator import simulate_sensor_data
+
+def open_node_sockets(args):
+    """One socket per node, so TCP nodes each have their own stream"""
+    sockets = []
+    for _ in range(args.nodes):
+        if args.tcp:
+            sock = socket.create_connection((args.host, args.tcp_port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sockets.append(sock)
+    return sockets
+
+def main():
+    parser = argparse.ArgumentParser(description='Send simulated node readings to the network ingest listeners')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--udp-port', type=int, default=5005)
+    parser.add_argument('--tcp-port', type=int, default=5006)
+    parser.add_argument('--tcp', action='store_true', help='use TCP line streams instead of UDP datagrams')
+    parser.add_argument('--nodes', type=int, default=5)
+    parser.add_argument('--rate', type=float, default=5, help='readings per second per node')
+    parser.add_argument('--duration', type=float, default=0, help='seconds to run (0 = until Ctrl+C)')
+    args = parser.parse_args()
+
+    print("📶 MARS-SENTINEL Network Sender")
+    transport = 'TCP' if args.tcp else 'UDP'
+    port = args.tcp_port if args.tcp else args.udp_port
+    print(f"Sending {args.nodes} nodes x {args.rate} Hz over {transport} to {args.host}:{port}")
+    print("Press Ctrl+C to stop")
+
+    try:
+        sockets = open_node_sockets(args)
+    except OSError as e:
+        print(f"❌ Could not connect: {e}")
+        print("Make sure app.py is running with network ingest enabled")
+        return
+
+    interval = 1.0 / args.rate
+    started = time.time()
+    next_send = started
+    sent = 0
+    try:
+        while not args.duration or time.time() - started < args.duration:
+            for node, sock in enumerate(sockets):
+                line = f"sim-{node + 1},{simulate_sensor_data()}\n".encode()
+                if args.tcp:
+                    sock.sendall(line)
+                else:
+                    sock.sendto(line, (args.host, port))
+                sent += 1
+
+            next_send += interval
+            delay = next_send - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+            if sent % (args.nodes * max(1, int(args.rate))) < args.nodes:
+                elapsed = time.time() - started
+                print(f"Sent {sent} readings ({sent / elapsed:.0f}/s)")
+    except KeyboardInterrupt:
+        print("\n🛑 Sender stopped by user")
+    except OSError as e:
+        print(f"❌ Network error: {e}")
+    finally:
+        for sock in sockets:
+            sock.close()
+
+    elapsed = time.time() - started
+    print(f"✓ Sent {sent} readings in {elapsed:.1f}s ({sent / elapsed:.0f}/s)")
+
+if __name__ == "__main__":
+    main()
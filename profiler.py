@@ -0,0 +1,144 @@
+"""
+MARS-SENTINEL Sampling Profiler
+On-demand wall-clock stack sampling across all threads, for diagnosing stalls live
+
+Nothing runs until a capture is requested. A capture starts one daemon thread
+that reads sys._current_frames() every interval for the requested seconds,
+counting identical stacks. Results come back as collapsed stacks (one
+`thread;outer;...;leaf count` line per stack, the input format of
+flamegraph.pl and speedscope) and as per-function self/total times.
+
+Samples are wall-clock: a thread blocked in readline() or a queue wait shows
+up where it waits, which is what an ingest stall looks like. Green threads
+under eventlet share one OS thread and appear as whatever is running on it.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_SECONDS = 5
+MAX_SECONDS = 60
+DEFAULT_INTERVAL_MS = 5
+MIN_INTERVAL_MS = 1
+TOP_FUNCTIONS = 50
+
+class ProfilerBusy(RuntimeError):
+    """A capture is already running"""
+
+class Capture:
+    """One sampling run; `done` is set when the samples are in"""
+
+    def __init__(self, seconds, interval_ms):
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()     # (thread name, (code, ...) leaf last) -> samples
+        self.samples = 0
+        self.elapsed = 0.0
+        self.sampling_seconds = 0.0
+        self.done = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        names = {}
+        started = time.perf_counter()
+        deadline = started + self.seconds
+        next_sample = started
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if self.samples % 100 == 0:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    codes = []
+                    while frame is not None:
+                        codes.append(frame.f_code)
+                        frame = frame.f_back
+                    codes.reverse()
+                    self.stacks[(names.get(ident, f'thread-{ident}'), tuple(codes))] += 1
+                self.samples += 1
+                self.sampling_seconds += time.perf_counter() - now
+
+                next_sample += self.interval
+                delay = next_sample - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_sample = time.perf_counter()  # fell behind, do not burst
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self.done.set()
+
+    def sample_ms(self):
+        """Wall time one sample stands for"""
+        return self.elapsed * 1000 / self.samples if self.samples else 0.0
+
+    def collapsed(self):
+        """Collapsed-stack text for flamegraph.pl / speedscope"""
+        lines = []
+        for (thread_name, codes), count in self.stacks.most_common():
+            frames = [thread_name.replace(';', ':')] + [frame_label(code) for code in codes]
+            lines.append(f"{';'.join(frames)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def functions(self, limit=TOP_FUNCTIONS):
+        """Per-function self time (leaf samples) and total time (samples on the stack)"""
+        own_time = Counter()
+        total_time = Counter()
+        for (_thread_name, codes), count in self.stacks.items():
+            if not codes:
+                continue
+            own_time[codes[-1]] += count
+            for code in set(codes):
+                total_time[code] += count
+        sample_ms = self.sample_ms()
+        ranked = sorted(total_time, key=lambda code: (own_time[code], total_time[code]), reverse=True)
+        return [{
+            'function': frame_label(code),
+            'self_ms': round(own_time[code] * sample_ms, 1),
+            'total_ms': round(total_time[code] * sample_ms, 1),
+            'self_samples': own_time[code],
+            'total_samples': total_time[code],
+        } for code in ranked[:limit]]
+
+    def threads(self):
+        per_thread = Counter()
+        for (thread_name, _codes), count in self.stacks.items():
+            per_thread[thread_name] += count
+        return dict(per_thread.most_common())
+
+    def summary(self):
+        return {
+            'seconds': round(self.elapsed, 3),
+            'samples': self.samples,
+            'interval_ms': round(self.sample_ms(), 2),
+            'overhead_pct': round(self.sampling_seconds / self.elapsed * 100, 2) if self.elapsed else 0.0,
+            'threads': self.threads(),
+            'functions': self.functions(),
+        }
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Runs at most one capture at a time"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = None
+
+    def start(self, seconds=DEFAULT_SECONDS, interval_ms=DEFAULT_INTERVAL_MS):
+        seconds = min(max(float(seconds), 0.1), MAX_SECONDS)
+        interval_ms = max(float(interval_ms), MIN_INTERVAL_MS)
+        with self.lock:
+            if self.current is not None and not self.current.done.is_set():
+                raise ProfilerBusy("A profile is already being captured")
+            capture = self.current = Capture(seconds, interval_ms)
+        threading.Thread(target=capture.run, name='profiler', daemon=True).start()
+        return capture
@@ -0,0 +1,146 @@
+"""
+MARS-SENTINEL Readings
+One slotted record per sensor reading, from parse to storage
+
+A Reading carries its alarms as an integer bitmask over wire_format.ALARM_CODES
+and its pipeline timestamps as plain fields, so a reading costs one small
+object instead of a dict plus an alarm list, a raw dict and a trace dict.
+Alarm names and the legacy packet dict are only built at the edges:
+JSON for dashboards, CSV export and mission segments.
+
+Rows (`to_row`/`from_row`) are the compact persisted form used by the WAL.
+"""
+
+from wire_format import STATIC_ALARM_MASK, alarm_mask, alarms_from_mask, channels_from_mask
+
+ROW_VERSION = 1
+
+class Reading:
+    """A sensor reading as it flows through the pipeline"""
+
+    __slots__ = (
+        'timestamp', 'device_id', 'temperature', 'humidity', 'gas_level', 'ir_detection', 'distance',
+        'status', 'alarm_mask', 'mode', 'connected', 'mission_id',
+        'raw_temperature', 'raw_humidity', 'raw_distance', 'device_timestamp',
+        'sample_ms', 'received_ms', 'parsed_ms', 'evaluated_ms', 'forecast', 'seq',
+        'quality_mask',
+    )
+
+    def __init__(self, timestamp, device_id, temperature, humidity, gas_level, ir_detection, distance,
+                 status='OK', alarm_mask=0, mode='eva', connected=True, mission_id=None,
+                 raw_temperature=None, raw_humidity=None, raw_distance=None, device_timestamp=None,
+                 sample_ms=None, received_ms=None, parsed_ms=None, evaluated_ms=None, forecast=None, seq=None,
+                 quality_mask=0):
+        self.timestamp = timestamp
+        self.device_id = device_id
+        self.temperature = temperature
+        self.humidity = humidity
+        self.gas_level = gas_level
+        self.ir_detection = ir_detection
+        self.distance = distance
+        self.status = status
+        self.alarm_mask = alarm_mask
+        self.mode = mode
+        self.connected = connected
+        self.mission_id = mission_id
+        self.raw_temperature = raw_temperature
+        self.raw_humidity = raw_humidity
+        self.raw_distance = raw_distance
+        self.device_timestamp = device_timestamp
+        self.sample_ms = sample_ms
+        self.received_ms = received_ms
+        self.parsed_ms = parsed_ms
+        self.evaluated_ms = evaluated_ms
+        self.forecast = forecast
+        self.seq = seq              # publish order, set when stored - not persisted
+        self.quality_mask = quality_mask  # suspect channels (wire_format.QUALITY_BITS) - not persisted
+
+    @property
+    def alarms(self):
+        """Alarm names, in code-table order"""
+        return alarms_from_mask(self.alarm_mask)
+
+    @property
+    def suspect_channels(self):
+        """Channels whose value is not a trustworthy measurement on this reading"""
+        return channels_from_mask(self.quality_mask) if self.quality_mask else []
+
+    def trace(self):
+        """Pipeline timestamps in the latency tracker's trace shape"""
+        return {'sample': self.sample_ms, 'received': self.received_ms,
+                'parsed': self.parsed_ms, 'evaluated': self.evaluated_ms}
+
+    def copy(self, **changes):
+        reading = Reading.__new__(Reading)
+        for field in Reading.__slots__:
+            setattr(reading, field, changes.get(field, getattr(self, field)))
+        return reading
+
+    def to_dict(self):
+        """The legacy packet dict sent to JSON clients"""
+        packet = {
+            'timestamp': self.timestamp,
+            'device_id': self.device_id,
+            'temperature': self.temperature,
+            'humidity': self.humidity,
+            'gas_level': self.gas_level,
+            'ir_detection': self.ir_detection,
+            'distance': self.distance,
+            'status': self.status,
+            'alarms': alarms_from_mask(self.alarm_mask),
+            'mode': self.mode,
+            'connected': self.connected,
+            'raw': {'temperature': self.raw_temperature, 'humidity': self.raw_humidity,
+                    'distance': self.raw_distance},
+            'device_timestamp': self.device_timestamp,
+            'trace': self.trace(),
+            'forecast': self.forecast or {},
+            'seq': self.seq,
+            'quality': self.suspect_channels,
+        }
+        if self.mission_id:
+            packet['mission_id'] = self.mission_id
+        return packet
+
+    def csv_row(self):
+        """Row in the export / mission segment CSV layout"""
+        return [self.timestamp, self.temperature, self.humidity, self.gas_level, self.ir_detection,
+                self.distance, self.status, '|'.join(alarms_from_mask(self.alarm_mask)), self.mode,
+                self.device_id]
+
+    def to_row(self):
+        """Compact list for the WAL - fixed alarm codes as a mask, runtime-registered ones by name"""
+        extra = self.alarm_mask & ~STATIC_ALARM_MASK
+        return [ROW_VERSION, self.timestamp, self.device_id, self.temperature, self.humidity,
+                self.gas_level, self.ir_detection, self.distance, self.status,
+                self.alarm_mask & STATIC_ALARM_MASK, alarms_from_mask(extra) if extra else None,
+                self.mode, self.connected, self.mission_id, self.raw_temperature, self.raw_humidity,
+                self.raw_distance, self.device_timestamp, self.forecast]
+
+    @classmethod
+    def from_row(cls, row):
+        (_version, timestamp, device_id, temperature, humidity, gas_level, ir_detection, distance,
+         status, mask, extra, mode, connected, mission_id, raw_temperature, raw_humidity,
+         raw_distance, device_timestamp, forecast) = row
+        if extra:
+            mask |= alarm_mask(extra)
+        return cls(timestamp, device_id, temperature, humidity, gas_level, ir_detection, distance,
+                   status, mask, mode, connected, mission_id, raw_temperature, raw_humidity,
+                   raw_distance, device_timestamp, forecast=forecast)
+
+    @classmethod
+    def from_dict(cls, packet):
+        """Rebuild from a legacy packet dict (WAL records written before rows existed)"""
+        raw = packet.get('raw') or {}
+        trace = packet.get('trace') or {}
+        return cls(packet.get('timestamp', 0), packet.get('device_id', 'local'), packet.get('temperature', 0),
+                   packet.get('humidity', 0), packet.get('gas_level', 0), packet.get('ir_detection', 0),
+                   packet.get('distance', 0), packet.get('status', 'OK'), alarm_mask(packet.get('alarms', [])),
+                   packet.get('mode', 'eva'), packet.get('connected', False), packet.get('mission_id'),
+                   raw.get('temperature'), raw.get('humidity'), raw.get('distance'),
+                   packet.get('device_timestamp'), trace.get('sample'), trace.get('received'),
+                   trace.get('parsed'), trace.get('evaluated'), packet.get('forecast'))
+
+def from_record(record):
+    """Reading from a persisted row or legacy dict"""
+    return Reading.from_dict(record) if isinstance(record, dict) else Reading.from_row(record)
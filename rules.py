@@ -0,0 +1,405 @@
+"""
+MARS-SENTINEL Alarm Rules
+Declarative alarm rules compiled once into closures and evaluated per reading
+
+Rule text:
+    gas > 500 for 3s AND distance < 30
+    temperature rising > 2 °C/10 s
+    humidity > humidity_warn OR (ir >= 1 AND NOT distance > 100)
+
+A condition compares a field with a number or a threshold name (looked up in
+the live thresholds on every reading, so threshold edits apply immediately).
+`for N s` makes it hold only after being true continuously for N seconds;
+`rising`/`falling` compare the change since the oldest reading of the last N
+seconds (no change is seen across a gap longer than N seconds). Conditions
+combine with AND, OR, NOT and parentheses. Units after numbers are ignored.
+
+Rule sets are per mission mode, plus `all` for rules that apply in every mode.
+Stateful conditions keep incremental per-device state (a start time, or a
+short window of samples), and are always evaluated so AND/OR short-circuiting
+cannot leave that state stale.
+"""
+
+import operator
+import re
+import time
+from collections import deque
+
+from wire_format import alarm_bit
+
+# Rule field name -> Reading attribute
+FIELDS = {
+    'temperature': 'temperature',
+    'temp': 'temperature',
+    'humidity': 'humidity',
+    'gas': 'gas_level',
+    'gas_level': 'gas_level',
+    'ir': 'ir_detection',
+    'ir_detection': 'ir_detection',
+    'distance': 'distance',
+}
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'sec': 1, 'secs': 1, 'seconds': 1,
+                  'm': 60, 'min': 60, 'mins': 60, 'minutes': 60}
+VALUE_UNITS = {'°c', 'c', 'degc', '%', 'ppm', 'cm'}
+SEVERITIES = ('WARN', 'DANGER')
+RULE_SCOPES = ('all', 'eva', 'mars', 'emergency', 'training')
+
+# Shipped defaults - names are also in wire_format.ALARM_CODES so they get alarm bits
+DEFAULT_RULES = {
+    'all': [
+        {'name': 'Sustained Gas Exposure', 'when': 'gas > gas_warn for 10s', 'severity': 'WARN'},
+        {'name': 'Rapid Temperature Rise', 'when': 'temperature rising > 3 °C/10 s', 'severity': 'WARN'},
+    ],
+    'mars': [],
+    'eva': [],
+    'emergency': [],
+    'training': [],
+}
+
+TOKEN = re.compile(r"\s*(?:(\d+(?:\.\d+)?)|(>=|<=|==|!=|>|<|\(|\)|/)|([A-Za-z_°%][A-Za-z_0-9°%]*))")
+
+class RuleError(ValueError):
+    """Rule text or rule set that cannot be compiled"""
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise RuleError(f"Unexpected character at {position}: {text[position:position + 10]!r}")
+        number, symbol, word = match.groups()
+        if number is not None:
+            tokens.append(('number', float(number)))
+        elif symbol is not None:
+            tokens.append(('symbol', symbol))
+        else:
+            tokens.append(('word', word.lower()))
+        position = match.end()
+    return tokens
+
+class Parser:
+    """Recursive-descent parser producing nested tuples:
+    ('or', [...]) ('and', [...]) ('not', node)
+    ('compare', key, op, value) ('for', node, seconds) ('change', key, sign, op, limit, seconds)
+    value is a float or ('threshold', name)
+    """
+
+    def __init__(self, text, threshold_names):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.threshold_names = threshold_names
+
+    def parse(self):
+        if not self.tokens:
+            raise RuleError("Empty rule")
+        node = self.expression()
+        if self.position < len(self.tokens):
+            raise RuleError(f"Unexpected {self.peek()[1]!r} in {self.text!r}")
+        return node
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.position += 1
+            return True
+        return False
+
+    def expect_number(self, what):
+        kind, value = self.take()
+        if kind != 'number':
+            raise RuleError(f"Expected {what} in {self.text!r}")
+        return value
+
+    def expression(self):
+        terms = [self.term()]
+        while self.accept('word', 'or'):
+            terms.append(self.term())
+        return terms[0] if len(terms) == 1 else ('or', terms)
+
+    def term(self):
+        factors = [self.factor()]
+        while self.accept('word', 'and'):
+            factors.append(self.factor())
+        return factors[0] if len(factors) == 1 else ('and', factors)
+
+    def factor(self):
+        if self.accept('word', 'not'):
+            return ('not', self.factor())
+        if self.accept('symbol', '('):
+            node = self.expression()
+            if not self.accept('symbol', ')'):
+                raise RuleError(f"Missing ')' in {self.text!r}")
+            return self.duration_suffix(node)
+        return self.duration_suffix(self.condition())
+
+    def condition(self):
+        kind, field = self.take()
+        if kind != 'word' or field not in FIELDS:
+            raise RuleError(f"Unknown field {field!r} in {self.text!r}")
+        key = FIELDS[field]
+
+        if self.peek() in (('word', 'rising'), ('word', 'falling')):
+            sign = 1 if self.take()[1] == 'rising' else -1
+            op = self.take()[1] if self.peek()[1] in OPERATORS else '>'
+            limit = self.expect_number('a change amount')
+            self.skip_units()
+            if not (self.accept('symbol', '/') or self.accept('word', 'per')):
+                raise RuleError(f"Expected 'per <seconds>' after the change in {self.text!r}")
+            return ('change', key, sign, op, limit, self.duration())
+
+        kind, op = self.take()
+        if op not in OPERATORS:
+            raise RuleError(f"Expected a comparison after {field!r} in {self.text!r}")
+        kind, value = self.take()
+        if kind == 'number':
+            self.skip_units()
+        elif kind == 'word' and value in self.threshold_names:
+            value = ('threshold', value)
+        else:
+            raise RuleError(f"Expected a number or threshold name after {op!r} in {self.text!r}")
+        return ('compare', key, op, value)
+
+    def duration_suffix(self, node):
+        if self.accept('word', 'for'):
+            return ('for', node, self.duration())
+        return node
+
+    def duration(self):
+        seconds = self.expect_number('a duration')
+        kind, unit = self.peek()
+        if kind == 'word' and unit in DURATION_UNITS:
+            self.position += 1
+            seconds *= DURATION_UNITS[unit]
+        if seconds <= 0:
+            raise RuleError(f"Duration must be positive in {self.text!r}")
+        return seconds
+
+    def skip_units(self):
+        while self.peek()[0] == 'word' and self.peek()[1] in VALUE_UNITS:
+            self.position += 1
+
+class Compiler:
+    """Turns a parsed rule into a check(reading, now_seconds, device_id) closure"""
+
+    def __init__(self, get_thresholds):
+        self.get_thresholds = get_thresholds
+        self.states = []   # per-device state dicts, cleared on reset
+
+    def compile(self, node):
+        """Returns (check, stateful)"""
+        kind = node[0]
+        if kind == 'compare':
+            return self.compare(*node[1:]), False
+        if kind == 'for':
+            return self.duration(*node[1:]), True
+        if kind == 'change':
+            return self.change(*node[1:]), True
+        if kind == 'not':
+            inner, stateful = self.compile(node[1])
+            return (lambda data, now, device: not inner(data, now, device)), stateful
+        return self.combine(kind, [self.compile(child) for child in node[1]])
+
+    def compare(self, key, op, value):
+        compare = OPERATORS[op]
+        field = operator.attrgetter(key)
+        if isinstance(value, tuple):
+            name = value[1]
+            get_thresholds = self.get_thresholds
+            return lambda data, now, device: compare(field(data), get_thresholds()[name])
+        return lambda data, now, device: compare(field(data), value)
+
+    def duration(self, node, seconds):
+        inner, _ = self.compile(node)
+        since = {}
+        self.states.append(since)
+
+        def check(data, now, device):
+            if inner(data, now, device):
+                started = since.get(device)
+                if started is None or now < started:
+                    since[device] = started = now
+                return now - started >= seconds
+            since.pop(device, None)
+            return False
+        return check
+
+    def change(self, key, sign, op, limit, seconds):
+        compare = OPERATORS[op]
+        field = operator.attrgetter(key)
+        histories = {}
+        self.states.append(histories)
+
+        def check(data, now, device):
+            history = histories.get(device)
+            if history is None:
+                history = histories[device] = deque()
+            elif history and now < history[-1][0]:
+                history.clear()  # clock went backwards
+            value = field(data)
+            history.append((now, value))
+            # The baseline is the oldest sample inside the window - after a gap in the
+            # readings an older one would stretch the change over far more than `seconds`
+            while now - history[0][0] > seconds:
+                history.popleft()
+            return compare((value - history[0][1]) * sign, limit)
+        return check
+
+    def combine(self, kind, children):
+        stateful = [check for check, is_stateful in children if is_stateful]
+        stateless = [check for check, is_stateful in children if not is_stateful]
+        if kind == 'and':
+            def check(data, now, device):
+                result = True
+                for child in stateful:
+                    if not child(data, now, device):
+                        result = False
+                if not result:
+                    return False
+                for child in stateless:
+                    if not child(data, now, device):
+                        return False
+                return True
+        else:
+            def check(data, now, device):
+                result = False
+                for child in stateful:
+                    if child(data, now, device):
+                        result = True
+                if result:
+                    return True
+                for child in stateless:
+                    if child(data, now, device):
+                        return True
+                return False
+        return check, bool(stateful)
+
+class CompiledRule:
+    __slots__ = ('name', 'when', 'severity', 'bit', 'check', 'states')
+
+    def __init__(self, rule, get_thresholds):
+        for field in ('name', 'when'):
+            if not isinstance(rule.get(field), str) or not rule[field].strip():
+                raise RuleError(f"Rule needs a non-empty {field!r}: {rule}")
+        self.name = rule['name'].strip()
+        self.when = rule['when']
+        self.severity = str(rule.get('severity', 'WARN')).upper()
+        if self.severity not in SEVERITIES:
+            raise RuleError(f"Severity must be one of {SEVERITIES}: {rule['name']!r}")
+        self.bit = alarm_bit(self.name)
+        compiler = Compiler(get_thresholds)
+        self.check, _ = compiler.compile(Parser(self.when, set(get_thresholds())).parse())
+        self.states = compiler.states
+
+    def to_dict(self):
+        return {'name': self.name, 'when': self.when, 'severity': self.severity}
+
+class RuleEngine:
+    """Pipeline stage appending rule alarms; rule sets can be swapped while running"""
+
+    def __init__(self, get_thresholds, rule_sets=None):
+        self.get_thresholds = get_thresholds
+        self.sets = {}       # scope -> [CompiledRule]
+        self.active = {}     # mode -> tuple of rules to evaluate (mode rules + 'all')
+        self.mode = None
+        self.evaluations = 0
+        self.eval_seconds = 0.0
+        self.load(rule_sets or DEFAULT_RULES)
+
+    def compile_set(self, rules):
+        if not isinstance(rules, list):
+            raise RuleError("A rule set must be a list of rules")
+        # Rules whose text is unchanged keep their compiled state across a swap
+        existing = {(rule.name, rule.when, rule.severity): rule
+                    for rules_in_scope in self.sets.values() for rule in rules_in_scope}
+        compiled = []
+        for rule in rules:
+            if not isinstance(rule, dict):
+                raise RuleError(f"Rule must be an object: {rule!r}")
+            key = (str(rule.get('name', '')).strip(), rule.get('when'), str(rule.get('severity', 'WARN')).upper())
+            compiled.append(existing.get(key) or CompiledRule(rule, self.get_thresholds))
+        return compiled
+
+    def load(self, rule_sets):
+        """Compile and install rule sets for the given scopes; all-or-nothing"""
+        if not isinstance(rule_sets, dict):
+            raise RuleError("Expected an object mapping mode to a list of rules")
+        unknown = [scope for scope in rule_sets if scope not in RULE_SCOPES]
+        if unknown:
+            raise RuleError(f"Unknown rule scope(s) {unknown}, use one of {RULE_SCOPES}")
+        compiled = {scope: self.compile_set(rules) for scope, rules in rule_sets.items()}
+
+        sets = dict(self.sets, **compiled)
+        common = tuple(sets.get('all', ()))
+        # Swap whole references so the processing thread sees the old or the new set, never a mix
+        self.sets = sets
+        self.active = {mode: tuple(sets.get(mode, ())) + common
+                       for mode in RULE_SCOPES if mode != 'all'}
+        self.active[None] = common
+        return self.rule_sets()
+
+    def rule_sets(self):
+        return {scope: [rule.to_dict() for rule in rules] for scope, rules in self.sets.items()}
+
+    def process(self, reading):
+        """Evaluate the current mode's rules and set the alarm bits of those that fire"""
+        started = time.perf_counter()
+        mode = reading.mode
+        if mode != self.mode:
+            self.reset()  # rules of the old mode stopped seeing readings
+            self.mode = mode
+        rules = self.active.get(mode, self.active[None])
+        now = reading.timestamp / 1000
+        device_id = reading.device_id
+        mask = reading.alarm_mask
+        status = reading.status
+
+        for rule in rules:
+            if rule.check(reading, now, device_id):
+                mask |= rule.bit
+                if rule.severity == 'DANGER':
+                    status = 'DANGER'
+                elif status == 'OK':
+                    status = 'WARN'
+
+        reading.alarm_mask = mask
+        reading.status = status
+        self.evaluations += 1
+        self.eval_seconds += time.perf_counter() - started
+
+    def reset(self, device_id=None):
+        """Forget duration/rate state, for one device or all of them"""
+        for rules in self.sets.values():
+            for rule in rules:
+                for per_device in rule.states:
+                    if device_id is None:
+                        per_device.clear()
+                    else:
+                        per_device.pop(device_id, None)
+
+    def stats(self):
+        return {
+            'rules': {scope: len(rules) for scope, rules in self.sets.items()},
+            'evaluations': self.evaluations,
+            'mean_eval_us': round(self.eval_seconds / self.evaluations * 1e6, 2) if self.evaluations else None,
+        }
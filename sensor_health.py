@@ -0,0 +1,169 @@
+"""
+MARS-SENTINEL Sensor Health
+Per-channel diagnostics: substituted, out-of-range, stuck and missing data
+
+The parser used to replace a failed DHT read with a plausible default (22 °C,
+50 % humidity) and nothing downstream could tell it from a measurement. Now
+the parser reports what it substituted, and every reading gets a quality mask
+(wire_format.QUALITY_BITS) of the channels that are not a real measurement:
+
+    substituted  - the value is a placeholder for a failed sensor read
+    out of range - outside what the sensor can physically report
+    stuck        - the anomaly stage has seen the exact same value for too long
+
+Filtering, anomaly detection, live reports and percentile sketches skip the
+flagged channels of a reading with one bit test each. Per device the tracker
+also counts unparseable lines and gaps between readings. Every update is
+constant time: a few counters on a per-(device, channel) slotted record.
+"""
+
+import threading
+import time
+
+from anomaly import STUCK_ALARMS
+from wire_format import QUALITY_BITS, QUALITY_CHANNELS, alarm_bit
+
+# Physical range each sensor can report - anything outside is a wiring or read fault
+VALID_RANGES = {
+    'temperature': (-40.0, 85.0),    # DHT11 / LM35 fallback
+    'humidity': (0.0, 100.0),
+    'gas_level': (0, 1023),          # 10-bit ADC
+    'ir_detection': (0, 1),
+    'distance': (2, 400),            # HC-SR04
+}
+
+# Silence longer than this counts as a gap - the firmware heartbeat is 2 s (device_commands.DEVICE_CONFIG)
+GAP_MS = 3000
+RECENT_BAD_MS = 10000       # a channel flagged within this long is reported as degraded
+
+STUCK_BITS = {sensor: alarm_bit(name) for sensor, name in STUCK_ALARMS.items()}
+
+class ChannelHealth:
+    """Counters for one channel on one device"""
+    __slots__ = ('readings', 'substituted', 'out_of_range', 'stuck_runs', 'stuck', 'last_bad_ms')
+
+    def __init__(self):
+        self.readings = 0
+        self.substituted = 0
+        self.out_of_range = 0
+        self.stuck_runs = 0
+        self.stuck = False
+        self.last_bad_ms = None
+
+    def summary(self, now_ms):
+        bad = self.substituted + self.out_of_range
+        return {
+            'readings': self.readings,
+            'substituted': self.substituted,
+            'out_of_range': self.out_of_range,
+            'stuck_runs': self.stuck_runs,
+            'stuck': self.stuck,
+            'bad_ratio': round(bad / self.readings, 4) if self.readings else 0.0,
+            'last_bad_ms': self.last_bad_ms,
+            'degraded': self.stuck or (self.last_bad_ms is not None and now_ms - self.last_bad_ms < RECENT_BAD_MS),
+        }
+
+class DeviceHealth:
+    """Channel counters plus line-level counters for one device"""
+    __slots__ = ('channels', 'parse_failures', 'gaps', 'max_gap_ms', 'last_seen_ms')
+
+    def __init__(self):
+        self.channels = {channel: ChannelHealth() for channel in QUALITY_CHANNELS}
+        self.parse_failures = 0
+        self.gaps = 0
+        self.max_gap_ms = 0
+        self.last_seen_ms = None
+
+class SensorHealth:
+    """Health tracker - `assess` at parse time, `process` as a pipeline stage"""
+
+    def __init__(self, ranges=None, gap_ms=GAP_MS):
+        self.ranges = dict(VALID_RANGES, **(ranges or {}))
+        self.gap_ms = gap_ms
+        self.lock = threading.Lock()
+        self.devices = {}   # device_id -> DeviceHealth
+        self.checks = [(channel, QUALITY_BITS[channel], self.ranges[channel]) for channel in QUALITY_CHANNELS]
+
+    def device(self, device_id):
+        health = self.devices.get(device_id)
+        if health is None:
+            with self.lock:
+                health = self.devices.setdefault(device_id, DeviceHealth())
+        return health
+
+    def assess(self, device_id, values, substituted=0):
+        """Quality mask for raw values (in QUALITY_CHANNELS order) before filtering
+
+        `substituted` is the mask of channels the parser filled with a placeholder.
+        """
+        health = self.device(device_id)
+        now = int(time.time() * 1000)
+        quality = substituted
+        for (channel, bit, (low, high)), value in zip(self.checks, values):
+            stats = health.channels[channel]
+            stats.readings += 1
+            if substituted & bit:
+                stats.substituted += 1
+                stats.last_bad_ms = now
+            elif not low <= value <= high:
+                stats.out_of_range += 1
+                stats.last_bad_ms = now
+                quality |= bit
+        return quality
+
+    def parse_failed(self, device_id):
+        """A line from this device could not be turned into a reading"""
+        self.device(device_id).parse_failures += 1
+
+    def process(self, reading):
+        """Pipeline stage after anomaly detection: stuck channels and inter-arrival gaps"""
+        health = self.device(reading.device_id)
+        received = reading.received_ms
+        if received is not None:
+            if health.last_seen_ms is not None:
+                gap = received - health.last_seen_ms
+                if gap > self.gap_ms:
+                    health.gaps += 1
+                    if gap > health.max_gap_ms:
+                        health.max_gap_ms = int(gap)
+            health.last_seen_ms = received
+
+        mask = reading.alarm_mask
+        for channel, bit in STUCK_BITS.items():
+            stats = health.channels[channel]
+            stuck = bool(mask & bit)
+            if stuck:
+                reading.quality_mask |= QUALITY_BITS[channel]
+                if not stats.stuck:
+                    stats.stuck_runs += 1
+                    stats.last_bad_ms = reading.timestamp
+            stats.stuck = stuck
+
+    def summary(self, device_ids=None):
+        """Health per device, with the channels currently degraded listed up front"""
+        now = int(time.time() * 1000)
+        with self.lock:
+            devices = dict(self.devices)
+        report = {}
+        degraded = []
+        for device_id in sorted(devices):
+            if device_ids is not None and device_id not in device_ids:
+                continue
+            health = devices[device_id]
+            channels = {channel: stats.summary(now) for channel, stats in health.channels.items()}
+            degraded.extend(f'{device_id}:{channel}' for channel, stats in channels.items() if stats['degraded'])
+            report[device_id] = {
+                'channels': channels,
+                'parse_failures': health.parse_failures,
+                'gaps': health.gaps,
+                'max_gap_ms': health.max_gap_ms,
+                'last_seen_ms': health.last_seen_ms,
+            }
+        return {'degraded': degraded, 'devices': report}
+
+    def reset(self, device_id=None):
+        with self.lock:
+            if device_id is None:
+                self.devices = {}
+            else:
+                self.devices.pop(device_id, None)
@@ -0,0 +1,184 @@
+"""
+MARS-SENTINEL Serial Connection Supervisor
+Finds the MARS-SENTINEL board among the available serial ports and reconnects after a drop
+
+Every candidate from serial.tools.list_ports is probed in parallel and the
+first one that prints the firmware banner or a valid reading line wins.
+Between rounds the supervisor backs off exponentially, but it watches the
+port list and probes again immediately when a new port appears (cable replug).
+
+pyserial is imported by the reader thread on its first connect, so server
+start never waits for it and demo or network-only runs never load it.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+serial = None       # pyserial and serial.tools.list_ports, set by load_pyserial()
+list_ports = None
+
+BANNER_MARKERS = ('MARS-SENTINEL',)
+PROBE_TIMEOUT = 3.0          # seconds to wait for a banner or reading (covers the bootloader reset)
+BACKOFF_START = 0.25
+BACKOFF_MAX = 5.0
+PORT_POLL_INTERVAL = 0.25    # how often the port list is checked while backing off
+
+def load_pyserial():
+    """Import pyserial on first use and return the serial module"""
+    global serial, list_ports
+    if serial is None:
+        import serial as pyserial
+        from serial.tools import list_ports as port_lister
+        serial, list_ports = pyserial, port_lister
+    return serial
+
+def looks_like_reading(line):
+    """True for a `timestamp,temp,humidity,gas,ir,distance` line"""
+    parts = line.split(',')
+    if len(parts) != 6:
+        return False
+    try:
+        for part in parts:
+            float(part)
+    except ValueError:
+        return False
+    return True
+
+def candidate_ports(preferred_port):
+    """Preferred port first, then every USB serial device"""
+    candidates = [preferred_port] if preferred_port and preferred_port != 'AUTO' else []
+    for port in list_ports.comports():
+        if port.device in candidates:
+            continue
+        description = (port.description or '').lower()
+        if port.vid is not None or 'arduino' in description or 'usb' in description:
+            candidates.append(port.device)
+    return candidates
+
+def probe_port(device, baud_rate, cancel):
+    """Open a port and wait for MARS-SENTINEL output
+
+    Returns (serial handle, lines already read) on success, None otherwise.
+    """
+    try:
+        ser = serial.Serial(device, baud_rate, timeout=0.2)
+    except (serial.SerialException, OSError):
+        return None
+
+    deadline = time.time() + PROBE_TIMEOUT
+    try:
+        while time.time() < deadline and not cancel.is_set():
+            line = ser.readline().decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            if any(marker in line for marker in BANNER_MARKERS):
+                return ser, []
+            if looks_like_reading(line):
+                return ser, [line]
+    except (serial.SerialException, OSError):
+        pass
+    ser.close()
+    return None
+
+class SerialSupervisor:
+    """Owns discovery and reconnection for the serial reader thread"""
+
+    def __init__(self, preferred_port, baud_rate):
+        self.preferred_port = preferred_port
+        self.baud_rate = baud_rate
+        self.port = None
+        self.connected = False
+        self.last_error = None
+        self.connects = 0
+        self.empty_rounds = 0       # probe rounds that found no board since the last connect
+        self.lost_at = None
+        self.awaiting_first_reading = False
+        self.recovery_times = deque(maxlen=20)  # seconds from drop to first reading
+        self.lock = threading.Lock()
+
+    def probe_all(self):
+        """Probe every candidate port in parallel, return the first board found"""
+        candidates = candidate_ports(self.preferred_port)
+        if not candidates:
+            return None
+
+        cancel = threading.Event()
+        winner = None
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            futures = {pool.submit(probe_port, device, self.baud_rate, cancel): device
+                       for device in candidates}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    continue
+                if winner is None:
+                    winner = (futures[future],) + result
+                    cancel.set()
+                else:
+                    result[0].close()
+        return winner
+
+    def connect(self):
+        """Block the calling (reader) thread until a board is found
+
+        Returns (serial handle, lines already read during the probe).
+        """
+        load_pyserial()
+        backoff = BACKOFF_START
+        while True:
+            known_ports = {port.device for port in list_ports.comports()}
+            found = self.probe_all()
+            if found:
+                device, ser, pending = found
+                with self.lock:
+                    self.port = device
+                    self.connected = True
+                    self.connects += 1
+                    self.empty_rounds = 0
+                    self.awaiting_first_reading = self.lost_at is not None
+                print(f"✅ MARS-SENTINEL board found on {device}")
+                return ser, pending
+
+            with self.lock:
+                self.empty_rounds += 1
+            # Back off, but wake up early if a new port shows up
+            deadline = time.time() + backoff
+            while time.time() < deadline:
+                time.sleep(PORT_POLL_INTERVAL)
+                if {port.device for port in list_ports.comports()} - known_ports:
+                    backoff = BACKOFF_START
+                    break
+            else:
+                backoff = min(backoff * 2, BACKOFF_MAX)
+
+    def absent(self):
+        """True when a full probe round found no board and none is connected"""
+        return not self.connected and self.empty_rounds > 0
+
+    def disconnected(self, error):
+        """Record a dropped connection"""
+        with self.lock:
+            self.connected = False
+            self.last_error = str(error)
+            self.lost_at = time.time()
+            self.awaiting_first_reading = False
+
+    def reading_received(self):
+        """Call for every processed reading - measures drop-to-first-reading time"""
+        if self.awaiting_first_reading:
+            with self.lock:
+                self.awaiting_first_reading = False
+                self.recovery_times.append(round(time.time() - self.lost_at, 3))
+
+    def status(self):
+        with self.lock:
+            return {
+                'port': self.port,
+                'connected': self.connected,
+                'connects': self.connects,
+                'empty_rounds': self.empty_rounds,
+                'last_error': self.last_error,
+                'recovery_seconds': list(self.recovery_times),
+            }
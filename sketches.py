@@ -0,0 +1,277 @@
+"""
+MARS-SENTINEL Percentile Sketches
+Mergeable quantile sketches per sensor over sliding windows, kept at ingest
+
+Each sketch is DDSketch-style: values fall into logarithmic buckets, so any
+quantile it reports is within RELATIVE_ACCURACY of the true value, and two
+sketches merge by adding bucket counts. That makes every view a merge - a
+sliding window is the merge of its time slices, a fleet view the merge of the
+devices - and no raw readings are ever kept.
+
+Windows are rings of time slices (1m = 12 x 5s, 5m = 10 x 30s, 1h = 12 x 5min),
+so a window slides in slice-sized steps. The mission window is one cumulative
+sketch, reset when a mission starts. Adding a reading costs one log() per
+sensor plus a few dict increments; a query merges at most a dozen slices whose
+size depends on the value range, not on how many readings were seen.
+"""
+
+import math
+import threading
+import time
+
+from data_analysis import STAT_SENSORS
+from wire_format import QUALITY_BITS
+
+RELATIVE_ACCURACY = 0.01
+MIN_INDEXABLE = 1e-6         # |values| below this count as zero
+MAX_BUCKETS = 2048           # per sign - lowest buckets are folded together beyond this
+
+# name -> (window seconds, slices in the ring)
+WINDOWS = {
+    '1m': (60, 12),
+    '5m': (300, 10),
+    '1h': (3600, 12),
+}
+MISSION_WINDOW = 'mission'
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+DEFAULT_BINS = 10
+MAX_BINS = 100
+
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+INV_LOG_GAMMA = 1 / math.log(GAMMA)
+
+def bucket_key(value):
+    """Bucket for the magnitude of a value, None when it counts as zero"""
+    magnitude = abs(value)
+    if magnitude <= MIN_INDEXABLE:
+        return None
+    return math.ceil(math.log(magnitude) * INV_LOG_GAMMA)
+
+def bucket_value(key):
+    """Representative magnitude of a bucket (within RELATIVE_ACCURACY of anything in it)"""
+    return 2 * GAMMA ** key / (GAMMA + 1)
+
+class DDSketch:
+    """Bucket counts plus exact count, sum, min and max"""
+
+    __slots__ = ('positive', 'negative', 'zero', 'count', 'sum', 'min', 'max')
+
+    def __init__(self):
+        self.positive = {}   # bucket key -> count, by magnitude
+        self.negative = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, key=None):
+        """Add one value; pass its bucket_key() when it is already known"""
+        if key is None:
+            key = bucket_key(value)
+        if key is None:
+            self.zero += 1
+        else:
+            buckets = self.positive if value > 0 else self.negative
+            buckets[key] = buckets.get(key, 0) + 1
+            if len(buckets) > MAX_BUCKETS:
+                self.collapse(buckets)
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        if not other.count:
+            return self
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+            if len(buckets) > MAX_BUCKETS:
+                self.collapse(buckets)
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def collapse(self, buckets):
+        """Fold the smallest-magnitude buckets into the lowest kept one, bounding the size"""
+        keys = sorted(buckets)
+        excess = keys[:len(keys) - MAX_BUCKETS]
+        floor = keys[len(excess)]
+        for key in excess:
+            buckets[floor] += buckets.pop(key)
+
+    def ordered(self):
+        """(representative value, count) in ascending value order"""
+        negative = self.negative
+        positive = self.positive
+        ordered = [(-bucket_value(key), negative[key]) for key in sorted(negative, reverse=True)]
+        if self.zero:
+            ordered.append((0.0, self.zero))
+        ordered.extend((bucket_value(key), positive[key]) for key in sorted(positive))
+        return ordered
+
+    def quantiles(self, qs):
+        """Values at each quantile in qs (ascending), clamped to the exact min/max"""
+        if not self.count:
+            return [None for _ in qs]
+        results = []
+        ordered = self.ordered()
+        position = 0
+        seen = ordered[0][1]
+        for q in qs:
+            rank = q * (self.count - 1)
+            while seen <= rank and position < len(ordered) - 1:
+                position += 1
+                seen += ordered[position][1]
+            value = min(max(ordered[position][0], self.min), self.max)
+            results.append(round(value, 3))
+        return results
+
+    def histogram(self, bins=DEFAULT_BINS):
+        """Counts in `bins` equal-width bins between min and max"""
+        if not self.count:
+            return []
+        low, high = self.min, self.max
+        width = (high - low) / bins if high > low else 1.0
+        counts = [0] * bins
+        for value, count in self.ordered():
+            index = int((min(max(value, low), high) - low) / width)
+            counts[min(index, bins - 1)] += count
+        return [{'from': round(low + i * width, 3), 'to': round(low + (i + 1) * width, 3), 'count': count}
+                for i, count in enumerate(counts)]
+
+    def summary(self, qs=DEFAULT_QUANTILES, bins=DEFAULT_BINS):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'avg': round(self.sum / self.count, 3),
+            'percentiles': {f'p{q * 100:g}': value for q, value in zip(qs, self.quantiles(qs))},
+            'histogram': self.histogram(bins),
+        }
+
+class SlidingWindow:
+    """Ring of per-slice sketches covering the last `seconds`"""
+
+    __slots__ = ('slice_seconds', 'slots', 'sketches')
+
+    def __init__(self, seconds, slices):
+        self.slice_seconds = seconds / slices
+        self.slots = [None] * slices      # slice number held in each ring position
+        self.sketches = [DDSketch() for _ in range(slices)]
+
+    def current(self, timestamp_s):
+        """Sketch for the slice containing timestamp_s, recycling an expired one
+
+        None for a reading older than the ring (a late arrival never clobbers newer data).
+        """
+        slot = int(timestamp_s // self.slice_seconds)
+        position = slot % len(self.slots)
+        held = self.slots[position]
+        if held != slot:
+            if held is not None and held > slot:
+                return None
+            self.slots[position] = slot
+            self.sketches[position] = DDSketch()
+        return self.sketches[position]
+
+    def merged_into(self, sketch, now_s):
+        oldest = int(now_s // self.slice_seconds) - len(self.slots) + 1
+        for slot, slice_sketch in zip(self.slots, self.sketches):
+            if slot is not None and slot >= oldest:
+                sketch.merge(slice_sketch)
+        return sketch
+
+class SensorWindows:
+    """All windows for one sensor on one device"""
+
+    __slots__ = ('windows', 'mission')
+
+    def __init__(self):
+        self.windows = {name: SlidingWindow(seconds, slices) for name, (seconds, slices) in WINDOWS.items()}
+        self.mission = DDSketch()
+
+    def add(self, value, timestamp_s):
+        key = bucket_key(value)
+        for window in self.windows.values():
+            sketch = window.current(timestamp_s)
+            if sketch is not None:
+                sketch.add(value, key)
+        self.mission.add(value, key)
+
+    def merged_into(self, sketch, window, now_s):
+        if window == MISSION_WINDOW:
+            return sketch.merge(self.mission)
+        return self.windows[window].merged_into(sketch, now_s)
+
+class WindowedStats:
+    """Per-device, per-sensor sliding-window sketches, updated on every reading"""
+
+    def __init__(self, sensors=STAT_SENSORS):
+        self.sensors = sensors
+        self.quality_bits = [(sensor, QUALITY_BITS[sensor]) for sensor in sensors]
+        self.lock = threading.Lock()
+        self.devices = {}   # device_id -> {sensor: SensorWindows}
+
+    def update(self, reading):
+        timestamp_s = reading.timestamp / 1000
+        quality = reading.quality_mask
+        with self.lock:
+            device = self.devices.get(reading.device_id)
+            if device is None:
+                device = self.devices[reading.device_id] = {sensor: SensorWindows() for sensor in self.sensors}
+            for sensor, bit in self.quality_bits:
+                if not quality & bit:   # suspect channels never enter the percentiles
+                    device[sensor].add(getattr(reading, sensor), timestamp_s)
+
+    def reset(self):
+        """Drop everything - every window starts empty"""
+        with self.lock:
+            self.devices = {}
+
+    def reset_mission(self):
+        """New mission - only the mission sketch restarts; the 1m/5m/1h windows keep sliding"""
+        with self.lock:
+            for device in self.devices.values():
+                for windows in device.values():
+                    windows.mission = DDSketch()
+
+    def sketch(self, sensor, window, device_ids=None, now_s=None):
+        """Merged sketch for one sensor over a window, for some devices or the whole fleet"""
+        now_s = time.time() if now_s is None else now_s
+        merged = DDSketch()
+        with self.lock:
+            for device_id, device in self.devices.items():
+                if device_ids is None or device_id in device_ids:
+                    device[sensor].merged_into(merged, window, now_s)
+        return merged
+
+    def query(self, window, device_ids=None, qs=DEFAULT_QUANTILES, bins=DEFAULT_BINS):
+        return {sensor: self.sketch(sensor, window, device_ids).summary(qs, bins) for sensor in self.sensors}
+
+    def device_ids(self):
+        with self.lock:
+            return sorted(self.devices)
+
+def parse_quantiles(text):
+    """'0.5,0.95,99' -> (0.5, 0.95, 0.99); percent values are accepted. Raises ValueError"""
+    qs = []
+    for part in text.split(','):
+        q = float(part)
+        if q > 1:
+            q /= 100
+        if not 0 <= q <= 1:
+            raise ValueError(f"quantile out of range: {part}")
+        qs.append(q)
+    if not qs:
+        raise ValueError("no quantiles given")
+    return tuple(sorted(qs))
@@ -0,0 +1,56 @@
+"""
+MARS-SENTINEL Startup Readiness
+Cold-start phase timings and the answers for /healthz and /readyz
+
+The server is live as soon as it answers HTTP. It is ready once state has
+been recovered from the WAL, the workers are running, the HTTP server is
+serving, and data is flowing - the first reading has been processed - or the
+serial source is confirmed absent (a full probe round found no board).
+
+Each phase is stamped once, in milliseconds since app.py started importing,
+so a restart in the middle of a mission reports exactly where its time went.
+`first_emit` - the first reading handed to the dashboards - is the cold-start
+time.
+"""
+
+import threading
+import time
+
+REQUIRED_PHASES = ('recovered', 'workers_started', 'serving')
+
+class StartupTracker:
+    """First-occurrence timestamps of startup phases"""
+
+    def __init__(self, started_at, source_absent=None):
+        self.started_at = started_at            # time.time() when startup began
+        self.source_absent = source_absent or (lambda: False)
+        self.phases = {}                        # phase -> ms since started_at
+        self.lock = threading.Lock()
+
+    def mark(self, phase):
+        """Stamp a phase the first time it happens - a dict lookup on every later call"""
+        if phase in self.phases:
+            return
+        elapsed = round((time.time() - self.started_at) * 1000, 1)
+        with self.lock:
+            if phase in self.phases:
+                return
+            self.phases[phase] = elapsed
+        print(f"⏱️ Startup: {phase} after {elapsed} ms")
+
+    def ready(self):
+        """(ready, phases still waited for)"""
+        waiting = [phase for phase in REQUIRED_PHASES if phase not in self.phases]
+        if 'first_reading' not in self.phases and not self.source_absent():
+            waiting.append('first_reading')
+        return not waiting, waiting
+
+    def status(self):
+        ready, waiting = self.ready()
+        return {
+            'ready': ready,
+            'waiting_for': waiting,
+            'source_absent': 'first_reading' not in self.phases and self.source_absent(),
+            'phases_ms': dict(self.phases),
+            'cold_start_ms': self.phases.get('first_emit'),
+        }
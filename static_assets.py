@@ -0,0 +1,155 @@
+"""
+MARS-SENTINEL Static Assets
+Dashboards served from memory, precompressed, with content-hash ETags
+
+Every dashboard file is read once at startup and compressed once (gzip, plus
+brotli when the `brotli` package is installed), so a request costs a dict
+lookup and a write - no disk read, no per-request compression. The ETag is a
+hash of the file contents: a browser that already has the page gets a 304 with
+no body, which is what makes reloads over a slow relay link cheap.
+
+Cache policy: the plain URL is `no-cache` (always revalidated, usually a 304);
+the same URL with `?v=<version>` is immutable for a year, since its contents
+can never change. In dev mode files are re-read when their mtime changes.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Route path -> file served there
+DASHBOARDS = {
+    '/': 'dashboard_polling.html',
+    '/polling': 'dashboard_polling.html',
+    '/ultra': 'MARS_SENTINEL_ULTRA_UI.html',
+    '/final': 'dashboard.html',     # the Socket.IO dashboard (dashboard_FINAL.html was never committed)
+}
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+class Asset:
+    """One file in memory with its precompressed variants"""
+
+    __slots__ = ('name', 'path', 'content_type', 'version', 'mtime', 'size', 'bodies')
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        stat = os.stat(path)
+        with open(path, 'rb') as asset_file:
+            body = asset_file.read()
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        # Content-Encoding -> bytes; a variant is only kept when it is actually smaller
+        self.bodies = {'identity': body}
+        compressed = gzip.compress(body, GZIP_LEVEL, mtime=0)
+        if len(compressed) < len(body):
+            self.bodies['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            if len(compressed) < len(body):
+                self.bodies['br'] = compressed
+
+    def changed(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_mtime_ns != self.mtime or stat.st_size != self.size
+
+    def etag(self, encoding):
+        """Strong validator per representation - the hash plus the encoding"""
+        return self.version if encoding == 'identity' else f'{self.version}-{encoding}'
+
+    def sizes(self):
+        return {encoding: len(body) for encoding, body in self.bodies.items()}
+
+class AssetStore:
+    """Loaded assets by file name"""
+
+    def __init__(self, directory, hot_reload=False):
+        self.directory = directory
+        self.hot_reload = hot_reload
+        self.assets = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.not_modified = 0
+
+    def load(self, names):
+        """Read and compress the files now - missing files are reported, not fatal"""
+        for name in names:
+            try:
+                self.assets[name] = Asset(name, os.path.join(self.directory, name))
+            except OSError as e:
+                print(f"❌ Dashboard asset {name} not loaded: {e}")
+
+    def get(self, name):
+        asset = self.assets.get(name)
+        if asset is not None and self.hot_reload and asset.changed():
+            with self.lock:
+                asset = self.assets.get(name)
+                if asset.changed():
+                    try:
+                        asset = self.assets[name] = Asset(name, asset.path)
+                        print(f"🔄 Reloaded {name}")
+                    except OSError as e:
+                        print(f"❌ Could not reload {name}: {e}")
+        return asset
+
+    def response(self, name, request):
+        """Serve an asset for a Flask request: 304, or the best encoding the client accepts"""
+        asset = self.get(name)
+        if asset is None:
+            return Response('Not found', status=404, mimetype='text/plain')
+        self.hits += 1
+
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in asset.bodies and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+
+        headers = {'Vary': 'Accept-Encoding'}
+        if request.args.get('v') == asset.version and not self.hot_reload:
+            headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            headers['Cache-Control'] = 'no-cache'
+
+        etag = asset.etag(encoding)
+        if request.if_none_match.contains(etag):
+            self.not_modified += 1
+            response = Response(status=304, headers=headers)
+            response.set_etag(etag)
+            return response
+
+        body = asset.bodies[encoding]
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        response = Response(body, status=200, headers=headers, content_type=asset.content_type)
+        response.set_etag(etag)
+        return response
+
+    def status(self):
+        return {
+            'hot_reload': self.hot_reload,
+            'brotli': brotli is not None,
+            'hits': self.hits,
+            'not_modified': self.not_modified,
+            'assets': {name: {'version': asset.version, 'bytes': asset.sizes()}
+                       for name, asset in self.assets.items()},
+        }
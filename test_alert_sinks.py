@@ -0,0 +1,130 @@
+"""
+Alert Sink Test for MARS-SENTINEL
+Drives the alert dispatcher against a local stand-in webhook server
+
+Checks batching, deduplication, retry with backoff after failures, and that
+observe() - the only part that runs on the ingest path - stays fast while the
+webhook is slow or down. Needs nothing but the standard library.
+
+Usage:
+    python test_alert_sinks.py
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import alerts
+from readings import Reading
+
+class StandInWebhook(BaseHTTPRequestHandler):
+    """Records every POSTed batch; behaviour is set on the server object"""
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if server.delay:
+            time.sleep(server.delay)
+        if server.fail_next > 0:
+            server.fail_next -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        server.batches.append(json.loads(body)['alerts'])
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInWebhook)
+    server.batches = []
+    server.delay = 0
+    server.fail_next = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def reading(device_id, status, timestamp):
+    return Reading(timestamp, device_id, 30.0, 50.0, 700 if status == 'DANGER' else 300, 0, 80, status=status)
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def run_checks():
+    server = start_server()
+    url = f'http://127.0.0.1:{server.server_address[1]}/hook'
+    sink = alerts.WebhookSink('pager', url, dedup_window=2.0, batch_window=0.2, backoff=0.1)
+    dispatcher = alerts.AlertDispatcher([sink])
+    dispatcher.start()
+    results = []
+
+    # 1. Transitions from several suits at once arrive as one batch
+    for suit in range(5):
+        dispatcher.observe(reading(f'suit-{suit}', 'DANGER', 1000))
+    delivered = wait_for(lambda: sink.delivered == 5)
+    results.append(check("five transitions batched into one POST", delivered and len(server.batches) == 1))
+
+    # 2. Steady readings raise nothing; a DANGER -> OK -> DANGER flap inside the dedup
+    #    window is delivered in full, so the pager ends on DANGER, not OK
+    for _ in range(100):
+        dispatcher.observe(reading('suit-0', 'DANGER', 1100))
+    dispatcher.observe(reading('suit-0', 'OK', 1200))
+    dispatcher.observe(reading('suit-0', 'DANGER', 1300))
+    wait_for(lambda: sink.delivered + sink.deduplicated >= 7)
+    time.sleep(0.3)
+    last = [alert for batch in server.batches for alert in batch if alert['device_id'] == 'suit-0'][-1]
+    results.append(check(f"DANGER -> OK -> DANGER flap delivered (delivered {sink.delivered}, last {last['to']})",
+                         sink.deduplicated == 0 and sink.delivered == 7 and last['to'] == 'DANGER'))
+
+    # 2b. Only a repeat of the state the sink already shows is dropped - here the
+    #     dispatcher forgets suit-0 (as after a restart) and raises OK -> DANGER again
+    dispatcher.last_status.pop('suit-0')
+    dispatcher.observe(reading('suit-0', 'DANGER', 1400))
+    wait_for(lambda: sink.deduplicated == 1)
+    results.append(check(f"repeat of the delivered DANGER deduplicated (deduplicated {sink.deduplicated})",
+                         sink.deduplicated == 1 and sink.delivered == 7))
+
+    # 3. A webhook that fails twice is retried with backoff and still delivers
+    server.fail_next = 2
+    dispatcher.observe(reading('suit-9', 'WARN', 2000))
+    delivered = wait_for(lambda: sink.delivered == 8)
+    results.append(check(f"delivered after {sink.retries} retries", delivered and sink.retries == 2))
+
+    # 4. A slow webhook never slows the ingest side
+    server.delay = 2.0
+    started = time.perf_counter()
+    for i in range(1000):
+        dispatcher.observe(reading(f'suit-{i % 20}', 'DANGER' if i % 2 else 'OK', 3000 + i))
+    per_call_us = (time.perf_counter() - started) / 1000 * 1e6
+    results.append(check(f"observe() with a slow sink: {per_call_us:.1f} us per reading", per_call_us < 200))
+
+    # 5. A dead webhook gives up after the last attempt and counts the batch as failed
+    dead = alerts.WebhookSink('dead', 'http://127.0.0.1:9/hook', retry_attempts=3, backoff=0.05, batch_window=0)
+    dispatcher.add_sink(dead)
+    dispatcher.observe(reading('suit-x', 'DANGER', 5000))
+    gave_up = wait_for(lambda: dead.failed == 1)
+    results.append(check(f"dead sink gave up after {dead.retries} retries ({dead.last_error})",
+                         gave_up and dead.retries == 2))
+
+    print(json.dumps(dispatcher.status()['sinks']['pager'], indent=2))
+    dispatcher.stop()
+    server.shutdown()
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL alert sinks...")
+    if run_checks():
+        print("✓ All alert sink checks passed")
+    else:
+        print("❌ Some alert sink checks failed")
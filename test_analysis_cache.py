@@ -0,0 +1,111 @@
+"""
+Analysis Cache Test for MARS-SENTINEL
+Runs the incremental mission analysis over a growing CSV log
+
+Checks that the sidecar cache goes miss -> hit -> append -> miss (after a
+rewrite), that an append only parses the new rows, that a half-written last
+line waits for the next run, and that every cached summary equals a fresh
+row-by-row analysis of the whole file. Uses a temporary directory.
+
+Usage:
+    python test_analysis_cache.py
+"""
+
+import csv
+import os
+import random
+import shutil
+import tempfile
+
+import analysis_cache
+from data_analysis import EXPORT_HEADER, summarize_rows
+
+STATUSES = ['OK'] * 6 + ['WARN'] * 3 + ['DANGER']
+ALARMS = {'OK': '', 'WARN': 'Gas Contamination Warning', 'DANGER': 'Obstacle Too Close|Gas Contamination Critical'}
+
+def rows(rng, start, count):
+    for i in range(start, start + count):
+        status = rng.choice(STATUSES)
+        yield [1_700_000_000_000 + i * 500, round(rng.uniform(18, 48), 1), round(rng.uniform(30, 95)),
+               rng.randint(100, 900), rng.randint(0, 1), rng.randint(5, 300), status, ALARMS[status],
+               'eva', f'suit-{i % 2}']
+
+def write(csv_file, data, mode='a'):
+    with open(csv_file, mode, newline='') as file:
+        writer = csv.writer(file)
+        if mode == 'w':
+            writer.writerow(EXPORT_HEADER)
+        writer.writerows(data)
+
+def same_summary(cached, fresh):
+    """Equal up to float rounding in the averages and percentiles"""
+    for key in ('total_events', 'first_timestamp', 'last_timestamp', 'status_counts', 'status_ms',
+                'alarm_types', 'danger_timeline', 'danger_total'):
+        if cached[key] != fresh[key]:
+            print(f"   {key}: {cached[key]} != {fresh[key]}")
+            return False
+    for sensor, stats in fresh['sensors'].items():
+        for name, value in stats.items():
+            other = cached['sensors'][sensor][name]
+            if isinstance(value, float) and other is not None and abs(other - value) < 1e-6:
+                continue
+            if other != value:
+                print(f"   {sensor}.{name}: {other} != {value}")
+                return False
+    return True
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def run_checks():
+    directory = tempfile.mkdtemp(prefix='analysis-cache-test-')
+    csv_file = os.path.join(directory, 'mission.csv')
+    rng = random.Random(11)
+    results = []
+    try:
+        write(csv_file, rows(rng, 0, 3000), 'w')
+        summary, info = analysis_cache.cached_summary(csv_file)
+        results.append(check(f"first run is a miss over {info['rows_parsed']} rows and writes the sidecar",
+                             info['cache'] == 'miss' and info['rows_parsed'] == 3000
+                             and os.path.exists(analysis_cache.cache_path(csv_file))))
+        results.append(check("summary matches a fresh row-by-row analysis",
+                             same_summary(summary, summarize_rows(csv_file))))
+
+        summary, info = analysis_cache.cached_summary(csv_file)
+        results.append(check("unchanged file is a hit with nothing parsed",
+                             info['cache'] == 'hit' and info['rows_parsed'] == 0
+                             and same_summary(summary, summarize_rows(csv_file))))
+
+        # Appended rows plus a row the writer has not finished yet
+        write(csv_file, rows(rng, 3000, 500))
+        with open(csv_file, 'a') as file:
+            file.write('1700001750000,22.5,4')
+        summary, info = analysis_cache.cached_summary(csv_file)
+        results.append(check(f"append parses only the {info['rows_parsed']} new complete rows",
+                             info['cache'] == 'append' and info['rows_parsed'] == 500
+                             and summary['total_events'] == 3500))
+
+        with open(csv_file, 'a') as file:
+            file.write('5,300,0,120,OK,,eva,suit-0\n')
+        summary, info = analysis_cache.cached_summary(csv_file)
+        results.append(check("the finished partial row is picked up by the next run, totals match a full analysis",
+                             info['cache'] == 'append' and info['rows_parsed'] == 1
+                             and same_summary(summary, summarize_rows(csv_file))))
+
+        # A rewritten file must not reuse anything
+        write(csv_file, rows(rng, 0, 200), 'w')
+        summary, info = analysis_cache.cached_summary(csv_file)
+        results.append(check("rewritten file is rescanned from scratch",
+                             info['cache'] == 'miss' and summary['total_events'] == 200
+                             and same_summary(summary, summarize_rows(csv_file))))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL analysis cache...")
+    if run_checks():
+        print("✓ All analysis cache checks passed")
+    else:
+        print("❌ Some analysis cache checks failed")
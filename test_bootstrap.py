@@ -0,0 +1,117 @@
+"""
+Connect Bootstrap Test for MARS-SENTINEL
+Checks history downsampling and the cached bootstrap snapshot
+
+Downsampling must keep the worst reading of each (suit, bucket) with the
+alarms of the whole bucket OR'd in, never hide a DANGER, and never return more
+than the requested points per suit. The bootstrap cache must reuse a payload
+until a new reading arrives and filter by subscription.
+
+Usage:
+    python test_bootstrap.py
+"""
+
+import random
+import time
+
+import bootstrap
+from readings import Reading
+from wire_format import ALARM_BITS, STATUS_INDEX
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def history(rng, start_ms, seconds, device_ids):
+    readings = []
+    for step in range(seconds * 2):
+        for device_id in device_ids:
+            status = rng.choices(['OK', 'WARN', 'DANGER'], [90, 8, 2])[0]
+            mask = {'OK': 0, 'WARN': ALARM_BITS['Gas Contamination Warning'],
+                    'DANGER': ALARM_BITS['Obstacle Too Close']}[status]
+            readings.append(Reading(start_ms + step * 500, device_id, 22.0, 45.0, 300, 0, 150,
+                                    status=status, alarm_mask=mask, seq=len(readings)))
+    return readings
+
+def run_checks():
+    rng = random.Random(5)
+    results = []
+
+    # 1. Worst reading per bucket, alarms OR'd, latest on ties
+    base = 1_700_000_000_000
+    bucket = [
+        Reading(base, 'suit-1', 22.0, 45.0, 300, 0, 150, seq=1),
+        Reading(base + 500, 'suit-1', 22.0, 45.0, 450, 0, 150, status='WARN',
+                alarm_mask=ALARM_BITS['Gas Contamination Warning'], seq=2),
+        Reading(base + 1000, 'suit-1', 22.0, 45.0, 300, 0, 15, status='DANGER',
+                alarm_mask=ALARM_BITS['Obstacle Too Close'], seq=3),
+        Reading(base + 1500, 'suit-1', 22.0, 45.0, 300, 0, 150, seq=4),
+        Reading(base + 1500, 'suit-2', 22.0, 45.0, 300, 0, 150, seq=5),
+    ]
+    kept = bootstrap.downsample(bucket, 2000)
+    results.append(check("one reading per suit and bucket, the DANGER one kept with every alarm",
+                         [reading.seq for reading in kept] == [3, 5]
+                         and kept[0].alarm_mask
+                         == ALARM_BITS['Gas Contamination Warning'] | ALARM_BITS['Obstacle Too Close']
+                         and bucket[2].alarm_mask == ALARM_BITS['Obstacle Too Close']))
+
+    ties = bootstrap.downsample(bucket[:1] + [bucket[3]], 2000)
+    results.append(check("latest reading wins a tie", [reading.seq for reading in ties] == [4]))
+
+    # 2. A long history downsampled to the requested points never hides a DANGER bucket
+    readings = history(rng, base, 600, ['suit-1', 'suit-2'])
+    history_s, resolution_ms = bootstrap.parse_options({'history': '600', 'points': '100'})
+    coarse = bootstrap.downsample(readings, resolution_ms)
+    per_suit = {device_id: sum(1 for reading in coarse if reading.device_id == device_id)
+                for device_id in ('suit-1', 'suit-2')}
+    danger_buckets = {(reading.device_id, reading.timestamp // resolution_ms)
+                      for reading in readings if reading.status == 'DANGER'}
+    kept_danger = {(reading.device_id, reading.timestamp // resolution_ms)
+                   for reading in coarse if reading.status == 'DANGER'}
+    in_order = all(a.timestamp <= b.timestamp for a, b in zip(coarse, coarse[1:]))
+    results.append(check(f"{len(readings)} readings -> {per_suit} per suit at {resolution_ms} ms, "
+                         f"every DANGER bucket kept",
+                         max(per_suit.values()) <= 100 and kept_danger == danger_buckets and in_order))
+
+    worst = all(STATUS_INDEX[reading.status] == max(STATUS_INDEX[other.status] for other in readings
+                                                     if other.device_id == reading.device_id
+                                                     and other.timestamp // resolution_ms
+                                                     == reading.timestamp // resolution_ms)
+                for reading in coarse)
+    results.append(check("every kept reading is the worst of its bucket", worst))
+
+    results.append(check("bad or missing options fall back to the defaults",
+                         bootstrap.parse_options({'history': 'soon'})
+                         == (bootstrap.DEFAULT_HISTORY_S,
+                             -(-bootstrap.DEFAULT_HISTORY_S * 1000 // (bootstrap.DEFAULT_POINTS - 1)))
+                         and bootstrap.parse_options({'history': '99999', 'resolution': '5000'})[0]
+                         == bootstrap.MAX_HISTORY_S))
+
+    # 3. Payloads are reused until the sequence moves, and filtered by subscription
+    now_ms = int(time.time() * 1000)
+    live = history(rng, now_ms - 60_000, 60, ['suit-1', 'suit-2'])
+    snapshot = {'seq': live[-1].seq}
+    cache = bootstrap.BootstrapCache(lambda: (snapshot['seq'], live, {'gas_warn': 400}, 'eva'))
+    first = cache.payload(None, 120, 1000, 'json')
+    again = cache.payload(None, 120, 1000, 'json')
+    only_one = cache.payload({'suit-2'}, 120, 1000, 'json')
+    results.append(check(f"same request reused ({cache.stats()}), subscriptions filtered",
+                         again is first and cache.stats() == {'built': 2, 'reused': 1}
+                         and only_one['devices'] == ['suit-2'] and set(only_one['columns']['dv']) == {0}
+                         and first['devices'] == ['suit-1', 'suit-2'] and first['seq'] == live[-1].seq))
+
+    live.append(Reading(now_ms, 'suit-1', 22.0, 45.0, 300, 0, 150, seq=snapshot['seq'] + 1))
+    snapshot['seq'] += 1
+    rebuilt = cache.payload(None, 120, 1000, 'json')
+    results.append(check("a new reading invalidates the cached payloads",
+                         rebuilt is not first and rebuilt['seq'] == snapshot['seq']
+                         and snapshot['seq'] in rebuilt['columns']['q']))
+
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL connect bootstrap...")
+    if run_checks():
+        print("✓ All bootstrap checks passed")
+    else:
+        print("❌ Some bootstrap checks failed")
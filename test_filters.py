@@ -0,0 +1,101 @@
+"""
+Reading Filter Test for MARS-SENTINEL
+Checks the rolling median, Hampel glitch rejection and the DANGER dwell gate
+
+RollingMedian is compared against statistics.median over random streams, for
+both a fixed-size window and a time window trimmed with expire(). The Hampel
+filter must replace a single-sample glitch, pass a real step that crosses a
+threshold band, and DANGER must only stand after min_dwell_ms.
+
+Usage:
+    python test_filters.py
+"""
+
+import random
+import statistics
+
+import filters
+from readings import Reading
+from wire_format import alarm_bit
+
+THRESHOLDS = {'distance_warn': 50, 'distance_danger': 20, 'temp_warn': 35, 'temp_danger': 45,
+              'humidity_warn': 80, 'humidity_danger': 90}
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def run_checks():
+    results = []
+    rng = random.Random(7)
+
+    # 1. Fixed-size window, with repeated values to exercise lazy deletion
+    for size in (1, 2, 5, 32):
+        rolling = filters.RollingMedian(size)
+        window = []
+        mismatches = 0
+        for _ in range(2000):
+            value = rng.choice([rng.randint(0, 20), rng.uniform(-50, 50)])
+            rolling.add(value)
+            window = (window + [value])[-size:]
+            if abs(rolling.median() - statistics.median(window)) > 1e-9:
+                mismatches += 1
+        results.append(check(f"RollingMedian({size}) matches statistics.median over 2000 values",
+                             mismatches == 0 and len(rolling) == len(window)))
+
+    # 2. Time window: irregular spacing, values older than the cut-off dropped
+    rolling = filters.RollingMedian()
+    stamped = []
+    mismatches = 0
+    now = 0
+    for _ in range(3000):
+        now += rng.choice([50, 100, 500, 1000, 3000])
+        value = round(rng.gauss(100, 15))
+        rolling.expire(now - 2500)
+        rolling.add(value, now)
+        stamped = [(t, v) for t, v in stamped if t >= now - 2500] + [(now, value)]
+        if rolling.median() != statistics.median(v for _, v in stamped):
+            mismatches += 1
+    results.append(check("time-windowed RollingMedian matches statistics.median", mismatches == 0))
+
+    # 3. A single glitch is replaced with the median, a genuine band change is not
+    reading_filter = filters.ReadingFilter(lambda: THRESHOLDS)
+    steady = [reading_filter.apply('suit-1', 'distance', 150 + (i % 3), i * 500) for i in range(10)]
+    glitch = reading_filter.apply('suit-1', 'distance', 151 + 90, 5000)
+    after = reading_filter.apply('suit-1', 'distance', 151, 5500)
+    results.append(check(f"glitch 241 cm replaced with {glitch}, neighbours untouched",
+                         steady == [150 + (i % 3) for i in range(10)] and glitch != 241 and after == 151))
+
+    step = [reading_filter.apply('suit-1', 'distance', 15, 6000 + i * 100) for i in range(3)]
+    results.append(check(f"obstacle step into the DANGER band passes at once {step}",
+                         step == [15, 15, 15] and reading_filter.stats()['suit-1:distance']['restarts'] == 1))
+
+    other = reading_filter.apply('suit-2', 'distance', 15, 6000)
+    results.append(check("each device has its own window", other == 15 and len(reading_filter.filters) == 2))
+
+    # 4. Dwell: DANGER shows as the warning until it has held for min_dwell_ms
+    danger_bit, warn_bit = alarm_bit('Obstacle Too Close'), alarm_bit('Obstacle Warning')
+    dwell = filters.FILTER_CONFIG['distance']['min_dwell_ms']
+    seen = []
+    for offset in (0, dwell // 2, dwell, dwell + 100):
+        data = Reading(10_000 + offset, 'suit-3', 22.0, 45.0, 200, 0, 15, status='DANGER', alarm_mask=danger_bit)
+        reading_filter.confirm_danger(data)
+        seen.append((data.status, data.alarm_mask))
+    results.append(check(f"DANGER confirmed after {dwell} ms: {[status for status, _ in seen]}",
+                         seen == [('WARN', warn_bit), ('WARN', warn_bit),
+                                  ('DANGER', danger_bit), ('DANGER', danger_bit)]))
+
+    data = Reading(20_000, 'suit-3', 22.0, 45.0, 200, 0, 150)
+    reading_filter.confirm_danger(data)
+    data = Reading(20_100, 'suit-3', 22.0, 45.0, 200, 0, 15, status='DANGER', alarm_mask=danger_bit)
+    reading_filter.confirm_danger(data)
+    results.append(check("the dwell restarts after the alarm clears", data.status == 'WARN'))
+
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL reading filters...")
+    if run_checks():
+        print("✓ All reading filter checks passed")
+    else:
+        print("❌ Some reading filter checks failed")
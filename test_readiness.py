@@ -0,0 +1,86 @@
+"""
+Readiness Test for MARS-SENTINEL
+Walks the startup phases and checks /healthz and /readyz along the way
+
+StartupTracker must stamp each phase once and list what it still waits for;
+/readyz must answer 503 until state is recovered, the workers and server are
+up and either a reading has gone through the pipeline or the serial source is
+confirmed absent, and 200 after that. /healthz is 200 throughout.
+
+Usage:
+    python test_readiness.py
+"""
+
+import time
+
+import startup
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def run_checks():
+    results = []
+
+    # 1. The tracker on its own
+    absent = {'value': False}
+    tracker = startup.StartupTracker(time.time(), lambda: absent['value'])
+    tracker.mark('recovered')
+    first = tracker.phases['recovered']
+    time.sleep(0.01)
+    tracker.mark('recovered')
+    results.append(check("a phase is stamped only the first time",
+                         tracker.phases['recovered'] == first and list(tracker.phases) == ['recovered']))
+    results.append(check(f"waiting for {tracker.ready()[1]}",
+                         tracker.ready() == (False, ['workers_started', 'serving', 'first_reading'])))
+
+    tracker.mark('workers_started')
+    tracker.mark('serving')
+    absent['value'] = True
+    status = tracker.status()
+    results.append(check("no board on any port counts as a settled source",
+                         status['ready'] and status['source_absent'] and status['waiting_for'] == []))
+    absent['value'] = False
+    tracker.mark('first_reading')
+    tracker.mark('first_emit')
+    status = tracker.status()
+    results.append(check(f"ready once data flows, cold start {status['cold_start_ms']} ms",
+                         status['ready'] and not status['source_absent']
+                         and status['cold_start_ms'] == tracker.phases['first_emit']))
+
+    # 2. The endpoints on the real app - imported only, no workers or server started
+    import app
+    client = app.app.test_client()
+    tracker = app.startup_tracker
+
+    ready = client.get('/readyz')
+    results.append(check(f"/readyz is 503 right after import, waiting for {ready.get_json()['waiting_for']}",
+                         ready.status_code == 503 and 'recovered' in ready.get_json()['waiting_for']
+                         and client.get('/healthz').status_code == 200))
+
+    for phase in startup.REQUIRED_PHASES:
+        tracker.mark(phase)
+    ready = client.get('/readyz')
+    results.append(check("still 503 with every phase done but no reading and a source that may appear",
+                         ready.status_code == 503 and ready.get_json()['waiting_for'] == ['first_reading']))
+
+    app.serial_supervisor.empty_rounds += 1     # a full probe round found no board
+    ready = client.get('/readyz')
+    app.serial_supervisor.empty_rounds -= 1
+    results.append(check("200 once the serial source is confirmed absent",
+                         ready.status_code == 200 and ready.get_json()['source_absent']))
+
+    app.handle_serial_line(('1000,22.5,45.0,300,0,150', time.time() * 1000, 'local'))
+    ready = client.get('/readyz')
+    results.append(check("200 after the first reading went through the pipeline",
+                         ready.status_code == 200 and not ready.get_json()['source_absent']
+                         and 'first_reading' in ready.get_json()['phases_ms']))
+
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL startup readiness...")
+    if run_checks():
+        print("✓ All readiness checks passed")
+    else:
+        print("❌ Some readiness checks failed")
@@ -0,0 +1,126 @@
+"""
+Alarm Rules Test for MARS-SENTINEL
+Parses and evaluates declarative alarm rules against synthetic readings
+
+Checks the rule grammar (valid rules parse to the expected tree, bad ones raise
+RuleError), threshold names looked up live, `for N s` holding, rising/falling
+windows including the gap case, AND/OR/NOT, and the RuleEngine setting alarm
+bits and status.
+
+Usage:
+    python test_rules.py
+"""
+
+import rules
+from readings import Reading
+from wire_format import alarm_bit
+
+THRESHOLDS = {'gas_warn': 400, 'gas_danger': 700, 'distance_warn': 50, 'humidity_warn': 80}
+
+def reading(t_s, temperature=22.0, humidity=45.0, gas=200, ir=0, distance=150, device_id='suit-1'):
+    return Reading(int(t_s * 1000), device_id, temperature, humidity, gas, ir, distance)
+
+def compile_rule(text, thresholds=THRESHOLDS):
+    check, _stateful = rules.Compiler(lambda: thresholds).compile(rules.Parser(text, set(thresholds)).parse())
+    return check
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def run_checks():
+    results = []
+
+    # 1. Grammar: precedence, units, threshold names
+    tree = rules.Parser('gas > 500 ppm for 3s AND distance < distance_warn OR NOT ir >= 1', set(THRESHOLDS)).parse()
+    expected = ('or', [('and', [('for', ('compare', 'gas_level', '>', 500.0), 3.0),
+                                ('compare', 'distance', '<', ('threshold', 'distance_warn'))]),
+                       ('not', ('compare', 'ir_detection', '>=', 1.0))])
+    results.append(check("AND binds tighter than OR, units skipped, threshold names resolved", tree == expected))
+
+    tree = rules.Parser('temperature rising > 3 °C/10 s', set(THRESHOLDS)).parse()
+    results.append(check("rising rule parses to a change node",
+                         tree == ('change', 'temperature', 1, '>', 3.0, 10.0)))
+
+    bad = ['', 'pressure > 3', 'gas 500', 'gas > nonsense', 'gas > 500 for 0s',
+           '(gas > 500', 'temperature rising > 3', 'gas > 500 distance < 3']
+    rejected = []
+    for text in bad:
+        try:
+            rules.Parser(text, set(THRESHOLDS)).parse()
+        except rules.RuleError:
+            rejected.append(text)
+    results.append(check(f"{len(rejected)}/{len(bad)} malformed rules raise RuleError", rejected == bad))
+
+    # 2. Threshold names are read on every evaluation
+    live = dict(THRESHOLDS)
+    gas_rule = compile_rule('gas > gas_warn', live)
+    before = gas_rule(reading(0, gas=500), 0, 'suit-1')
+    live['gas_warn'] = 600
+    results.append(check("threshold edits apply without recompiling",
+                         before and not gas_rule(reading(1, gas=500), 1, 'suit-1')))
+
+    # 3. `for` holds only after the condition has been true long enough, per device
+    sustained = compile_rule('gas > 500 for 3s')
+    fired = [sustained(reading(t, gas=600), t, 'suit-1') for t in (0, 1, 2, 3, 4)]
+    other = sustained(reading(4, gas=600, device_id='suit-2'), 4, 'suit-2')
+    sustained(reading(5, gas=100), 5, 'suit-1')
+    restarted = sustained(reading(6, gas=600), 6, 'suit-1')
+    results.append(check(f"for 3s fires from t=3 ({fired}), per device, resets when false",
+                         fired == [False, False, False, True, True] and not other and not restarted))
+
+    # 4. rising compares against the oldest sample inside the window, never across a gap
+    rise = compile_rule('temperature rising > 3 °C/10 s')
+    steady = [rise(reading(t, temperature=20 + t * 0.1), t, 'suit-1') for t in range(0, 10)]
+    fast = rise(reading(10, temperature=24.5), 10, 'suit-1')
+    gap = compile_rule('temperature rising > 3 °C/10 s')
+    gap(reading(0, temperature=20), 0, 'suit-1')
+    after_gap = gap(reading(60, temperature=25), 60, 'suit-1')
+    results.append(check("rising fires on a fast rise only, not across a 60 s gap",
+                         not any(steady) and fast and not after_gap))
+
+    fall = compile_rule('distance falling > 50 / 5 s')
+    fall(reading(0, distance=200), 0, 'suit-1')
+    results.append(check("falling fires on a drop", fall(reading(2, distance=120), 2, 'suit-1')))
+
+    # 5. Boolean combinations
+    combined = compile_rule('humidity > humidity_warn OR (ir >= 1 AND NOT distance > 100)')
+    cases = [
+        (reading(0, humidity=90), True),
+        (reading(0, ir=1, distance=40), True),
+        (reading(0, ir=1, distance=140), False),
+        (reading(0), False),
+    ]
+    results.append(check("AND / OR / NOT / parentheses evaluate correctly",
+                         all(combined(data, 0, 'suit-1') == want for data, want in cases)))
+
+    # 6. The engine sets alarm bits and raises the status by severity
+    engine = rules.RuleEngine(lambda: THRESHOLDS, {
+        'all': [{'name': 'Sustained Gas Exposure', 'when': 'gas > gas_warn for 2s', 'severity': 'WARN'}],
+        'eva': [{'name': 'Close Quarters', 'when': 'distance < 20', 'severity': 'DANGER'}],
+    })
+    statuses = []
+    for t, gas, distance in ((0, 500, 150), (1, 500, 150), (2, 500, 150), (3, 500, 10)):
+        data = reading(t, gas=gas, distance=distance)
+        engine.process(data)
+        statuses.append((data.status, data.alarm_mask))
+    gas_bit, close_bit = alarm_bit('Sustained Gas Exposure'), alarm_bit('Close Quarters')
+    results.append(check(f"engine statuses {[status for status, _ in statuses]}",
+                         statuses == [('OK', 0), ('OK', 0), ('WARN', gas_bit), ('DANGER', gas_bit | close_bit)]))
+
+    try:
+        engine.load({'eva': [{'name': 'Broken', 'when': 'gas >'}]})
+        swapped = True
+    except rules.RuleError:
+        swapped = False
+    results.append(check("a bad rule set is rejected and the old one kept",
+                         not swapped and [rule['name'] for rule in engine.rule_sets()['eva']] == ['Close Quarters']))
+
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL alarm rules...")
+    if run_checks():
+        print("✓ All alarm rule checks passed")
+    else:
+        print("❌ Some alarm rule checks failed")
@@ -0,0 +1,111 @@
+"""
+Percentile Sketch Test for MARS-SENTINEL
+Compares the DDSketch quantiles with exact ones and checks merging and windows
+
+Every reported quantile must be within RELATIVE_ACCURACY of the exact value
+at the same rank, merging two sketches must equal one sketch over all the
+values, and the sliding windows must forget slices that fell out of them.
+
+Usage:
+    python test_sketches.py
+"""
+
+import random
+
+import sketches
+from readings import Reading
+from wire_format import QUALITY_BITS
+
+QS = (0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0)
+
+def exact_quantiles(values, qs):
+    ordered = sorted(values)
+    return [ordered[int(q * (len(ordered) - 1))] for q in qs]
+
+def within_accuracy(estimates, exact):
+    # quantiles() rounds to 3 decimals on top of the bucket error
+    return all(abs(estimate - value) <= sketches.RELATIVE_ACCURACY * abs(value) + 0.0005
+               for estimate, value in zip(estimates, exact))
+
+def sketch_of(values):
+    sketch = sketches.DDSketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def run_checks():
+    rng = random.Random(3)
+    results = []
+
+    streams = {
+        'gas (lognormal ppm)': [rng.lognormvariate(5.5, 0.6) for _ in range(20000)],
+        'temperature (gaussian, crosses zero)': [rng.gauss(2, 15) for _ in range(20000)],
+        'distance (integer cm)': [rng.randint(0, 400) for _ in range(20000)],
+    }
+    for name, values in streams.items():
+        estimates = sketch_of(values).quantiles(QS)
+        results.append(check(f"{name}: quantiles within {sketches.RELATIVE_ACCURACY:.0%} of exact",
+                             within_accuracy(estimates, exact_quantiles(values, QS))))
+
+    # Merging is exact: same buckets, counts, sum, min and max as one sketch over both halves
+    values = streams['temperature (gaussian, crosses zero)']
+    merged = sketch_of(values[:7000]).merge(sketch_of(values[7000:]))
+    whole = sketch_of(values)
+    results.append(check("merge of two halves equals the sketch of the whole",
+                         merged.positive == whole.positive and merged.negative == whole.negative
+                         and merged.zero == whole.zero and merged.count == whole.count
+                         and (merged.min, merged.max) == (whole.min, whole.max)
+                         and abs(merged.sum - whole.sum) < 1e-6
+                         and merged.quantiles(QS) == whole.quantiles(QS)))
+
+    wide = sketch_of([10 ** rng.uniform(-5, 30) for _ in range(20000)])
+    results.append(check(f"bucket count stays bounded ({len(wide.positive)} <= {sketches.MAX_BUCKETS})",
+                         len(wide.positive) <= sketches.MAX_BUCKETS and wide.count == 20000))
+
+    # Sliding windows forget old slices; the mission sketch keeps everything until reset
+    stats = sketches.WindowedStats(sensors=('gas_level',))
+    start_s = 1_700_000_000
+    for second in range(120):
+        for device_id, gas in (('suit-1', 100 + second), ('suit-2', 900)):
+            stats.update(Reading((start_s + second) * 1000, device_id, 22.0, 45.0, gas, 0, 150))
+    now_s = start_s + 119
+    last_minute = stats.sketch('gas_level', '1m', ['suit-1'], now_s=now_s)
+    mission = stats.sketch('gas_level', sketches.MISSION_WINDOW, ['suit-1'], now_s=now_s)
+    fleet = stats.sketch('gas_level', '5m', now_s=now_s)
+    results.append(check(f"1m window holds the last minute only "
+                         f"({last_minute.count} readings, min {last_minute.min})",
+                         last_minute.count == 60 and last_minute.min == 160 and mission.count == 120))
+    results.append(check("fleet view merges every device",
+                         fleet.count == 240 and fleet.max == 900 and fleet.quantiles((0.99,)) == [900]))
+
+    suspect = Reading((start_s + 120) * 1000, 'suit-1', 22.0, 45.0, 5000, 0, 150,
+                      quality_mask=QUALITY_BITS['gas_level'])
+    stats.update(suspect)
+    results.append(check("readings flagged suspect stay out of the percentiles",
+                         stats.sketch('gas_level', sketches.MISSION_WINDOW, ['suit-1'], now_s=now_s).max == 219))
+
+    stats.reset_mission()
+    results.append(check("a new mission clears only the mission sketch",
+                         stats.sketch('gas_level', sketches.MISSION_WINDOW, now_s=now_s).count == 0
+                         and stats.sketch('gas_level', '1m', ['suit-1'], now_s=now_s).count == 60))
+
+    try:
+        sketches.parse_quantiles('0.5,150')
+        rejected = False
+    except ValueError:
+        rejected = True
+    results.append(check("quantile parsing accepts percents and rejects out-of-range values",
+                         sketches.parse_quantiles('99,0.5') == (0.5, 0.99) and rejected))
+
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL percentile sketches...")
+    if run_checks():
+        print("✓ All percentile sketch checks passed")
+    else:
+        print("❌ Some percentile sketch checks failed")
@@ -0,0 +1,106 @@
+"""
+Static Asset Test for MARS-SENTINEL
+Serves a dashboard from the in-memory asset store through a Flask test client
+
+Checks content-hash ETags per encoding, 304 on If-None-Match with no body,
+the no-cache / immutable Cache-Control split, gzip negotiation, 404 for an
+unknown asset, and hot reload in dev mode. Uses a temporary directory.
+
+Usage:
+    python test_static_assets.py
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+from flask import Flask, request
+
+import static_assets
+
+PAGE = '<!DOCTYPE html><html><body>' + '<div class="tile">--</div>' * 200 + '</body></html>'
+
+def make_app(directory, hot_reload=False):
+    store = static_assets.AssetStore(directory, hot_reload=hot_reload)
+    store.load(['dashboard.html'])
+    app = Flask(__name__)
+
+    @app.route('/<name>')
+    def asset(name):
+        return store.response(name, request)
+
+    return app.test_client(), store
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+def run_checks():
+    directory = tempfile.mkdtemp(prefix='assets-test-')
+    page = os.path.join(directory, 'dashboard.html')
+    with open(page, 'w') as file:
+        file.write(PAGE)
+    results = []
+    try:
+        client, store = make_app(directory)
+        version = store.assets['dashboard.html'].version
+
+        # 1. Full response, gzip when accepted, ETag per encoding
+        plain = client.get('/dashboard.html')
+        zipped = client.get('/dashboard.html', headers={'Accept-Encoding': 'gzip, deflate'})
+        results.append(check(f"200 with ETag {plain.headers['ETag']} and no-cache on the plain URL",
+                             plain.status_code == 200 and plain.data.decode() == PAGE
+                             and plain.headers['ETag'] == f'"{version}"'
+                             and plain.headers['Cache-Control'] == 'no-cache'
+                             and plain.headers['Vary'] == 'Accept-Encoding'
+                             and plain.content_type == 'text/html; charset=utf-8'))
+        results.append(check(f"gzip body served when accepted ({len(zipped.data)} of {len(PAGE)} bytes)",
+                             zipped.headers.get('Content-Encoding') == 'gzip'
+                             and gzip.decompress(zipped.data).decode() == PAGE
+                             and zipped.headers['ETag'] == f'"{version}-gzip"'))
+
+        # 2. Revalidation: matching ETag -> 304 with no body, stale ETag -> full body
+        revalidated = client.get('/dashboard.html', headers={'If-None-Match': plain.headers['ETag']})
+        results.append(check("matching If-None-Match gets a 304 with no body",
+                             revalidated.status_code == 304 and revalidated.data == b''
+                             and revalidated.headers['ETag'] == plain.headers['ETag']
+                             and store.not_modified == 1))
+        other_encoding = client.get('/dashboard.html', headers={'If-None-Match': plain.headers['ETag'],
+                                                                'Accept-Encoding': 'gzip'})
+        stale = client.get('/dashboard.html', headers={'If-None-Match': '"0123456789abcdef"'})
+        results.append(check("an ETag of another encoding or version does not match",
+                             other_encoding.status_code == 200 and stale.status_code == 200))
+
+        # 3. Versioned URL is immutable; a wrong version is not
+        pinned = client.get(f'/dashboard.html?v={version}')
+        wrong = client.get('/dashboard.html?v=outdated')
+        results.append(check("?v=<content hash> is cached for a year, anything else revalidates",
+                             'immutable' in pinned.headers['Cache-Control']
+                             and f'max-age={static_assets.IMMUTABLE_MAX_AGE}' in pinned.headers['Cache-Control']
+                             and wrong.headers['Cache-Control'] == 'no-cache'))
+
+        results.append(check("an asset that was never loaded is a 404",
+                             client.get('/missing.html').status_code == 404))
+
+        # 4. Dev mode re-reads an edited file and the old ETag stops matching
+        client, store = make_app(directory, hot_reload=True)
+        old_etag = client.get('/dashboard.html').headers['ETag']
+        time.sleep(0.01)
+        with open(page, 'w') as file:
+            file.write(PAGE.replace('--', 'OK'))
+        edited = client.get('/dashboard.html', headers={'If-None-Match': old_etag})
+        results.append(check("hot reload serves the edited file under a new ETag",
+                             edited.status_code == 200 and b'OK' in edited.data
+                             and edited.headers['ETag'] != old_etag))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return all(results)
+
+if __name__ == "__main__":
+    print("🧪 Testing MARS-SENTINEL static assets...")
+    if run_checks():
+        print("✓ All static asset checks passed")
+    else:
+        print("❌ Some static asset checks failed")
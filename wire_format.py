@@ -0,0 +1,264 @@
+"""
+MARS-SENTINEL Wire Format
+Compact encodings for sensor packets, shared by Socket.IO and the REST API
+
+Encodings:
+    json     - legacy verbose packet (default, what the dashboards expect)
+    compact  - JSON with short field codes, status/mode codes and an alarm bitmask
+    msgpack  - the compact packet as MessagePack (needs `pip install msgpack`)
+    binary   - 26-byte little-endian record per reading, then the device id (UTF-8, length-prefixed)
+
+The binary record carries alarms as a fixed-code bitmask only. A reading with
+an alarm registered at runtime (a custom rule) cannot be encoded that way, so
+it goes out as JSON instead - per emit on Socket.IO, per response over REST.
+"""
+
+import json
+import struct
+import threading
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Alarm code table - bit position is the index, never reorder, only append.
+# Readings carry alarms as a bitmask of these codes; names are materialized at the edges.
+ALARM_CODES = [
+    'Temperature Critical',
+    'Temperature Warning',
+    'Humidity Critical',
+    'Humidity Warning',
+    'Gas Contamination Critical',
+    'Gas Contamination Warning',
+    'Obstacle Too Close',
+    'Obstacle Warning',
+    'Edge/Fall Risk Detected',
+    'Temperature Spike Anomaly',
+    'Gas Spike Anomaly',
+    'Temperature Drift Anomaly',
+    'Temperature Sensor Stuck',
+    'Humidity Sensor Stuck',
+    'Gas Sensor Stuck',
+    'Distance Sensor Stuck',
+    'Sustained Gas Exposure',
+    'Rapid Temperature Rise',
+]
+ALARM_BITS = {name: 1 << index for index, name in enumerate(ALARM_CODES)}
+
+# Codes above are fixed on the wire; names first seen at runtime (custom rules)
+# get bits above STATIC_ALARM_MASK for this process only and travel by name
+STATIC_ALARM_MASK = (1 << len(ALARM_CODES)) - 1
+_alarm_lock = threading.Lock()
+
+# Channels a reading's quality mask can flag as not a trustworthy measurement
+# (substituted, out of range or stuck - see sensor_health.py). Append only.
+QUALITY_CHANNELS = ['temperature', 'humidity', 'gas_level', 'ir_detection', 'distance']
+QUALITY_BITS = {name: 1 << index for index, name in enumerate(QUALITY_CHANNELS)}
+
+STATUS_CODES = ['OK', 'WARN', 'DANGER']
+STATUS_INDEX = {name: index for index, name in enumerate(STATUS_CODES)}
+
+MODE_CODES = ['eva', 'mars', 'emergency', 'training']
+MODE_INDEX = {name: index for index, name in enumerate(MODE_CODES)}
+
+# Short field codes used by the compact and msgpack encodings
+SHORT_KEYS = {
+    'timestamp': 't',
+    'temperature': 'tp',
+    'humidity': 'h',
+    'gas_level': 'g',
+    'ir_detection': 'ir',
+    'distance': 'd',
+    'status': 's',
+    'alarms': 'a',
+    'mode': 'm',
+    'connected': 'c',
+    'device_id': 'dv',
+    'seq': 'q',
+    'quality': 'ql',
+}
+
+# version, timestamp_ms, temp*100, humidity*100, gas, ir, distance, status, mode, connected, alarm mask,
+# device id length - the device id bytes follow the record
+BINARY_RECORD = struct.Struct('<BQhHHBhBBBIB')
+BINARY_VERSION = 2
+MAX_DEVICE_ID_BYTES = 255
+BINARY_BATCH_HEADER = struct.Struct('<BI')  # version, record count
+
+ENCODINGS = ('json', 'compact', 'msgpack', 'binary')
+DEFAULT_ENCODING = 'json'
+
+MIMETYPES = {
+    'json': 'application/json',
+    'compact': 'application/json',
+    'msgpack': 'application/msgpack',
+    'binary': 'application/octet-stream',
+}
+
+def available_encodings():
+    """Encodings usable with the installed packages"""
+    return [encoding for encoding in ENCODINGS if encoding != 'msgpack' or msgpack is not None]
+
+def negotiate_encoding(requested, accept_header=''):
+    """Pick an encoding from an explicit request or an HTTP Accept header"""
+    if requested:
+        requested = requested.lower()
+        if requested == 'msgpack' and msgpack is None:
+            return 'compact'  # closest thing we can still send
+        return requested if requested in ENCODINGS else DEFAULT_ENCODING
+
+    accept_header = (accept_header or '').lower()
+    if 'application/msgpack' in accept_header or 'application/x-msgpack' in accept_header:
+        return 'msgpack' if msgpack is not None else 'compact'
+    if 'application/octet-stream' in accept_header:
+        return 'binary'
+    return DEFAULT_ENCODING
+
+def channels_from_mask(mask):
+    """Channel names for a quality mask, in QUALITY_CHANNELS order"""
+    return [name for name in QUALITY_CHANNELS if mask & QUALITY_BITS[name]]
+
+def alarm_bit(name):
+    """Bit for an alarm name, registering names not in the table yet"""
+    bit = ALARM_BITS.get(name)
+    if bit is None:
+        with _alarm_lock:
+            bit = ALARM_BITS.get(name)
+            if bit is None:
+                bit = ALARM_BITS[name] = 1 << len(ALARM_CODES)
+                ALARM_CODES.append(name)
+    return bit
+
+def alarm_mask(alarms):
+    """Convert a list of alarm strings to a bitmask"""
+    mask = 0
+    for alarm in alarms:
+        mask |= alarm_bit(alarm)
+    return mask
+
+def alarms_from_mask(mask):
+    """Convert an alarm bitmask back to alarm strings (only walks the set bits)"""
+    names = []
+    while mask:
+        low = mask & -mask
+        names.append(ALARM_CODES[low.bit_length() - 1])
+        mask ^= low
+    return names
+
+def compact_packet(reading):
+    """Short-key form of a Reading"""
+    packet = {
+        't': reading.timestamp,
+        'dv': reading.device_id,
+        'tp': reading.temperature,
+        'h': reading.humidity,
+        'g': reading.gas_level,
+        'ir': reading.ir_detection,
+        'd': reading.distance,
+        's': STATUS_INDEX.get(reading.status, 0),
+        'a': reading.alarm_mask & STATIC_ALARM_MASK,
+        'm': MODE_INDEX.get(reading.mode, 0),
+        'c': 1 if reading.connected else 0,
+    }
+    # Alarms without a fixed code (custom rules) still travel, just verbosely
+    extra = reading.alarm_mask & ~STATIC_ALARM_MASK
+    if extra:
+        packet['ax'] = alarms_from_mask(extra)
+    if reading.seq is not None:
+        packet['q'] = reading.seq
+    if reading.quality_mask:
+        packet['ql'] = reading.quality_mask
+    return packet
+
+def binary_encodable(reading):
+    """True unless the reading has alarms without a fixed code"""
+    return not reading.alarm_mask & ~STATIC_ALARM_MASK
+
+def pack_binary(reading):
+    """Pack one Reading into the binary record plus its device id"""
+    if not binary_encodable(reading):
+        extra = alarms_from_mask(reading.alarm_mask & ~STATIC_ALARM_MASK)
+        raise ValueError(f"Alarms {extra} have no fixed code and cannot be sent as binary")
+    device_id = reading.device_id.encode('utf-8')
+    if len(device_id) > MAX_DEVICE_ID_BYTES:
+        raise ValueError(f"Device id {reading.device_id!r} is too long for the binary record")
+    return BINARY_RECORD.pack(
+        BINARY_VERSION,
+        int(reading.timestamp),
+        _clamp(round(reading.temperature * 100), -32768, 32767),
+        _clamp(round(reading.humidity * 100), 0, 65535),
+        _clamp(int(reading.gas_level), 0, 65535),
+        _clamp(int(reading.ir_detection), 0, 255),
+        _clamp(int(reading.distance), -32768, 32767),
+        STATUS_INDEX.get(reading.status, 0),
+        MODE_INDEX.get(reading.mode, 0),
+        1 if reading.connected else 0,
+        reading.alarm_mask,
+        len(device_id),
+    ) + device_id
+
+def unpack_binary(record, offset=0):
+    """Decode one binary record back into a legacy sensor packet"""
+    return _unpack_binary_at(record, offset)[0]
+
+def unpack_binary_batch(body):
+    """Decode a REST binary body (batch header plus records) into legacy sensor packets"""
+    version, count = BINARY_BATCH_HEADER.unpack_from(body)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary version {version}")
+    packets = []
+    offset = BINARY_BATCH_HEADER.size
+    for _ in range(count):
+        packet, offset = _unpack_binary_at(body, offset)
+        packets.append(packet)
+    return packets
+
+def _unpack_binary_at(data, offset):
+    (version, timestamp, temp, humidity, gas, ir, distance,
+     status, mode, connected, mask, id_length) = BINARY_RECORD.unpack_from(data, offset)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary version {version}")
+    start = offset + BINARY_RECORD.size
+    end = start + id_length
+    return {
+        'timestamp': timestamp,
+        'device_id': bytes(data[start:end]).decode('utf-8'),
+        'temperature': temp / 100,
+        'humidity': humidity / 100,
+        'gas_level': gas,
+        'ir_detection': ir,
+        'distance': distance,
+        'status': STATUS_CODES[status],
+        'alarms': alarms_from_mask(mask),
+        'mode': MODE_CODES[mode],
+        'connected': bool(connected),
+    }, end
+
+def encode_for_socket(reading, encoding):
+    """Payload for a Socket.IO `sensor_update` emit"""
+    if encoding == 'compact':
+        return compact_packet(reading)
+    if encoding == 'msgpack':
+        return msgpack.packb(compact_packet(reading))
+    if encoding == 'binary' and binary_encodable(reading):
+        return pack_binary(reading)
+    return reading.to_dict()
+
+def encode_for_http(events, encoding):
+    """Body and mimetype for a list of events over REST"""
+    if encoding == 'compact':
+        body = json.dumps([compact_packet(event) for event in events], separators=(',', ':'))
+    elif encoding == 'msgpack':
+        body = msgpack.packb([compact_packet(event) for event in events])
+    elif encoding == 'binary' and all(binary_encodable(event) for event in events):
+        body = BINARY_BATCH_HEADER.pack(BINARY_VERSION, len(events)) + b''.join(
+            pack_binary(event) for event in events
+        )
+    else:
+        body = json.dumps([event.to_dict() for event in events])
+        encoding = 'json'
+    return body, MIMETYPES[encoding]
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))